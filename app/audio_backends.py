@@ -0,0 +1,446 @@
+# PT: Este arquivo contém os backends de áudio usados pelo Player. Todos têm a mesma interface
+#     (a do pygame.mixer.music: load, queue, play, pause, set_volume, get_busy, get_pos):
+#       - "pygame": o pygame/SDL, como antes. Decodifica dentro do processo.
+#       - "mpg123": um processo mpg123 em modo remoto (-R), controlado por um pipe. Não carrega
+#         o SDL no processo da jukebox e permite ajustar o buffer e o dispositivo de saída.
+#       - "null": não toca nada; para testes e benchmarks.
+#     Cada backend mede o próprio custo: tempo de abertura, memória e latência até o som começar
+#     (veja stats() e "python -m benchmarks.audio_backends"), para escolher o mais barato por placa.
+# EN: This file contains the audio backends used by the Player. They all share the same interface
+#     (pygame.mixer.music's: load, queue, play, pause, set_volume, get_busy, get_pos):
+#       - "pygame": pygame/SDL, as before. Decodes inside the process.
+#       - "mpg123": an mpg123 process in remote mode (-R), driven through a pipe. It keeps SDL out
+#         of the jukebox process and lets the buffer and output device be tuned.
+#       - "null": plays nothing; for tests and benchmarks.
+#     Every backend measures its own cost: open time, memory and latency until sound starts
+#     (see stats() and "python -m benchmarks.audio_backends"), to pick the cheapest one per board.
+
+import abc
+import os
+import subprocess
+import threading
+import time
+
+from app import metrics
+
+START_SECONDS = metrics.histogram(
+    "jukebox_audio_start_seconds", "Time from loading a track until the audio backend started playing it.",
+    ["backend"])
+
+
+class AudioError(Exception):
+    """
+    PT: Erro do backend ao abrir o dispositivo ou carregar uma faixa.
+    EN: Backend error while opening the device or loading a track.
+    """
+
+
+def _rss_mb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class AudioBackend(abc.ABC):
+    """
+    PT: Base dos backends: guarda as medições e define a interface usada pelo Player.
+    EN: Backend base: keeps the measurements and defines the interface used by the Player.
+    """
+    name = None
+    # PT: Se o backend toca a partir de um arquivo em memória (o PreloadCache).
+    # EN: Whether the backend plays from an in-memory file (the PreloadCache).
+    supports_memory = False
+
+    def __init__(self):
+        self.startup_seconds = None
+        self.memory_mb = None
+        self.last_start_seconds = None
+        self._starts = 0
+        self._start_total = 0.0
+        self._load_started = None
+
+    def open(self):
+        """
+        PT: Abre o dispositivo, medindo o tempo e a memória gastos.
+        EN: Opens the device, measuring the time and memory spent.
+        """
+        start = time.perf_counter()
+        rss_before = _rss_mb()
+        self._open()
+        self.startup_seconds = time.perf_counter() - start
+        if self.memory_mb is None and rss_before is not None:
+            self.memory_mb = max(0.0, (_rss_mb() or rss_before) - rss_before)
+
+    def _open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _record_start(self):
+        if self._load_started is None:
+            return
+        elapsed = time.perf_counter() - self._load_started
+        self._load_started = None
+        self.last_start_seconds = elapsed
+        self._starts += 1
+        self._start_total += elapsed
+        START_SECONDS.labels(self.name).observe(elapsed)
+
+    def stats(self):
+        """
+        PT: Custo medido do backend (abertura, memória e latência até o som começar).
+        EN: Measured cost of the backend (open time, memory and latency until sound starts).
+        """
+        def ms(seconds):
+            return round(seconds * 1000, 1) if seconds is not None else None
+        return {
+            "backend": self.name,
+            "startup_ms": ms(self.startup_seconds),
+            "memory_mb": round(self.memory_mb, 1) if self.memory_mb is not None else None,
+            "start_latency_ms": ms(self.last_start_seconds),
+            "start_latency_avg_ms": ms(self._start_total / self._starts) if self._starts else None,
+            "starts": self._starts
+        }
+
+    # --- Interface usada pelo Player / Interface used by the Player ---
+
+    @abc.abstractmethod
+    def load(self, path, source=None):
+        """
+        PT: Carrega a faixa (do arquivo em memória `source`, se o backend suportar) sem tocar.
+        EN: Loads the track (from the in-memory file `source`, if supported) without playing.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def queue(self, path, source=None):
+        """
+        PT: Define a faixa tocada logo depois da atual, sem intervalo.
+        EN: Sets the track played right after the current one, without a gap.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def play(self, fade_ms=0):
+        """
+        PT: Toca a faixa carregada; com fade_ms, o volume sobe de zero até o atual (se suportado).
+        EN: Plays the loaded track; with fade_ms, the volume rises from zero to the current one (if supported).
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def pause(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def unpause(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_volume(self, volume):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_busy(self):
+        """
+        PT: True se há uma faixa tocando ou pausada.
+        EN: True if a track is playing or paused.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_pos(self):
+        """
+        PT: Milissegundos tocados da faixa atual, ou -1 se parado.
+        EN: Milliseconds played of the current track, or -1 if stopped.
+        """
+        raise NotImplementedError
+
+
+class PygameBackend(AudioBackend):
+    """
+    PT: pygame.mixer.music. O pygame é importado só em open(), na thread do PlayerActor.
+    EN: pygame.mixer.music. pygame is only imported in open(), on the PlayerActor thread.
+    """
+    name = "pygame"
+    supports_memory = True
+
+    def __init__(self):
+        super().__init__()
+        self._music = None
+        self._error = None
+
+    def _open(self):
+        import pygame
+        pygame.mixer.init()
+        self._music = pygame.mixer.music
+        self._error = pygame.error
+
+    def close(self):
+        if self._music is not None:
+            import pygame
+            pygame.mixer.quit()
+            self._music = None
+
+    def load(self, path, source=None):
+        self._load_started = time.perf_counter()
+        try:
+            if source is not None:
+                self._music.load(source, os.path.splitext(path)[1].lstrip("."))
+            else:
+                self._music.load(path)
+        except self._error as e:
+            raise AudioError(str(e)) from e
+
+    def queue(self, path, source=None):
+        try:
+            if source is not None:
+                self._music.queue(source, os.path.splitext(path)[1].lstrip("."))
+            else:
+                self._music.queue(path)
+        except self._error as e:
+            raise AudioError(str(e)) from e
+
+    def play(self, fade_ms=0):
+        # PT: O play do pygame só retorna com o SDL já tocando.
+        # EN: pygame's play only returns with SDL already playing.
+        self._music.play(fade_ms=fade_ms)
+        self._record_start()
+
+    def pause(self):
+        self._music.pause()
+
+    def unpause(self):
+        self._music.unpause()
+
+    def set_volume(self, volume):
+        self._music.set_volume(volume)
+
+    def get_busy(self):
+        return self._music.get_busy()
+
+    def get_pos(self):
+        return self._music.get_pos()
+
+
+class Mpg123Backend(AudioBackend):
+    """
+    PT: Um processo "mpg123 -R" lendo comandos pela entrada padrão. Uma thread lê as respostas
+        (@P estado, @F posição, @E erro); quando a faixa termina, a faixa da fila é carregada.
+        Tocar da memória não é suportado: o mpg123 sempre lê o arquivo.
+    EN: An "mpg123 -R" process reading commands from its standard input. A thread reads the
+        replies (@P state, @F position, @E error); when the track ends, the queued track is loaded.
+        Playing from memory is not supported: mpg123 always reads the file.
+    """
+    name = "mpg123"
+
+    STOPPED, PAUSED, PLAYING = 0, 1, 2
+
+    def __init__(self, command="mpg123", buffer_kb=0, device=None, load_timeout=2.0):
+        """
+        Args:
+            command (str): PT: Executável do mpg123. | EN: mpg123 executable.
+            buffer_kb (int): PT: Buffer de saída (--buffer); 0 = sem buffer, menor latência.
+                             EN: Output buffer (--buffer); 0 = no buffer, lowest latency.
+            device (str): PT: Dispositivo de saída (-a), ex: "hw:1,0". | EN: Output device (-a), e.g. "hw:1,0".
+            load_timeout (float): PT: Espera máxima pela resposta de um LOAD. | EN: Maximum wait for a LOAD reply.
+        """
+        super().__init__()
+        self.command = command
+        self.buffer_kb = buffer_kb
+        self.device = device
+        self.load_timeout = load_timeout
+        self._process = None
+        self._condition = threading.Condition()
+        self._state = self.STOPPED
+        self._position = -1
+        self._error = None
+        self._queued = None
+
+    def _open(self):
+        args = [self.command, "-R"]
+        if self.buffer_kb:
+            args += ["--buffer", str(self.buffer_kb)]
+        if self.device:
+            args += ["-a", self.device]
+        try:
+            self._process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except OSError as e:
+            raise AudioError(f"could not start {self.command}: {e}") from e
+        # PT: O mpg123 anuncia "@R MPG123 ..." quando está pronto para receber comandos.
+        # EN: mpg123 announces "@R MPG123 ..." when it is ready to take commands.
+        banner = self._process.stdout.readline()
+        if not banner.startswith("@R"):
+            self._process.kill()
+            raise AudioError(f"unexpected reply from {self.command}: {banner.strip()!r}")
+        self.memory_mb = _rss_mb(self._process.pid)
+        threading.Thread(target=self._read_loop, name="mpg123-reader", daemon=True).start()
+
+    def close(self):
+        if self._process is not None:
+            try:
+                self._send("QUIT")
+                self._process.wait(timeout=2)
+            except (AudioError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+
+    def _send(self, command):
+        try:
+            self._process.stdin.write(command + "\n")
+            self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise AudioError(f"{self.command} is not running: {e}") from e
+
+    def _read_loop(self):
+        for line in self._process.stdout:
+            if line.startswith("@F "):
+                # PT: "@F <frame> <frames restantes> <segundos> <segundos restantes>"
+                # EN: "@F <frame> <frames left> <seconds> <seconds left>"
+                fields = line.split()
+                with self._condition:
+                    self._position = int(float(fields[3]) * 1000)
+                    if self._state == self.PLAYING:
+                        self._record_start()
+            elif line.startswith("@P "):
+                with self._condition:
+                    self._state = int(line.split()[1])
+                    if self._state == self.STOPPED:
+                        self._position = -1
+                        # PT: Fim da faixa: carrega a da fila imediatamente.
+                        # EN: End of the track: load the queued one right away.
+                        if self._queued is not None:
+                            path, self._queued = self._queued, None
+                            self._state = self.PLAYING
+                            self._position = 0
+                            self._send(f"LOAD {path}")
+                    self._condition.notify_all()
+            elif line.startswith("@E "):
+                with self._condition:
+                    self._error = line[3:].strip()
+                    self._condition.notify_all()
+        with self._condition:
+            self._state = self.STOPPED
+            self._position = -1
+            self._error = f"{self.command} exited"
+            self._condition.notify_all()
+
+    def load(self, path, source=None):
+        with self._condition:
+            self._queued = None
+            self._state = None
+            self._error = None
+            self._load_started = time.perf_counter()
+            # PT: LOADPAUSED carrega sem tocar (como o load do pygame); play() tira da pausa.
+            # EN: LOADPAUSED loads without playing (like pygame's load); play() unpauses.
+            self._send(f"LOADPAUSED {path}")
+            self._condition.wait_for(lambda: self._state == self.PAUSED or self._error, self.load_timeout)
+            if self._error:
+                self._state = self.STOPPED
+                raise AudioError(self._error)
+            if self._state != self.PAUSED:
+                raise AudioError(f"{self.command} did not load '{path}'")
+            self._position = 0
+
+    def queue(self, path, source=None):
+        with self._condition:
+            self._queued = path
+
+    def play(self, fade_ms=0):
+        # PT: O modo remoto do mpg123 não tem fade in; a faixa entra direto.
+        # EN: mpg123's remote mode has no fade in; the track starts at full level.
+        with self._condition:
+            if self._state == self.PAUSED:
+                self._send("PAUSE")
+                self._state = self.PLAYING
+
+    def pause(self):
+        with self._condition:
+            if self._state == self.PLAYING:
+                self._send("PAUSE")
+                self._state = self.PAUSED
+
+    def unpause(self):
+        self.play()
+
+    def set_volume(self, volume):
+        with self._condition:
+            self._send(f"VOLUME {volume * 100:.0f}")
+
+    def get_busy(self):
+        with self._condition:
+            return self._state in (self.PAUSED, self.PLAYING)
+
+    def get_pos(self):
+        with self._condition:
+            return self._position if self._state in (self.PAUSED, self.PLAYING) else -1
+
+
+class NullBackend(AudioBackend):
+    """
+    PT: Backend sem áudio e sem custo: as faixas "tocam" para sempre e a posição é o tempo decorrido.
+    EN: Audio-less, zero-cost backend: tracks "play" forever and the position is the elapsed time.
+    """
+    name = "null"
+    supports_memory = True
+
+    def __init__(self):
+        super().__init__()
+        self._loaded = False
+        self._started = None
+        self._paused_at = None
+
+    def load(self, path, source=None):
+        self._load_started = time.perf_counter()
+        self._loaded = True
+        self._started = None
+        self._paused_at = None
+
+    def queue(self, path, source=None):
+        pass
+
+    def play(self, fade_ms=0):
+        if self._loaded:
+            self._started = time.monotonic()
+            self._paused_at = None
+            self._record_start()
+
+    def pause(self):
+        if self._started is not None and self._paused_at is None:
+            self._paused_at = time.monotonic()
+
+    def unpause(self):
+        if self._paused_at is not None:
+            self._started += time.monotonic() - self._paused_at
+            self._paused_at = None
+
+    def set_volume(self, volume):
+        pass
+
+    def get_busy(self):
+        return self._started is not None
+
+    def get_pos(self):
+        if self._started is None:
+            return -1
+        return int(((self._paused_at or time.monotonic()) - self._started) * 1000)
+
+
+BACKENDS = {"pygame": PygameBackend, "mpg123": Mpg123Backend, "null": NullBackend}
+
+
+def create_backend(name, **options):
+    """
+    PT: Cria o backend pelo nome (JUKEBOX_AUDIO_BACKEND). As opções vão para o construtor.
+    EN: Creates the backend by name (JUKEBOX_AUDIO_BACKEND). The options go to the constructor.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown audio backend '{name}' (expected one of: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**options)
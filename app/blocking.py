@@ -0,0 +1,137 @@
+# PT: Este arquivo escolhe o modo de execução do servidor (threads do sistema, eventlet ou gevent)
+#     e tira do caminho as chamadas que bloqueiam (disco, pygame). No modo "threading" cada conexão
+#     é uma thread do sistema; nos modos eventlet/gevent as conexões são greenlets e uma chamada
+#     bloqueante pararia todas, então elas rodam em um pool limitado de threads do sistema.
+#     Não importa nada do app: monkey_patch() precisa rodar antes de qualquer outra importação.
+# EN: This file picks the server execution mode (OS threads, eventlet or gevent) and moves the
+#     blocking calls (disk, pygame) out of the way. In "threading" mode every connection is an OS
+#     thread; in eventlet/gevent modes connections are greenlets and a blocking call would stall
+#     all of them, so those calls run in a bounded pool of OS threads.
+#     It imports nothing from the app: monkey_patch() must run before any other import.
+
+ASYNC_MODES = ("threading", "eventlet", "gevent")
+
+_mode = "threading"
+_call = None
+_local = None
+_in_flight = None
+
+
+def monkey_patch(mode):
+    """
+    PT: Define o modo e, nos modos eventlet/gevent, aplica o monkey patching da biblioteca.
+    EN: Sets the mode and, in eventlet/gevent modes, applies the library's monkey patching.
+    """
+    global _mode
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"Unknown async mode '{mode}' (expected one of: {', '.join(ASYNC_MODES)})")
+    if mode == "eventlet":
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+    _mode = mode
+
+
+def async_mode():
+    return _mode
+
+
+def is_green():
+    """
+    PT: True se as conexões são greenlets (eventlet/gevent) e não threads do sistema.
+    EN: True if connections are greenlets (eventlet/gevent) rather than OS threads.
+    """
+    return _mode != "threading"
+
+
+def configure(max_workers=4):
+    """
+    PT: Cria o pool de threads do sistema usado por run_blocking. Só a primeira chamada vale.
+    EN: Creates the OS thread pool used by run_blocking. Only the first call takes effect.
+    """
+    global _call, _local, _in_flight
+    if _call is not None:
+        return
+    from app import metrics
+    _in_flight = metrics.gauge("jukebox_blocking_in_flight", "Blocking calls running in (or waiting for) the thread pool.")
+    if _mode == "eventlet":
+        from eventlet import patcher, tpool
+        tpool.set_num_threads(max_workers)
+        _local = patcher.original("threading").local()
+        _call = lambda fn, args, kwargs: tpool.execute(fn, *args, **kwargs)
+    elif _mode == "gevent":
+        from gevent import monkey
+        from gevent.threadpool import ThreadPool
+        pool = ThreadPool(max_workers)
+        _local = monkey.get_original("threading", "local")()
+        _call = lambda fn, args, kwargs: pool.apply(fn, args, kwargs)
+    else:
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        _local = threading.local()
+        _call = lambda fn, args, kwargs: pool.submit(fn, *args, **kwargs).result()
+
+
+def _in_pool(fn, args, kwargs):
+    _local.inside = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.inside = False
+
+
+def run_blocking(fn, *args, **kwargs):
+    """
+    PT: Executa fn no pool limitado e espera o resultado (só quem chamou espera; nos modos
+        eventlet/gevent as outras conexões continuam sendo atendidas). Limita também quantas
+        operações de disco rodam ao mesmo tempo no cartão SD.
+    EN: Runs fn in the bounded pool and waits for the result (only the caller waits; in
+        eventlet/gevent modes the other connections keep being served). It also limits how
+        many disk operations run at the same time on the SD card.
+    """
+    if _call is None:
+        configure()
+    # PT: Dentro do pool, roda direto: esperar por outra vaga do mesmo pool poderia travar.
+    # EN: Inside the pool, run directly: waiting for another slot of the same pool could deadlock.
+    if getattr(_local, "inside", False):
+        return fn(*args, **kwargs)
+    _in_flight.inc()
+    try:
+        return _call(_in_pool, (fn, args, kwargs), {})
+    finally:
+        _in_flight.dec()
+
+
+def native_lock():
+    """
+    PT: Trava do sistema, mesmo nos modos eventlet/gevent (onde threading.Lock vira uma trava
+        de greenlets). Serve para trechos curtos, sem espera, usados tanto por greenlets quanto
+        pelas threads do pool (ex: as métricas): uma trava de greenlets não pode ser disputada
+        por uma thread do sistema.
+    EN: OS lock, even in eventlet/gevent modes (where threading.Lock becomes a greenlet lock).
+        Meant for short sections that never wait, used by greenlets and pool threads alike
+        (e.g. the metrics): a greenlet lock cannot be contended by an OS thread.
+    """
+    if _mode == "eventlet":
+        from eventlet import patcher
+        return patcher.original("threading").Lock()
+    if _mode == "gevent":
+        from gevent import monkey
+        return monkey.get_original("threading", "Lock")()
+    import threading
+    return threading.Lock()
+
+
+def run_native(fn, *args, **kwargs):
+    """
+    PT: Garante que fn roda em uma thread do sistema. No modo "threading" quem chama já é uma
+        (ex: a thread do PlayerActor), então roda direto, sem disputar o pool com os uploads.
+    EN: Ensures fn runs on an OS thread. In "threading" mode the caller already is one (e.g.
+        the PlayerActor thread), so it runs directly, without competing with uploads for the pool.
+    """
+    if not is_green():
+        return fn(*args, **kwargs)
+    return run_blocking(fn, *args, **kwargs)
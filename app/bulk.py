@@ -0,0 +1,200 @@
+# PT: Este arquivo contém as funções de importação e exportação em lote:
+#     leitura de mapeamentos UID -> música em JSON/CSV e geração/leitura de um
+#     arquivo .zip com as músicas e as associações, para provisionar várias jukeboxes.
+# EN: This file contains the bulk import and export helpers:
+#     parsing UID -> song mappings in JSON/CSV and writing/reading a .zip
+#     archive with the songs and associations, to provision several jukeboxes.
+
+import csv
+import io
+import json
+import os
+import zipfile
+
+from app.blocking import run_blocking
+from app.playlist import AUDIO_EXTENSIONS, PLAYLIST_EXTENSIONS
+
+ARCHIVE_TAGS_NAME = "tags.json"
+ARCHIVE_MUSIC_PREFIX = "music/"
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def parse_mapping(data, content_type):
+    """
+    PT: Converte o corpo de uma requisição em um dicionário UID -> música.
+        Aceita JSON ({"uid": "musica.mp3"} ou {"associations": {...}}) ou CSV ("uid,musica.mp3").
+    EN: Converts a request body into a UID -> song dictionary.
+        Accepts JSON ({"uid": "song.mp3"} or {"associations": {...}}) or CSV ("uid,song.mp3").
+    """
+    text = data.decode("utf-8-sig")
+    if "csv" in (content_type or "") or "text/plain" in (content_type or ""):
+        mapping = {}
+        for row in csv.reader(io.StringIO(text)):
+            if len(row) < 2 or not row[0].strip() or row[0].strip().lower() == "uid":
+                continue
+            mapping[row[0].strip()] = row[1].strip()
+        return mapping
+
+    payload = json.loads(text)
+    if isinstance(payload, dict) and isinstance(payload.get("associations"), dict):
+        payload = payload["associations"]
+    if not isinstance(payload, dict):
+        raise ValueError("O mapeamento deve ser um objeto JSON. (The mapping must be a JSON object.)")
+    return {str(uid): str(song) for uid, song in payload.items()}
+
+
+def validate_mapping(mapping, known_songs):
+    """
+    PT: Retorna a lista de problemas do mapeamento (UIDs ou nomes inválidos, músicas inexistentes).
+    EN: Returns the list of problems in the mapping (invalid UIDs or names, missing songs).
+    """
+    errors = []
+    for uid, song in mapping.items():
+        if ":" in uid or "\n" in uid or not uid:
+            errors.append(f"UID inválido (invalid UID): '{uid}'")
+        elif "/" in song or "\\" in song or "\n" in song:
+            errors.append(f"Nome de arquivo inválido (invalid filename): '{song}'")
+        elif song not in known_songs:
+            errors.append(f"Arquivo não encontrado (file not found): '{song}'")
+    return errors
+
+
+class _ChunkBuffer:
+    """
+    PT: Destino de escrita sem seek para o zipfile; os bytes são retirados aos pedaços.
+    EN: Non-seekable write target for zipfile; the bytes are drained in pieces.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def export_archive(music_folder, songs, associations):
+    """
+    PT: Gera (em streaming) um .zip com tags.json e a pasta music/. Os MP3s são
+        armazenados sem compressão, pois já são comprimidos. `songs` pode ter caminhos
+        relativos ("Album/faixa.mp3"), guardados como estão.
+    EN: Generates (streaming) a .zip with tags.json and the music/ folder. MP3s are
+        stored without compression, as they are already compressed. `songs` may hold
+        relative paths ("Album/track.mp3"), stored as they are.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr(ARCHIVE_TAGS_NAME, json.dumps({"associations": associations}, indent=2, ensure_ascii=False))
+        yield buffer.drain()
+
+        for song in dict.fromkeys(songs):
+            path = os.path.join(music_folder, *song.split("/"))
+            try:
+                info = zipfile.ZipInfo.from_file(path, ARCHIVE_MUSIC_PREFIX + song)
+            except OSError:
+                continue
+            with open(path, "rb") as src, archive.open(info, "w", force_zip64=info.file_size > 2 ** 31) as dst:
+                for block in iter(lambda: src.read(STREAM_BLOCK_SIZE), b""):
+                    dst.write(block)
+                    yield buffer.drain()
+    yield buffer.drain()
+
+
+def member_name(name):
+    """
+    PT: Valida o caminho de um arquivo dentro de music/ no .zip. Caminhos absolutos ou com ".."
+        são recusados; arquivos ocultos ou que não são áudio/playlist são ignorados (None).
+    EN: Validates the path of a file inside music/ in the .zip. Absolute paths or paths with ".."
+        are refused; hidden files or files that are not audio/playlists are skipped (None).
+    """
+    parts = name.replace("\\", "/").split("/")
+    if name.startswith(("/", "\\")) or any(part in ("", "..") for part in parts):
+        raise ValueError(f"Caminho inválido no arquivo (invalid path in archive): '{name}'")
+    if any(part.startswith(".") for part in parts) or not name.lower().endswith(AUDIO_EXTENSIONS + PLAYLIST_EXTENSIONS):
+        return None
+    return "/".join(parts)
+
+
+def read_archive(fileobj):
+    """
+    PT: Lê um .zip exportado. Retorna o mapeamento, a lista de (nome, abrir_stream) das músicas
+        soltas em music/ e a mesma lista para os arquivos de álbuns e playlists, com o caminho
+        relativo mantido ("Album/faixa.mp3", "lista.m3u").
+    EN: Reads an exported .zip. Returns the mapping, the list of (name, open_stream) for the
+        loose songs in music/ and the same list for the album and playlist files, keeping
+        their relative path ("Album/track.mp3", "list.m3u").
+    """
+    archive = zipfile.ZipFile(fileobj)
+    mapping = {}
+    if ARCHIVE_TAGS_NAME in archive.namelist():
+        mapping = parse_mapping(archive.read(ARCHIVE_TAGS_NAME), "application/json")
+
+    songs, files = [], []
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or not name.startswith(ARCHIVE_MUSIC_PREFIX):
+            continue
+        relative = member_name(name[len(ARCHIVE_MUSIC_PREFIX):])
+        if relative is None:
+            continue
+        target = files if "/" in relative or relative.lower().endswith(PLAYLIST_EXTENSIONS) else songs
+        target.append((relative, lambda info=info: archive.open(info)))
+    return archive, mapping, songs, files
+
+
+def stage_files(music_folder, files, max_size):
+    """
+    PT: Grava os arquivos de álbuns e playlists em arquivos temporários ocultos ao lado do
+        destino. O destino precisa ficar dentro da pasta de músicas (mesma verificação com
+        realpath de playlist.py). Nada aparece na biblioteca até commit_files().
+    EN: Writes the album and playlist files into hidden temporary files next to their target.
+        The target must stay inside the music folder (same realpath check as playlist.py).
+        Nothing shows up in the library until commit_files().
+
+    Returns:
+        list: PT: Pares (temporário, destino). | EN: (temporary, target) pairs.
+    """
+    root = os.path.realpath(music_folder)
+    staged = []
+    try:
+        for name, open_stream in files:
+            target = os.path.realpath(os.path.join(root, *name.split("/")))
+            if os.path.commonpath([root, target]) != root or target == root:
+                raise ValueError(f"Caminho fora da pasta de músicas (path outside the music folder): '{name}'")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            part = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.part")
+            staged.append((part, target))
+            size = 0
+            with open_stream() as src, open(part, "wb") as dst:
+                for block in iter(lambda: src.read(STREAM_BLOCK_SIZE), b""):
+                    size += len(block)
+                    if size > max_size:
+                        raise ValueError(f"Arquivo muito grande (file too large): '{name}'")
+                    dst.write(block)
+                dst.flush()
+                run_blocking(os.fsync, dst.fileno())
+    except BaseException:
+        discard_files(staged)
+        raise
+    return staged
+
+
+def commit_files(staged):
+    for part, target in staged:
+        os.replace(part, target)
+
+
+def discard_files(staged):
+    for part, _target in staged:
+        try:
+            os.remove(part)
+        except FileNotFoundError:
+            pass
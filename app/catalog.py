@@ -0,0 +1,200 @@
+# PT: Este arquivo contém o catálogo de metadados das músicas, persistido em SQLite,
+#     e o indexador em segundo plano que o mantém atualizado. Cada faixa é identificada
+#     pelo nome do arquivo e validada pelo mtime e tamanho: só arquivos novos ou
+#     alterados são lidos de novo.
+# EN: This file contains the song metadata catalog, persisted in SQLite, and the
+#     background indexer that keeps it up to date. Each track is identified by its
+#     filename and validated by mtime and size: only new or changed files are read again.
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metadata import read_metadata
+from app.blocking import run_native
+from app.log import get_logger
+
+log = get_logger("library")
+
+METADATA_FIELDS = ("title", "artist", "album", "duration", "bitrate")
+
+
+class Catalog:
+    """
+    PT: Acesso ao banco SQLite. As consultas usam uma cópia em memória do catálogo,
+        para que /api/library e /api/status não dependam de I/O no cartão SD.
+    EN: Access to the SQLite database. Queries use an in-memory copy of the catalog,
+        so that /api/library and /api/status do not depend on SD card I/O.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tracks ("
+            " filename TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,"
+            " title TEXT, artist TEXT, album TEXT, duration REAL, bitrate INTEGER,"
+            " indexed_at REAL)"
+        )
+        self._conn.commit()
+        self._rows = {}
+        self.version = 0
+        self._listeners = []
+        self._load()
+
+    def add_listener(self, callback):
+        """
+        PT: Registra uma função chamada com a lista de arquivos cujos metadados mudaram.
+        EN: Registers a function called with the list of files whose metadata changed.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, filenames):
+        for callback in self._listeners:
+            callback(filenames)
+
+    def _load(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT filename, mtime_ns, size, title, artist, album, duration, bitrate FROM tracks")
+            self._rows = {row[0]: row[1:] for row in cursor}
+            self.version += 1
+
+    def stamp(self, filename):
+        """
+        PT: Retorna (mtime_ns, tamanho) registrados para o arquivo, ou None.
+        EN: Returns the (mtime_ns, size) recorded for the file, or None.
+        """
+        row = self._rows.get(filename)
+        return (row[0], row[1]) if row else None
+
+    def get(self, filename):
+        """
+        PT: Retorna os metadados de uma faixa, ou None se ainda não foi indexada.
+        EN: Returns a track's metadata, or None if it has not been indexed yet.
+        """
+        row = self._rows.get(filename)
+        if row is None:
+            return None
+        return dict(zip(METADATA_FIELDS, row[2:]))
+
+    def lookup(self, filenames):
+        return {name: meta for name in filenames if (meta := self.get(name)) is not None}
+
+    def store(self, results):
+        """
+        PT: Grava vários resultados em uma única transação.
+        EN: Writes several results in a single transaction.
+
+        Args:
+            results (list): PT: (nome, mtime_ns, tamanho, metadados). | EN: (name, mtime_ns, size, metadata).
+        """
+        if not results:
+            return
+        now = time.time()
+        rows = [(name, mtime, size, *(meta.get(key) for key in METADATA_FIELDS), now)
+                for name, mtime, size, meta in results]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            rows_in_memory = dict(self._rows)
+            for row in rows:
+                rows_in_memory[row[0]] = row[1:8]
+            self._rows = rows_in_memory
+            self.version += 1
+        self._notify([row[0] for row in rows])
+
+    def remove(self, filenames):
+        filenames = [name for name in filenames if name in self._rows]
+        if not filenames:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM tracks WHERE filename = ?", [(name,) for name in filenames])
+            rows_in_memory = dict(self._rows)
+            for name in filenames:
+                rows_in_memory.pop(name, None)
+            self._rows = rows_in_memory
+            self.version += 1
+        self._notify(filenames)
+
+    def filenames(self):
+        return list(self._rows)
+
+
+class CatalogIndexer:
+    """
+    PT: Indexador em segundo plano. Recebe nomes de arquivos a verificar, lê os metadados
+        dos que mudaram usando um pool limitado de workers e grava os resultados em lotes.
+    EN: Background indexer. Receives filenames to check, reads the metadata of the changed
+        ones using a bounded worker pool, and writes the results in batches.
+    """
+
+    def __init__(self, catalog, folder, max_workers=2, batch_size=50):
+        self.catalog = catalog
+        self.folder = folder
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._pending = queue.Queue()
+        self.indexed = 0
+        self.errors = 0
+
+    def start(self, filenames):
+        """
+        PT: Remove do catálogo os arquivos que não existem mais e agenda os demais.
+        EN: Removes files that no longer exist from the catalog and schedules the rest.
+        """
+        present = set(filenames)
+        self.catalog.remove([name for name in self.catalog.filenames() if name not in present])
+        threading.Thread(target=self._run, daemon=True).start()
+        self.schedule(filenames)
+
+    def schedule(self, filenames):
+        for name in filenames:
+            self._pending.put(name)
+
+    def on_library_change(self, kind, name):
+        # PT: Conectado ao LibraryIndex: indexa músicas novas e remove as apagadas.
+        # EN: Hooked to LibraryIndex: indexes new songs and removes deleted ones.
+        if kind in ("added", "changed"):
+            self.schedule([name])
+        elif kind == "removed":
+            self.catalog.remove([name])
+
+    def _changed(self, name):
+        try:
+            st = os.stat(os.path.join(self.folder, name))
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        return None if self.catalog.stamp(name) == stamp else stamp
+
+    def _extract(self, name, stamp):
+        try:
+            return name, stamp[0], stamp[1], run_native(read_metadata, os.path.join(self.folder, name))
+        except Exception as e:
+            self.errors += 1
+            log.warning("Erro ao ler metadados de '%s': %s / Error reading metadata of '%s': %s", name, e, name, e)
+            return name, stamp[0], stamp[1], {}
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="catalog") as pool:
+            while True:
+                # PT: Agrupa os nomes pendentes em lotes para gravar no SQLite de uma vez.
+                # EN: Groups the pending names into batches to write to SQLite at once.
+                batch = [self._pending.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._pending.get_nowait())
+                    except queue.Empty:
+                        break
+
+                jobs = [(name, stamp) for name in dict.fromkeys(batch) if (stamp := self._changed(name))]
+                results = list(pool.map(lambda job: self._extract(*job), jobs))
+                self.catalog.store(results)
+                self.indexed += len(results)
@@ -0,0 +1,101 @@
+# PT: Este arquivo contém o feed de alterações da biblioteca: cada música adicionada/removida
+#     e cada associação gravada/removida recebe um número de versão crescente e fica em um
+#     buffer circular. Os clientes pedem só o que mudou depois da versão que já têm (ou recebem
+#     as alterações por WebSocket) e só baixam a biblioteca inteira se ficaram para trás demais.
+# EN: This file contains the library change feed: every song added/removed and every
+#     association set/deleted gets an increasing version number and is kept in a ring buffer.
+#     Clients ask only for what changed after the version they already have (or receive the
+#     changes over WebSocket) and only download the whole library if they fell too far behind.
+
+import itertools
+import threading
+from collections import deque
+
+from app.tag_store import TOMBSTONE
+from app.log import get_logger
+
+log = get_logger("library")
+
+
+class ChangeFeed:
+    """
+    PT: Buffer circular de alterações com versões contíguas. A época muda a cada início do
+        servidor; uma versão de outra época nunca é aceita em `since`.
+    EN: Ring buffer of changes with contiguous versions. The epoch changes on every server
+        start; a version from another epoch is never accepted by `since`.
+    """
+
+    def __init__(self, epoch, capacity=1000):
+        """
+        Args:
+            epoch (str): PT: Identificador desta execução. | EN: Identifier of this run.
+            capacity (int): PT: Alterações mantidas em memória. | EN: Changes kept in memory.
+        """
+        self.epoch = epoch
+        self.version = 0
+        self._changes = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        PT: Registra uma função chamada com a lista de alterações de cada gravação.
+        EN: Registers a function called with the list of changes of each write.
+        """
+        self._listeners.append(callback)
+
+    def record(self, changes):
+        """
+        PT: Numera e guarda as alterações (dicts com "type" e "op") e avisa os ouvintes.
+        EN: Numbers and stores the changes (dicts with "type" and "op") and notifies the listeners.
+        """
+        if not changes:
+            return []
+        with self._lock:
+            numbered = []
+            for change in changes:
+                self.version += 1
+                numbered.append(dict(change, version=self.version))
+            self._changes.extend(numbered)
+        for callback in self._listeners:
+            try:
+                callback(numbered)
+            except Exception as e:
+                log.error("Erro em um ouvinte do feed: %s / Error in a feed listener: %s", e, e)
+        return numbered
+
+    def since(self, version, epoch=None):
+        """
+        PT: Retorna as alterações posteriores a `version`, ou None se elas já saíram do buffer
+            (ou a versão é de outra época) e o cliente precisa de um snapshot completo.
+        EN: Returns the changes after `version`, or None if they already left the buffer
+            (or the version is from another epoch) and the client needs a full snapshot.
+        """
+        with self._lock:
+            if (epoch is not None and epoch != self.epoch) or not 0 <= version <= self.version:
+                return None
+            if version == self.version:
+                return []
+            oldest = self._changes[0]["version"] if self._changes else self.version + 1
+            if version < oldest - 1:
+                return None
+            return list(itertools.islice(self._changes, version - oldest + 1, None))
+
+    # --- Fontes / Sources ---
+
+    def on_library_change(self, event, name):
+        """
+        PT: Ouvinte do LibraryIndex ("added" | "removed" | "changed", nome).
+        EN: LibraryIndex listener ("added" | "removed" | "changed", name).
+        """
+        op = {"added": "add", "removed": "remove", "changed": "change"}[event]
+        self.record([{"type": "song", "op": op, "name": name}])
+
+    def on_tags_change(self, changes):
+        """
+        PT: Ouvinte do TagStore (lista de (uid, música); música vazia = remoção).
+        EN: TagStore listener (list of (uid, song); empty song = removal).
+        """
+        self.record([{"type": "association", "op": "delete", "uid": uid, "song": None} if song == TOMBSTONE
+                     else {"type": "association", "op": "set", "uid": uid, "song": song}
+                     for uid, song in changes])
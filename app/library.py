@@ -0,0 +1,242 @@
+# PT: Este arquivo mantém um índice em memória da pasta de músicas.
+#     O índice é atualizado incrementalmente: via inotify (Linux) quando disponível,
+#     ou verificando o mtime do diretório antes de cada consulta.
+# EN: This file keeps an in-memory index of the music folder.
+#     The index is updated incrementally: via inotify (Linux) when available,
+#     or by checking the directory's mtime before each query.
+
+import bisect
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+
+from app.blocking import run_blocking
+from app.log import get_logger
+
+log = get_logger("library")
+
+# PT: Constantes do inotify (veja <sys/inotify.h>).
+# EN: inotify constants (see <sys/inotify.h>).
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """
+    PT: Retorna as funções inotify da libc, ou None se não estiverem disponíveis.
+    EN: Returns the libc inotify functions, or None if they are not available.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class LibraryIndex:
+    """
+    PT: Lista ordenada das músicas da pasta, com um número de versão que muda a cada alteração.
+    EN: Sorted list of the songs in the folder, with a version number that changes on every change.
+    """
+
+    def __init__(self, folder, extensions=(".mp3",)):
+        self.folder = folder
+        self.extensions = tuple(extensions)
+        self.version = 0
+        self._songs = []
+        self._song_set = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dir_mtime = None
+        self._watching = False
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        PT: Registra uma função chamada com ("added" | "removed" | "changed", nome) a cada mudança.
+        EN: Registers a function called with ("added" | "removed" | "changed", name) on each change.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, added=(), removed=(), changed=()):
+        for callback in self._listeners:
+            for name in removed:
+                callback("removed", name)
+            for name in added:
+                callback("added", name)
+            for name in changed:
+                callback("changed", name)
+
+    def _accepts(self, name):
+        return name.endswith(self.extensions) and not name.startswith(".")
+
+    # --- Inicialização / Startup ---
+
+    def start(self):
+        """
+        PT: Faz a varredura inicial e tenta iniciar o monitoramento por inotify.
+        EN: Performs the initial scan and tries to start inotify monitoring.
+        """
+        self.rescan()
+        self._watching = self._start_inotify()
+        mode = "inotify" if self._watching else "mtime"
+        log.info("Biblioteca indexada com %d músicas (%s). / Library indexed with %d songs (%s).",
+                 len(self._songs), mode, len(self._songs), mode)
+
+    def _start_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return False
+
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return False
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+        if libc.inotify_add_watch(fd, os.fsencode(self.folder), mask) < 0:
+            os.close(fd)
+            return False
+
+        threading.Thread(target=self._inotify_loop, args=(fd,), daemon=True).start()
+        return True
+
+    def _inotify_loop(self, fd):
+        """
+        PT: Thread que lê os eventos do inotify e aplica as mudanças uma a uma.
+        EN: Thread that reads inotify events and applies the changes one by one.
+        """
+        while True:
+            try:
+                # PT: Espera com select (que o eventlet/gevent tornam cooperativo) antes de ler.
+                # EN: Waits with select (which eventlet/gevent make cooperative) before reading.
+                select.select([fd], [], [])
+                data = os.read(fd, 64 * 1024)
+            except OSError as e:
+                log.error("Monitoramento da biblioteca interrompido: %s / Library monitoring stopped: %s", e, e)
+                break
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.rescan()
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    # PT: A pasta foi removida ou movida; volta para a verificação por mtime.
+                    # EN: The folder was removed or moved; fall back to mtime checks.
+                    self._watching = False
+                    os.close(fd)
+                    return
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    if name in self._song_set:
+                        # PT: Um arquivo existente foi sobrescrito. | EN: An existing file was overwritten.
+                        self._notify(changed=[name])
+                    else:
+                        self.add(name)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.remove(name)
+        self._watching = False
+
+    # --- Atualização / Updating ---
+
+    def rescan(self):
+        """
+        PT: Relê a pasta e aplica apenas as diferenças ao índice.
+        EN: Re-reads the folder and applies only the differences to the index.
+        """
+        try:
+            mtime, names = run_blocking(self._scan)
+        except FileNotFoundError:
+            mtime, names = None, set()
+
+        with self._lock:
+            self._dir_mtime = mtime
+            self._loaded = True
+            if names == self._song_set:
+                return
+            added = names - self._song_set
+            removed = self._song_set - names
+            self._song_set = names
+            self._songs = sorted(names)
+            self.version += 1
+        self._notify(sorted(added), sorted(removed))
+
+    def _scan(self):
+        mtime = os.stat(self.folder).st_mtime_ns
+        return mtime, {f for f in os.listdir(self.folder) if self._accepts(f)}
+
+    def refresh_if_changed(self):
+        """
+        PT: Sem inotify, relê a pasta somente se o mtime do diretório mudou.
+        EN: Without inotify, re-reads the folder only if the directory's mtime changed.
+        """
+        if not self._loaded:
+            self.rescan()
+            return
+        if self._watching:
+            return
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._dir_mtime:
+            self.rescan()
+
+    def add(self, name):
+        """
+        PT: Adiciona uma música ao índice (ex: após um upload). Idempotente.
+        EN: Adds a song to the index (e.g. after an upload). Idempotent.
+        """
+        if not self._accepts(name):
+            return
+        with self._lock:
+            if name in self._song_set:
+                return
+            self._song_set.add(name)
+            bisect.insort(self._songs, name)
+            self.version += 1
+        self._notify(added=[name])
+
+    def remove(self, name):
+        """
+        PT: Remove uma música do índice. Idempotente.
+        EN: Removes a song from the index. Idempotent.
+        """
+        with self._lock:
+            if name not in self._song_set:
+                return
+            self._song_set.discard(name)
+            index = bisect.bisect_left(self._songs, name)
+            del self._songs[index]
+            self.version += 1
+        self._notify(removed=[name])
+
+    # --- Consulta / Querying ---
+
+    def __contains__(self, name):
+        self.refresh_if_changed()
+        return name in self._song_set
+
+    def page(self, offset=0, limit=None):
+        """
+        PT: Retorna (versão, total, músicas) para o intervalo pedido.
+        EN: Returns (version, total, songs) for the requested range.
+        """
+        self.refresh_if_changed()
+        with self._lock:
+            end = None if limit is None else offset + limit
+            return self.version, len(self._songs), self._songs[offset:end]
@@ -0,0 +1,236 @@
+# PT: Este arquivo configura o log da jukebox. As threads do RFID, do player e das rotas só colocam
+#     o registro em uma fila (sem esperar por disco); uma thread de fundo escreve no console
+#     (journald, no cartão SD) e guarda os mais recentes em memória, para /api/logs/recent.
+#     Mensagens repetidas (ex: arrastar o controle de volume) são limitadas por modelo de mensagem,
+#     e cada subsistema tem o próprio nível (JUKEBOX_LOG_LEVEL e JUKEBOX_LOG_LEVELS).
+# EN: This file sets up the jukebox logging. The RFID, player and route threads only put the record
+#     in a queue (without waiting on disk); a background thread writes to the console (journald,
+#     on the SD card) and keeps the most recent ones in memory, for /api/logs/recent.
+#     Repeated messages (e.g. dragging the volume slider) are rate limited per message template,
+#     and every subsystem has its own level (JUKEBOX_LOG_LEVEL and JUKEBOX_LOG_LEVELS).
+
+import atexit
+import itertools
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+
+from app import metrics
+
+ROOT = "jukebox"
+# PT: Loggers de bibliotecas tratados como subsistemas (o log de requisições do Werkzeug vira "http").
+# EN: Library loggers handled as subsystems (Werkzeug's request log becomes "http").
+EXTERNAL = {"http": "werkzeug"}
+
+SUPPRESSED = metrics.counter("jukebox_log_suppressed", "Log records dropped by the repeated-message rate limit.")
+DROPPED = metrics.counter("jukebox_log_dropped", "Log records dropped because the log queue was full.")
+
+_listener = None
+_recent = None
+
+
+def get_logger(subsystem):
+    """
+    PT: Logger de um subsistema (ex: "rfid", "player"), configurável em JUKEBOX_LOG_LEVELS.
+    EN: Logger of a subsystem (e.g. "rfid", "player"), configurable in JUKEBOX_LOG_LEVELS.
+    """
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+def subsystem_of(name):
+    for subsystem, logger_name in EXTERNAL.items():
+        if name == logger_name or name.startswith(logger_name + "."):
+            return subsystem
+    return name[len(ROOT) + 1:] if name.startswith(ROOT + ".") else name
+
+
+def parse_level(value):
+    level = logging.getLevelName(value.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level '{value}' (expected DEBUG, INFO, WARNING, ERROR or CRITICAL)")
+    return level
+
+
+def parse_levels(spec):
+    """
+    PT: Lê níveis por subsistema no formato "rfid=DEBUG,http=WARNING".
+    EN: Parses per-subsystem levels in the "rfid=DEBUG,http=WARNING" format.
+    """
+    levels = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        subsystem, _, level = item.partition("=")
+        if not level:
+            raise ValueError(f"Invalid log level entry '{item}' (expected subsystem=LEVEL)")
+        levels[subsystem.strip()] = parse_level(level)
+    return levels
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    PT: Deixa passar no máximo `burst` registros do mesmo modelo de mensagem (logger + texto antes
+        da formatação) a cada `window` segundos. O primeiro registro da janela seguinte informa
+        quantos foram omitidos.
+    EN: Lets at most `burst` records of the same message template (logger + text before
+        formatting) through every `window` seconds. The first record of the next window
+        reports how many were left out.
+    """
+
+    def __init__(self, burst=5, window=10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._windows = {}  # (logger, template) -> [start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not self.burst:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                record.suppressed = entry[2] if entry else 0
+                self._windows[key] = [now, 1, 0]
+                return True
+            entry[1] += 1
+            if entry[1] <= self.burst:
+                return True
+            entry[2] += 1
+        SUPPRESSED.inc()
+        return False
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    PT: Com a fila cheia (escrita travada), descarta o registro em vez de bloquear quem loga.
+    EN: With the queue full (writes stuck), drops the record instead of blocking the caller.
+    """
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED.inc()
+
+
+class RecentLogs(logging.Handler):
+    """
+    PT: Os últimos registros em memória (buffer circular), sem tocar no disco.
+    EN: The latest records in memory (ring buffer), without touching the disk.
+    """
+
+    def __init__(self, size=500):
+        super().__init__()
+        self._records = deque(maxlen=size)
+        self._seq = itertools.count(1)
+
+    def emit(self, record):
+        self._records.append({
+            "seq": next(self._seq),
+            "time": record.created,
+            "level": record.levelname,
+            "subsystem": subsystem_of(record.name),
+            "message": record.getMessage(),
+            "suppressed": getattr(record, "suppressed", 0),
+        })
+
+    def recent(self, limit=100, level=None, subsystem=None, since=0):
+        """
+        PT: Registros mais recentes (do mais antigo ao mais novo), filtrados por nível mínimo,
+            subsistema e seq (só os posteriores a `since`).
+        EN: Most recent records (oldest to newest), filtered by minimum level, subsystem and
+            seq (only those after `since`).
+        """
+        minimum = parse_level(level) if level else logging.NOTSET
+        records = [r for r in list(self._records)
+                   if r["seq"] > since and logging.getLevelName(r["level"]) >= minimum
+                   and (subsystem is None or r["subsystem"] == subsystem)]
+        return records[-limit:] if limit else []
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """
+    PT: Escreve no sys.stdout do momento da escrita, como o print (que pode ter sido redirecionado).
+    EN: Writes to sys.stdout as of the write, like print (which may have been redirected).
+    """
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (+{suppressed} repetidas omitidas / repeated omitted)"
+        return line
+
+
+def setup(level="INFO", levels="", ring_size=500, burst=5, window=10.0, queue_size=1000):
+    """
+    PT: Liga o log em fila. Só a primeira chamada vale.
+    EN: Turns on the queued logging. Only the first call takes effect.
+
+    Args:
+        level (str): PT: Nível padrão dos subsistemas. | EN: Default level of the subsystems.
+        levels (str): PT: Níveis por subsistema ("rfid=DEBUG,http=WARNING"). | EN: Per-subsystem levels.
+        ring_size (int): PT: Registros guardados para /api/logs/recent. | EN: Records kept for /api/logs/recent.
+        burst (int): PT: Repetições permitidas por janela (0 = sem limite). | EN: Repeats allowed per window (0 = no limit).
+        window (float): PT: Janela do limite, em segundos. | EN: Rate limit window, in seconds.
+        queue_size (int): PT: Registros aguardando escrita antes de descartar. | EN: Records waiting to be written before dropping.
+    """
+    global _listener, _recent
+    if _listener is not None:
+        return
+
+    # PT: O formato não usa arquivo/linha, thread nem processo: não coletá-los barateia cada registro
+    #     (otimizações indicadas na documentação do logging).
+    # EN: The format uses neither file/line, thread nor process: not collecting them makes every record
+    #     cheaper (optimizations listed in the logging documentation).
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    records = queue.Queue(queue_size)
+    handler = _NonBlockingQueueHandler(records)
+    handler.addFilter(RateLimitFilter(burst, window))
+
+    console = _StdoutHandler()
+    console.setFormatter(_ConsoleFormatter("%(levelname)s %(name)s: %(message)s"))
+    _recent = RecentLogs(ring_size)
+
+    default = parse_level(level)
+    for name in (ROOT, *EXTERNAL.values()):
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.setLevel(default)
+        logger.propagate = False
+    for subsystem, subsystem_level in parse_levels(levels).items():
+        logging.getLogger(EXTERNAL.get(subsystem, f"{ROOT}.{subsystem}")).setLevel(subsystem_level)
+
+    metrics.gauge("jukebox_log_queue_depth", "Log records waiting for the background writer.").set_function(records.qsize)
+    _listener = QueueListener(records, console, _recent)
+    _listener.start()
+    # PT: Ao sair, escreve o que ainda estiver na fila.
+    # EN: On exit, writes whatever is still in the queue.
+    atexit.register(_listener.stop)
+
+
+def recent(limit=100, level=None, subsystem=None, since=0):
+    if _recent is None:
+        return []
+    return _recent.recent(limit, level, subsystem, since)
@@ -0,0 +1,381 @@
+# PT: Este arquivo contém a normalização de volume (no estilo ReplayGain). A análise é feita
+#     antes, fora do caminho de reprodução: cada faixa é decodificada uma única vez, em um pool
+#     de processos (até MAX_DEFAULT_WORKERS), e o ganho calculado fica salvo em loudness.json,
+#     indexado pelo hash do conteúdo. Ao tocar, o Player apenas consulta o ganho salvo.
+#     Com o ffmpeg, o áudio é lido em blocos de 50 ms, sem guardar a faixa inteira na memória.
+# EN: This file contains volume normalization (ReplayGain style). The analysis is done ahead
+#     of time, outside the playback path: each track is decoded only once, in a process pool
+#     (up to MAX_DEFAULT_WORKERS), and the computed gain is saved to loudness.json, keyed by the
+#     content hash. At play time, the Player only looks up the saved gain.
+#     With ffmpeg, the audio is read in 50 ms blocks, without holding the whole track in memory.
+#
+# PT: Uso / EN: Usage:  python -m app.loudness [pasta/folder] [--workers N] [--output loudness.json]
+
+import argparse
+import array
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from app.blocking import run_blocking
+from app.log import get_logger
+
+log = get_logger("library")
+
+# PT: audioop (C) é bem mais rápido; sem ele (Python 3.13+), o cálculo é feito em Python puro.
+# EN: audioop (C) is much faster; without it (Python 3.13+), the math is done in pure Python.
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+AUDIO_EXTENSIONS = (".mp3",)
+LOUDNESS_FILE = "loudness.json"
+
+# PT: Nível de referência (dBFS RMS) e limites do ganho aplicado.
+# EN: Reference level (dBFS RMS) and limits of the applied gain.
+TARGET_DBFS = -18.0
+MIN_GAIN_DB = -18.0
+MAX_GAIN_DB = 12.0
+
+# PT: Parâmetros da decodificação para análise (mono, 22.05 kHz bastam para medir volume).
+# EN: Decoding parameters for analysis (mono, 22.05 kHz are enough to measure loudness).
+ANALYSIS_RATE = 22050
+BLOCK_SECONDS = 0.05
+BLOCK_BYTES = int(ANALYSIS_RATE * BLOCK_SECONDS) * 2
+LOUDNESS_PERCENTILE = 0.95
+HASH_BLOCK_SIZE = 1024 * 1024
+# PT: Resultado de uma faixa só com silêncio: não há volume para medir, e ela toca sem ganho.
+# EN: Result of a silence-only track: there is no loudness to measure, and it plays without gain.
+SILENT = {"loudness_db": None, "peak_db": None, "gain_db": 0.0, "silent": True}
+# PT: Processos padrão do pool. Sem o ffmpeg, o pygame decodifica a faixa inteira na memória
+#     (~158 MB por hora de áudio), então vários processos podem esgotar a RAM de um Pi.
+# EN: Default pool processes. Without ffmpeg, pygame decodes the whole track in memory
+#     (~158 MB per hour of audio), so several processes can exhaust a Pi's RAM.
+MAX_DEFAULT_WORKERS = 2
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def gain_to_factor(gain_db):
+    return 10 ** (gain_db / 20.0)
+
+
+# --- Análise (executada nos processos do pool) / Analysis (runs in the pool processes) ---
+
+_mixer_ready = False
+
+
+def _pygame_blocks(path):
+    global _mixer_ready
+    import pygame
+    if not _mixer_ready:
+        # PT: Cada processo abre o mixer sem saída de áudio real.
+        # EN: Each process opens the mixer without a real audio output.
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.mixer.init(frequency=ANALYSIS_RATE, size=-16, channels=1)
+        _mixer_ready = True
+    # PT: O Sound guarda a faixa decodificada; os blocos são fatias dela, sem cópia (get_raw copiaria).
+    # EN: The Sound holds the decoded track; the blocks are slices of it, without a copy (get_raw would copy).
+    pcm = memoryview(pygame.mixer.Sound(path)).cast("B")
+    for offset in range(0, len(pcm) - BLOCK_BYTES + 1, BLOCK_BYTES):
+        yield pcm[offset:offset + BLOCK_BYTES]
+
+
+def _ffmpeg_blocks(path):
+    command = ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(ANALYSIS_RATE), "-"]
+    # PT: O stderr vai para um arquivo temporário, para não travar o ffmpeg com o pipe cheio.
+    # EN: stderr goes to a temporary file, so a full pipe cannot stall ffmpeg.
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        try:
+            for block in iter(lambda: process.stdout.read(BLOCK_BYTES), b""):
+                yield block
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode != 0:
+            errors.seek(0)
+            raise subprocess.CalledProcessError(returncode, command, stderr=errors.read().decode(errors="replace"))
+
+
+def measure_file(path):
+    """
+    PT: Decodifica e mede a faixa. Usa o ffmpeg (em blocos, memória constante) e, se ele não
+        existir ou falhar, o pygame.
+    EN: Decodes and measures the track. Uses ffmpeg (in blocks, constant memory) and, if it is
+        missing or fails, pygame.
+    """
+    if shutil.which("ffmpeg") is not None:
+        try:
+            return measure(_ffmpeg_blocks(path))
+        except (OSError, subprocess.CalledProcessError) as e:
+            log.debug("ffmpeg falhou em '%s', usando o pygame: %s / ffmpeg failed on '%s', using pygame: %s",
+                      path, e, path, e)
+    return measure(_pygame_blocks(path))
+
+
+def _block_stats(block):
+    if audioop is not None:
+        return audioop.rms(block, 2), audioop.max(block, 2)
+    samples = array.array("h", block)
+    if not samples:
+        return 0, 0
+    return math.sqrt(sum(s * s for s in samples) / len(samples)), max(abs(min(samples)), max(samples))
+
+
+def measure(blocks):
+    """
+    PT: Mede o volume como o percentil 95 do RMS em blocos de 50 ms (como no ReplayGain,
+        sem o filtro de igual sonoridade) e o pico da faixa, ambos em dBFS. Os blocos
+        (PCM 16 bits mono) são consumidos um a um; um último bloco incompleto é ignorado.
+    EN: Measures loudness as the 95th percentile of the RMS over 50 ms blocks (as in
+        ReplayGain, without the equal-loudness filter) and the track peak, both in dBFS.
+        The blocks (16-bit mono PCM) are consumed one by one; a last partial block is ignored.
+    """
+    levels = []
+    peak = 0
+    for block in blocks:
+        if len(block) < BLOCK_BYTES:
+            continue
+        rms, block_peak = _block_stats(block)
+        levels.append(rms)
+        peak = max(peak, block_peak)
+    if not levels:
+        return None
+    if peak == 0:
+        return dict(SILENT)
+
+    levels.sort()
+    level = levels[min(len(levels) - 1, int(len(levels) * LOUDNESS_PERCENTILE))]
+    loudness_db = 20 * math.log10(max(level, 1) / 32768.0)
+    peak_db = 20 * math.log10(peak / 32768.0)
+
+    # PT: O ganho nunca leva o pico acima de 0 dBFS.
+    # EN: The gain never pushes the peak above 0 dBFS.
+    gain_db = max(MIN_GAIN_DB, min(MAX_GAIN_DB, TARGET_DBFS - loudness_db, -peak_db))
+    return {"loudness_db": round(loudness_db, 2), "peak_db": round(peak_db, 2), "gain_db": round(gain_db, 2)}
+
+
+def _hash_job(path):
+    # PT: Um arquivo removido ou ilegível durante a análise é um erro dele, não da análise toda.
+    # EN: A file removed or unreadable during the analysis is its own error, not the whole run's.
+    try:
+        return path, file_sha1(path), None
+    except OSError as e:
+        return path, None, str(e)
+
+
+def _measure_job(path):
+    try:
+        result = measure_file(path)
+    except Exception as e:
+        return path, None, str(e)
+    if result is None:
+        return path, None, "nenhum áudio decodificado / no audio decoded"
+    return path, result, None
+
+
+# --- Armazenamento / Storage ---
+
+class LoudnessStore:
+    """
+    PT: Resultados da análise em loudness.json:
+        - "tracks": hash SHA-1 do conteúdo -> loudness_db, peak_db e gain_db;
+        - "files": caminho relativo -> [mtime_ns, tamanho, hash], para não recalcular o hash
+          de arquivos que não mudaram.
+        O Player consulta apenas o dicionário em memória; uma thread de fundo relê o arquivo
+        quando ele muda (ex: depois de rodar a análise pela linha de comando).
+    EN: Analysis results in loudness.json:
+        - "tracks": SHA-1 content hash -> loudness_db, peak_db and gain_db;
+        - "files": relative path -> [mtime_ns, size, hash], to avoid re-hashing files
+          that did not change.
+        The Player only queries the in-memory dictionary; a background thread re-reads the
+        file when it changes (e.g. after running the analysis from the command line).
+    """
+
+    def __init__(self, path, music_folder):
+        self.path = path
+        self.music_folder = music_folder
+        self.tracks = {}
+        self.files = {}
+        self._file_stamp = None
+
+    def load(self):
+        try:
+            st = os.stat(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            log.error("Erro ao ler %s: %s / Error reading %s: %s", self.path, e, self.path, e)
+            return 0
+        self.tracks = data.get("tracks", {})
+        self.files = data.get("files", {})
+        self._file_stamp = (st.st_mtime_ns, st.st_size)
+        return len(self.tracks)
+
+    def reload_if_changed(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) == self._file_stamp:
+            return False
+        self.load()
+        return True
+
+    def start(self, interval=30.0):
+        """
+        PT: Carrega o arquivo e inicia a thread que o relê quando ele muda, a cada `interval` s.
+        EN: Loads the file and starts the thread that re-reads it when it changes, every `interval` s.
+        """
+        self.load()
+        if interval:
+            threading.Thread(target=self._watch, args=(interval,), name="loudness-reload", daemon=True).start()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            if run_blocking(self.reload_if_changed):
+                log.info("%s recarregado: %d faixas. / %s reloaded: %d tracks.",
+                         self.path, len(self.tracks), self.path, len(self.tracks))
+
+    def gain(self, song_path):
+        """
+        PT: Retorna o ganho (dB) salvo para a faixa, ou None se ela ainda não foi analisada.
+            Só consulta a memória: nenhum acesso ao disco no caminho do play.
+        EN: Returns the saved gain (dB) for the track, or None if it has not been analyzed yet.
+            Memory lookup only: no disk access on the play path.
+        """
+        entry = self.files.get(os.path.relpath(song_path, self.music_folder))
+        result = self.tracks.get(entry[2]) if entry else None
+        return result["gain_db"] if result else None
+
+    def save(self):
+        data = json.dumps({"tracks": self.tracks, "files": self.files}, ensure_ascii=False, sort_keys=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        st = os.stat(self.path)
+        self._file_stamp = (st.st_mtime_ns, st.st_size)
+
+    # --- Análise em lote / Batch analysis ---
+
+    def _audio_files(self):
+        for root, dirs, files in os.walk(self.music_folder):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if name.lower().endswith(AUDIO_EXTENSIONS) and not name.startswith("."):
+                    yield os.path.join(root, name)
+
+    def analyze(self, workers=None, progress=None):
+        """
+        PT: Analisa as faixas novas ou alteradas da pasta usando um pool de processos.
+            Só arquivos com mtime/tamanho diferentes têm o hash recalculado, e só conteúdos
+            nunca vistos são decodificados.
+        EN: Analyzes the new or changed tracks of the folder using a process pool.
+            Only files with a different mtime/size are re-hashed, and only never-seen
+            contents are decoded.
+
+        Returns:
+            dict: PT: Contadores da análise. | EN: Analysis counters.
+        """
+        stats = {"files": 0, "hashed": 0, "analyzed": 0, "reused": 0, "errors": 0}
+        files = {}
+        stale = []
+        for path in self._audio_files():
+            rel = os.path.relpath(path, self.music_folder)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = self.files.get(rel)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                files[rel] = entry
+            else:
+                files[rel] = [st.st_mtime_ns, st.st_size, None]
+                stale.append(path)
+        stats["files"] = len(files)
+
+        workers = workers or min(os.cpu_count() or 1, MAX_DEFAULT_WORKERS)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, digest, error in pool.map(_hash_job, stale, chunksize=4):
+                rel = os.path.relpath(path, self.music_folder)
+                if digest is None:
+                    stats["errors"] += 1
+                    log.error("Erro ao ler '%s': %s / Error reading '%s': %s", path, error, path, error)
+                    del files[rel]
+                    continue
+                files[rel][2] = digest
+                stats["hashed"] += 1
+
+            pending = {}
+            for rel, entry in files.items():
+                if entry[2] in self.tracks:
+                    stats["reused"] += 1
+                else:
+                    pending.setdefault(entry[2], os.path.join(self.music_folder, rel))
+
+            for path, result, error in pool.map(_measure_job, pending.values()):
+                digest = files[os.path.relpath(path, self.music_folder)][2]
+                if result is None:
+                    stats["errors"] += 1
+                    log.error("Erro ao analisar '%s': %s / Error analyzing '%s': %s", path, error, path, error)
+                    continue
+                self.tracks[digest] = result
+                stats["analyzed"] += 1
+                if progress:
+                    progress(path, result)
+
+        # PT: Remove os resultados de conteúdos que não estão mais na pasta.
+        # EN: Drops the results of contents that are no longer in the folder.
+        used = {entry[2] for entry in files.values()}
+        self.tracks = {digest: result for digest, result in self.tracks.items() if digest in used}
+        self.files = {rel: entry for rel, entry in files.items() if entry[2] in self.tracks}
+        self.save()
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Loudness analysis for the jukebox music folder.")
+    parser.add_argument("folder", nargs="?", default="music")
+    parser.add_argument("--output", default=LOUDNESS_FILE)
+    parser.add_argument("--workers", type=int, default=None, help=f"default: one per CPU core, up to {MAX_DEFAULT_WORKERS}")
+    args = parser.parse_args(argv)
+
+    store = LoudnessStore(args.output, args.folder)
+    store.load()
+    start = time.perf_counter()
+    stats = store.analyze(args.workers, progress=lambda path, result: print(
+        f"{result['gain_db']:+6.2f} dB  {os.path.relpath(path, args.folder)}{'  (silêncio / silence)' if result.get('silent') else ''}"))
+    elapsed = time.perf_counter() - start
+    print(f"{stats['files']} arquivos, {stats['analyzed']} analisados, {stats['reused']} reaproveitados, "
+          f"{stats['errors']} erros em {elapsed:.1f}s. / {stats['files']} files, {stats['analyzed']} analyzed, "
+          f"{stats['reused']} reused, {stats['errors']} errors in {elapsed:.1f}s.")
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
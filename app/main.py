@@ -1,34 +1,236 @@
-# PT: Importa as bibliotecas necessárias
-# EN: Imports the necessary libraries
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO
-from werkzeug.utils import secure_filename
+# PT: Marca o início da inicialização, antes das importações (veja startup.py).
+# EN: Marks the start of the startup, before the imports (see startup.py).
+import time
+STARTUP_STARTED = time.perf_counter()
+
+# PT: Modo do servidor: "threading" (uma thread por conexão), "eventlet" ou "gevent" (greenlets,
+#     para dezenas de celulares ao mesmo tempo). O monkey patching precisa vir antes do Flask.
+# EN: Server mode: "threading" (one thread per connection), "eventlet" or "gevent" (greenlets,
+#     for dozens of phones at once). Monkey patching must come before Flask.
 import os
+from app import blocking
+ASYNC_MODE = os.environ.get("JUKEBOX_ASYNC_MODE", "threading")
+blocking.monkey_patch(ASYNC_MODE)
+
+# PT: Importa as bibliotecas necessárias. pygame e zeroconf são importados só quando usados.
+# EN: Imports the necessary libraries. pygame and zeroconf are only imported when used.
+from flask import Flask, render_template, request, jsonify, Response, g, send_file
+from flask_socketio import SocketIO, emit
+from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 import threading
-import json
+import concurrent.futures
 import socket
 import atexit
-from zeroconf import ServiceInfo, Zeroconf
+import uuid
+import mimetypes
+import struct
 from app.player import Player
-from app.rfid import RFIDReader
+from app.audio_backends import create_backend
+from app.player_actor import PlayerActor
+from app.player_watcher import PlayerStateWatcher
+from app.rfid import RFIDReader, ReplayRFIDReader, parse_reader_specs
+from app.scan_bus import ScanBus, ScanDispatcher
+from app.tag_store import TagStore
+from app.replication import ReplicationLog, Replicator, CHANGES_PAGE_SIZE
+from app.library import LibraryIndex
+from app.change_feed import ChangeFeed
+from app.search import SearchIndex, DEFAULT_PAGE_SIZE, FILTER_ORPHANED
+from app.streaming import StreamLimiter
+from app.preload_cache import PreloadCache
+from app.catalog import Catalog, CatalogIndexer
+from app.loudness import LoudnessStore
+from app.uploads import UploadManager, UploadError, UPLOADS
+from app import metrics
+from app import log as jukebox_log
+from app.startup import StartupReport
+from app import bulk
+from app import playlist
+from app.response_cache import (TranslationsCache, FileCache, CompressedResponseCache, CachedBody,
+                                choose_encoding, MIN_COMPRESS_SIZE, COMPRESSIBLE_MIMETYPES)
+
+IMPORTS_DONE = time.perf_counter()
+
+# PT: Relatório das fases de inicialização (exibido no console e em /api/startup).
+# EN: Report of the startup phases (printed to the console and served at /api/startup).
+startup = StartupReport(STARTUP_STARTED)
+startup.record("imports", STARTUP_STARTED, IMPORTS_DONE)
 
 # PT: Configurações Globais
 # EN: Global Settings
 MUSIC_FOLDER = "music"
 TAGS_FILE = "tags.txt"
 TRANSLATIONS_FILE = "app/translations.json"
-tag_cache = {}
-cache_lock = threading.Lock()
+CATALOG_FILE = "catalog.db"
+LOUDNESS_FILE = "loudness.json"
+REPLICATION_FILE = "replication.log"
+PORT = int(os.environ.get("JUKEBOX_PORT", 5000))
+PRELOAD_CACHE_MB = int(os.environ.get("JUKEBOX_PRELOAD_CACHE_MB", 64))
+MAX_UPLOAD_MB = int(os.environ.get("JUKEBOX_MAX_UPLOAD_MB", 500))
+# PT: Arquivo de roteiro opcional para simular leituras RFID sem hardware.
+# EN: Optional script file to simulate RFID scans without hardware.
+RFID_TRACE_FILE = os.environ.get("JUKEBOX_RFID_TRACE")
+# PT: Leitores RFID adicionais (vários slots de cartão), no formato "id:bus:device[:pin_rst],..."
+#     (ex: "sala:0:0:25,quarto:0:1:24"). Vazio = um único leitor no SPI 0.0.
+# EN: Additional RFID readers (several card slots), in the "id:bus:device[:pin_rst],..." format
+#     (e.g. "living:0:0:25,bedroom:0:1:24"). Empty = a single reader on SPI 0.0.
+RFID_READERS = os.environ.get("JUKEBOX_RFID_READERS", "")
+SCAN_QUEUE_SIZE = int(os.environ.get("JUKEBOX_SCAN_QUEUE_SIZE", 64))
+# PT: Outras jukeboxes para replicar as associações, além das encontradas por mDNS ("host:porta,...").
+#     Ex: para testar na mesma máquina, JUKEBOX_PORT=5001 JUKEBOX_PEERS=127.0.0.1:5000.
+# EN: Other jukeboxes to replicate the associations with, besides those found via mDNS ("host:port,...").
+#     E.g. to test on the same machine, JUKEBOX_PORT=5001 JUKEBOX_PEERS=127.0.0.1:5000.
+PEERS = [peer.strip() for peer in os.environ.get("JUKEBOX_PEERS", "").split(",") if peer.strip()]
+SYNC_INTERVAL = float(os.environ.get("JUKEBOX_SYNC_INTERVAL", 5))
+CHANGE_FEED_SIZE = int(os.environ.get("JUKEBOX_CHANGE_FEED_SIZE", 1000))
+# PT: Máximo de streams simultâneos em /api/stream (prévia no navegador); os demais recebem 503.
+#     Com um proxy na frente (Apache/lighttpd), JUKEBOX_X_SENDFILE=1 entrega o arquivo pelo proxy.
+# EN: Maximum simultaneous streams on /api/stream (browser preview); the others get a 503.
+#     With a proxy in front (Apache/lighttpd), JUKEBOX_X_SENDFILE=1 hands the file over to the proxy.
+MAX_STREAMS = int(os.environ.get("JUKEBOX_MAX_STREAMS", 4))
+X_SENDFILE = os.environ.get("JUKEBOX_X_SENDFILE", "") == "1"
+# PT: Threads do sistema para chamadas bloqueantes (disco, pygame) fora das conexões (veja blocking.py).
+#     Nos modos eventlet/gevent, cada leitor RFID ocupa mais uma, só para esperar pelo cartão (veja scan_bus.py).
+# EN: OS threads for blocking calls (disk, pygame) outside the connections (see blocking.py).
+#     In eventlet/gevent modes, every RFID reader takes one more, just to wait for the card (see scan_bus.py).
+BLOCKING_WORKERS = int(os.environ.get("JUKEBOX_BLOCKING_WORKERS", 4))
+RFID_READER_COUNT = 1 if RFID_TRACE_FILE else max(1, len(parse_reader_specs(RFID_READERS)))
+blocking.configure(BLOCKING_WORKERS + RFID_READER_COUNT)
+# PT: Log em fila, escrito por uma thread de fundo (veja log.py). Níveis por subsistema em
+#     JUKEBOX_LOG_LEVELS, ex: "rfid=DEBUG,http=WARNING". Os últimos registros ficam em /api/logs/recent.
+# EN: Queued logging, written by a background thread (see log.py). Per-subsystem levels in
+#     JUKEBOX_LOG_LEVELS, e.g. "rfid=DEBUG,http=WARNING". The latest records are at /api/logs/recent.
+LOG_LEVEL = os.environ.get("JUKEBOX_LOG_LEVEL", "INFO")
+LOG_LEVELS = os.environ.get("JUKEBOX_LOG_LEVELS", "")
+LOG_RECENT_SIZE = int(os.environ.get("JUKEBOX_LOG_RECENT_SIZE", 500))
+jukebox_log.setup(LOG_LEVEL, LOG_LEVELS, LOG_RECENT_SIZE)
+log = jukebox_log.get_logger("web")
+rfid_log = jukebox_log.get_logger("rfid")
+# PT: Backend de áudio: "pygame" (padrão), "mpg123" (processo externo, sem SDL) ou "null" (sem som).
+#     Compare o custo de cada um na placa com "python -m benchmarks.audio_backends".
+# EN: Audio backend: "pygame" (default), "mpg123" (external process, no SDL) or "null" (no sound).
+#     Compare the cost of each one on the board with "python -m benchmarks.audio_backends".
+AUDIO_BACKEND = os.environ.get("JUKEBOX_AUDIO_BACKEND", "pygame")
+# PT: Opções do mpg123: buffer de saída em KB (0 = sem buffer, menor latência) e dispositivo ALSA.
+# EN: mpg123 options: output buffer in KB (0 = no buffer, lowest latency) and ALSA device.
+MPG123_BUFFER_KB = int(os.environ.get("JUKEBOX_MPG123_BUFFER_KB", 0))
+AUDIO_DEVICE = os.environ.get("JUKEBOX_AUDIO_DEVICE")
+# PT: Duração do fade ao trocar de cartão (fade out da faixa atual e fade in da nova). 0 = corte seco.
+# EN: Fade duration when switching cards (fade out of the current track and fade in of the new one). 0 = hard cut.
+CROSSFADE_MS = int(os.environ.get("JUKEBOX_CROSSFADE_MS", 300))
+# PT: Intervalo (s) em que o loudness.json é relido em segundo plano se mudar (0 = só na inicialização).
+# EN: Interval (s) at which loudness.json is re-read in the background if it changed (0 = only at startup).
+LOUDNESS_RELOAD_SECONDS = float(os.environ.get("JUKEBOX_LOUDNESS_RELOAD", 30))
+# PT: Espera máxima das rotas pelo player (ex: mixer ainda abrindo ou dispositivo travado); depois, 503.
+# EN: Maximum wait of the routes for the player (e.g. mixer still opening or a stuck device); then, 503.
+PLAYER_TIMEOUT = float(os.environ.get("JUKEBOX_PLAYER_TIMEOUT", 5))
+
+# PT: Armazenamento das associações (journal + snapshot). As consultas nunca esperam por disco.
+# EN: Association storage (journal + snapshot). Lookups never wait on disk.
+tag_cache = TagStore(TAGS_FILE)
+
+# PT: Registro versionado das associações, trocado com as outras jukeboxes (veja replication.py).
+# EN: Versioned log of the associations, exchanged with the other jukeboxes (see replication.py).
+replication_log = ReplicationLog(REPLICATION_FILE, tag_cache, node_id=os.environ.get("JUKEBOX_NODE_ID"))
+replicator = Replicator(replication_log, PEERS, SYNC_INTERVAL)
+
+# PT: Índice em memória da pasta de músicas, atualizado incrementalmente.
+# EN: In-memory index of the music folder, updated incrementally.
+library_index = LibraryIndex(MUSIC_FOLDER)
+
+# PT: Catálogo de metadados (SQLite), mantido por um indexador em segundo plano.
+# EN: Metadata catalog (SQLite), kept up to date by a background indexer.
+catalog = Catalog(CATALOG_FILE)
+catalog_indexer = CatalogIndexer(catalog, MUSIC_FOLDER)
+library_index.add_listener(catalog_indexer.on_library_change)
+
+# PT: Índice de busca (nomes e metadados), atualizado em lote a partir do índice e do catálogo.
+# EN: Search index (names and metadata), updated in batches from the index and the catalog.
+search_index = SearchIndex(catalog.get, tag_cache, is_known=lambda name: name in library_index
+                           or os.path.exists(os.path.join(MUSIC_FOLDER, name)))
+library_index.add_listener(search_index.on_library_change)
+catalog.add_listener(search_index.on_catalog_change)
+
+# PT: Identificador desta execução, para que os ETags não se repitam após um reinício.
+# EN: Identifier of this run, so that ETags are not reused after a restart.
+BOOT_ID = uuid.uuid4().hex[:8]
+
+# PT: Uploads em partes, retomáveis e com deduplicação por conteúdo.
+# EN: Chunked, resumable uploads with content deduplication.
+upload_manager = UploadManager(MUSIC_FOLDER, MAX_UPLOAD_MB * 1024 * 1024)
+library_index.add_listener(upload_manager.on_library_change)
+
+# PT: Caches de respostas: traduções, arquivos estáticos e JSON comprimido.
+# EN: Response caches: translations, static files and compressed JSON.
+translations_cache = TranslationsCache(TRANSLATIONS_FILE)
+static_cache = FileCache()
+compressed_cache = CompressedResponseCache()
+_index_cache = {}
 
 # PT: Inicializa a aplicação Flask e o SocketIO
 # EN: Initializes the Flask application and SocketIO
 app = Flask(__name__, template_folder='template', static_folder='static')
 app.config['UPLOAD_FOLDER'] = MUSIC_FOLDER
-socketio = SocketIO(app, async_mode='threading')
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
+app.config['USE_X_SENDFILE'] = X_SENDFILE
+socketio = SocketIO(app, async_mode=ASYNC_MODE)
 
 # PT: Cria uma instância única (singleton) do nosso Player
 # EN: Creates a single (singleton) instance of our Player
 player = Player()
+if AUDIO_BACKEND == "mpg123":
+    player.backend = create_backend(AUDIO_BACKEND, buffer_kb=MPG123_BUFFER_KB, device=AUDIO_DEVICE)
+else:
+    player.backend = create_backend(AUDIO_BACKEND)
+
+# PT: Mantém em memória as músicas associadas a cartões, para tocar sem ler do cartão SD.
+#     Com um backend que só lê arquivos (mpg123), o cache fica vazio.
+# EN: Keeps the card-associated songs in memory, to play without reading from the SD card.
+#     With a backend that only reads files (mpg123), the cache stays empty.
+preload_cache = PreloadCache(PRELOAD_CACHE_MB * 1024 * 1024 if player.backend.supports_memory else 0)
+player.preload_cache = preload_cache
+player.catalog = catalog
+
+# PT: Ganhos de normalização calculados antes com "python -m app.loudness" (nada é analisado ao tocar).
+# EN: Normalization gains computed ahead of time with "python -m app.loudness" (nothing is analyzed at play time).
+loudness_store = LoudnessStore(LOUDNESS_FILE, MUSIC_FOLDER)
+player.loudness = loudness_store
+
+# PT: Só a thread do ator chama o Player (e o backend de áudio); rotas e RFID enviam comandos para a fila dele.
+#     Ao iniciar, o ator abre o backend em segundo plano.
+# EN: Only the actor thread calls the Player (and the audio backend); routes and RFID send commands to its queue.
+#     On start, the actor opens the backend in the background.
+player_actor = PlayerActor(player)
+# PT: A faixa nova é lida em segundo plano e a troca (com fade) é agendada na thread do ator.
+# EN: The new track is read in the background and the switch (with fade) is scheduled on the actor thread.
+player.post = player_actor.call_later
+player.crossfade_ms = CROSSFADE_MS
+player_actor.start()
+
+# PT: Observa o player e envia apenas as mudanças de estado via WebSocket ('player_state').
+# EN: Watches the player and pushes only the state changes via WebSocket ('player_state').
+player_watcher = PlayerStateWatcher(player_actor, lambda changes: socketio.emit('player_state', changes))
+player.add_listener(player_watcher.poke)
+
+# PT: Feed de alterações da biblioteca (músicas e associações), enviado via WebSocket ('library_change').
+# EN: Library change feed (songs and associations), pushed via WebSocket ('library_change').
+change_feed = ChangeFeed(BOOT_ID, CHANGE_FEED_SIZE)
+library_index.add_listener(change_feed.on_library_change)
+tag_cache.add_listener(change_feed.on_tags_change)
+change_feed.add_listener(lambda changes: socketio.emit('library_change', {"epoch": change_feed.epoch, "changes": changes}))
+
+# PT: Métricas expostas em /metrics (veja metrics.py). As demais ficam nos módulos que as medem.
+# EN: Metrics exposed at /metrics (see metrics.py). The others live in the modules that measure them.
+SCANS = metrics.counter("jukebox_rfid_scans", "Cards scanned by the RFID listener.")
+UNKNOWN_CARDS = metrics.counter("jukebox_rfid_unknown_cards", "Scanned cards without an associated song.")
+SCAN_TO_PLAY_SECONDS = metrics.histogram(
+    "jukebox_scan_to_play_seconds", "Time from the UID read until the player started the song.")
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "jukebox_http_request_seconds", "HTTP request handling time per route.", ["route", "method"])
+SOCKET_CLIENTS = metrics.gauge("jukebox_socketio_clients", "Connected Socket.IO clients.")
+TAG_ASSOCIATIONS = metrics.gauge("jukebox_tag_associations", "Number of card associations in the tag cache.")
+TAG_ASSOCIATIONS.set_function(lambda: len(tag_cache))
+SCANS_DROPPED = metrics.gauge("jukebox_scan_bus_dropped", "Scans dropped because the scan bus queue was full.")
 
 # PT: Estado global para comunicação entre a thread da web e a thread RFID
 # EN: Global state for communication between the web thread (Flask) and the RFID thread
@@ -41,28 +243,58 @@ assignment_state = {
 
 def get_local_ip():
     """
-    PT: Tenta descobrir o endereço IP local da máquina na rede.
-    EN: Tries to discover the local IP address of the machine on the network.
+    PT: Tenta descobrir o endereço IP local da máquina na rede, sem depender de internet.
+        Primeiro pela rota padrão (connect em UDP não envia pacotes); sem rota (ex: rede
+        offline ou modo hotspot), pelos endereços das interfaces.
+    EN: Tries to discover the local IP address of the machine on the network, without
+        needing internet access. First through the default route (a UDP connect sends no
+        packets); without a route (e.g. offline network or hotspot mode), through the
+        interface addresses.
     """
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.setblocking(False)
     try:
         s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-    except Exception as e:
-        print(f"Não foi possível obter o IP local automaticamente: {e} / Could not get local IP automatically: {e}")
-        ip = "127.0.0.1"
+        return s.getsockname()[0]
+    except OSError:
+        pass
     finally:
         s.close()
-    return ip
+
+    for ip in _interface_addresses():
+        if not ip.startswith("127."):
+            return ip
+    log.warning("Não foi possível obter o IP local automaticamente. / Could not get local IP automatically.")
+    return "127.0.0.1"
+
+def _interface_addresses():
+    # PT: SIOCGIFADDR (Linux) lê o endereço IPv4 de cada interface, sem acessar a rede.
+    # EN: SIOCGIFADDR (Linux) reads the IPv4 address of each interface, without network access.
+    try:
+        import fcntl
+        interfaces = socket.if_nameindex()
+    except (ImportError, OSError):
+        return []
+    addresses = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        for _, name in interfaces:
+            try:
+                data = fcntl.ioctl(s.fileno(), 0x8915, struct.pack("256s", name[:15].encode()))
+            except OSError:
+                continue
+            addresses.append(socket.inet_ntoa(data[20:24]))
+    return addresses
 
 def register_mdns_service():
     """
     PT: Registra o serviço da Jukebox na rede local usando mDNS (Bonjour/Avahi).
     EN: Registers the Jukebox service on the local network using mDNS (Bonjour/Avahi).
     """
+    from zeroconf import ServiceInfo, Zeroconf
+
     service_name = "rfidbox"
     service_type = "_http._tcp.local."
-    port = 5000
+    port = PORT
     server_name = f"{service_name}.local."
 
     try:
@@ -76,130 +308,384 @@ def register_mdns_service():
             server=server_name,
         )
         zeroconf = Zeroconf()
-        print(f"Registrando serviço mDNS: {service_name} em {ip_address}:{port} / Registering mDNS service: {service_name} at {ip_address}:{port}")
+        log.info("Registrando serviço mDNS: %s em %s:%s / Registering mDNS service: %s at %s:%s",
+                 service_name, ip_address, port, service_name, ip_address, port)
         zeroconf.register_service(info)
         atexit.register(zeroconf.close)
+        replicator.advertise(zeroconf, ip_address, port)
     except Exception as e:
-        print(f"Erro ao registrar o serviço mDNS: {e} / Error registering mDNS service: {e}")
+        log.error("Erro ao registrar o serviço mDNS: %s / Error registering mDNS service: %s", e, e)
 
 
 # --- Funções de Cache e Lógica da Jukebox / Cache and Jukebox Logic Functions ---
 
 def load_tags_to_cache():
     """
-    PT: Carrega as associações do arquivo tags.txt para o cache em memória.
-    EN: Loads the associations from the tags.txt file into the in-memory cache.
+    PT: Carrega as associações (snapshot + journal do tags.txt) para o cache em memória.
+    EN: Loads the associations (snapshot + tags.txt journal) into the in-memory cache.
     """
-    global tag_cache
-    if not os.path.exists(TAGS_FILE):
-        print("Arquivo de tags não encontrado. O cache iniciará vazio. / Tags file not found. Cache will start empty.")
+    if not os.path.exists(TAGS_FILE) and not os.path.exists(tag_cache.snapshot_path):
+        log.info("Arquivo de tags não encontrado. O cache iniciará vazio. / Tags file not found. Cache will start empty.")
         return
 
-    with cache_lock:
-        with open(TAGS_FILE, "r") as f:
-            for line in f:
-                if ":" in line:
-                    tag_id, song_filename = line.strip().split(":", 1)
-                    tag_cache[tag_id] = song_filename
-    print(f"Cache de tags carregado com {len(tag_cache)} associações. / Tag cache loaded with {len(tag_cache)} associations.")
+    count = tag_cache.load()
+    log.info("Cache de tags carregado com %d associações. / Tag cache loaded with %d associations.", count, count)
+
+    # PT: Pré-carrega em segundo plano as músicas associadas aos cartões.
+    # EN: Preloads the card-associated songs in the background.
+    preload_cache.warm(first_tracks(set(tag_cache.items().values())))
 
-def get_song_for_tag(uid):
+def first_tracks(names):
     """
-    PT: Busca no cache a música associada a um determinado UID de cartão.
-    EN: Searches the cache for the song associated with a given card UID.
+    PT: Retorna o caminho da primeira faixa de cada música, álbum ou playlist. Só ela precisa
+        estar pré-carregada: as seguintes são enfileiradas durante a reprodução.
+    EN: Returns the path of the first track of each song, album or playlist. Only that one
+        needs to be preloaded: the following ones are queued during playback.
     """
-    with cache_lock:
-        song_filename = tag_cache.get(uid)
+    paths = []
+    for name in names:
+        if playlist.is_collection(MUSIC_FOLDER, name):
+            paths.extend(playlist.resolve_tracks(MUSIC_FOLDER, name)[:1])
+        else:
+            paths.append(os.path.join(MUSIC_FOLDER, name))
+    return paths
 
-    if song_filename:
-        return os.path.join(MUSIC_FOLDER, song_filename)
-    return None
+def known_entries():
+    """
+    PT: Nomes que podem ser associados a um cartão: músicas, álbuns e playlists.
+    EN: Names that can be assigned to a card: songs, albums and playlists.
+    """
+    return set(library_index.page()[2]) | {c["name"] for c in playlist.list_collections(MUSIC_FOLDER)}
+
+def play_entry(name):
+    """
+    PT: Toca uma música, ou todas as faixas de um álbum (pasta) ou playlist (.m3u), em ordem.
+    EN: Plays a song, or every track of an album (folder) or playlist (.m3u), in order.
+
+    Returns:
+        Future: PT: Resolvido com o estado do player após o play (None se não há arquivo).
+                EN: Resolved with the player state after the play (None if there is no file).
+    """
+    # PT: Os arquivos são verificados aqui, na thread de quem chama, e não na do ator.
+    # EN: The files are checked here, on the caller's thread, rather than on the actor's.
+    collection = playlist.is_collection(MUSIC_FOLDER, name)
+    if collection:
+        paths = playlist.resolve_tracks(MUSIC_FOLDER, name)
+    else:
+        path = os.path.join(MUSIC_FOLDER, name)
+        paths = [path] if os.path.exists(path) else []
+    if not paths:
+        log.error("Arquivo de áudio não encontrado em (Audio file not found at) '%s'", name)
+        return None
+    if not collection:
+        return player_actor.play(paths[0])
+    return player_actor.play_tracks(paths, collection=name)
 
 def assign_song_to_tag(uid, song_filename):
     """
-    PT: Salva a associação de um UID com um nome de arquivo de música no arquivo e no cache.
-    EN: Saves the association of a UID with a music filename to the file and the cache.
+    PT: Salva a associação de um UID com um nome de arquivo de música no journal e no cache.
+    EN: Saves the association of a UID with a music filename to the journal and the cache.
     """
-    # Adiciona ao arquivo
-    with open(TAGS_FILE, "a") as f:
-        f.write(f"{uid}:{song_filename}\n")
+    tag_cache.set(uid, song_filename)
+    preload_cache.warm(first_tracks([song_filename]))
+    log.info("Associação salva (Association saved): %s -> %s", uid, song_filename)
 
-    # Adiciona ao cache
-    with cache_lock:
-        tag_cache[uid] = song_filename
+# --- Lógica do Leitor RFID em Background / RFID Reader Background Logic ---
 
-    print(f"Associação salva (Association saved): {uid} -> {song_filename}")
+def create_rfid_readers():
+    """
+    PT: Cria os leitores RFID configurados: o leitor de roteiro, se houver, os leitores de
+        JUKEBOX_RFID_READERS ou, por padrão, um único leitor.
+    EN: Creates the configured RFID readers: the replay reader, if any, the readers from
+        JUKEBOX_RFID_READERS or, by default, a single reader.
 
-# --- Lógica do Leitor RFID em Background / RFID Reader Background Logic ---
+    Returns:
+        dict: PT: id do leitor -> leitor. | EN: reader id -> reader.
+    """
+    if RFID_TRACE_FILE:
+        return {"replay": ReplayRFIDReader.from_file(RFID_TRACE_FILE)}
+    specs = parse_reader_specs(RFID_READERS)
+    if not specs:
+        return {"main": RFIDReader()}
+    return {reader_id: RFIDReader(**spec) for reader_id, spec in specs}
 
-# PT: Cria uma instância única do nosso leitor RFID
-# EN: Creates a single instance of our RFID reader
-rfid_reader = RFIDReader()
-
-def rfid_listener():
-    """
-    PT: Função que roda em uma thread para escutar por cartões RFID.
-        A cada leitura, emite um evento WebSocket para a interface web.
-    EN: Function that runs in a thread to listen for RFID cards.
-        On each scan, it emits a WebSocket event to the web interface.
-    """
-    print("RFID Listener: Thread iniciada (Thread started).")
-    while True:
-        uid = rfid_reader.read_uid()
-        if not uid:
-            continue
-
-        print(f"RFID Listener: Cartão escaneado (Card scanned) '{uid}'.")
-
-        song_path = get_song_for_tag(uid)
-
-        # PT: Emite o status do cartão para a interface web via WebSocket
-        # EN: Emits the card status to the web interface via WebSocket
-        socketio.emit('rfid_scan', {'uid': uid, 'associated': bool(song_path)})
-
-        with assignment_state["lock"]:
-            pending_file = assignment_state["pending_file"]
-            if pending_file:
-                print(f"RFID Listener: Associando cartão (Associating card) '{uid}' com o arquivo (with file) '{pending_file}'.")
-                assign_song_to_tag(uid, pending_file)
-                player.play(os.path.join(MUSIC_FOLDER, pending_file))
-                assignment_state["pending_file"] = None
-                # PT: Emite uma atualização após a associação
-                # EN: Emits an update after association
-                socketio.emit('rfid_scan', {'uid': uid, 'associated': True})
-                continue
+# PT: Cada leitor é consultado pela sua própria thread e publica no barramento; uma única
+#     thread despacha as leituras, na ordem, para handle_scan (que só envia comandos ao ator).
+# EN: Each reader is polled by its own thread and publishes to the bus; a single thread
+#     dispatches the scans, in order, to handle_scan (which only sends commands to the actor).
+rfid_readers = create_rfid_readers()
+scan_bus = ScanBus(SCAN_QUEUE_SIZE)
+scan_dispatcher = ScanDispatcher(scan_bus, lambda event: handle_scan(event.uid, event.ts, event.reader_id))
+scan_dispatcher.start()
+SCANS_DROPPED.set_function(lambda: scan_bus.dropped)
 
-        if song_path:
-            player.play(song_path)
-        else:
-            print(f"RFID Listener: Nenhuma música encontrada para o cartão (No song found for card) '{uid}'.")
+def start_rfid_readers():
+    for reader_id, reader in rfid_readers.items():
+        scan_bus.add_reader(reader_id, reader)
+
+def handle_scan(uid, scanned_at=None, reader_id=None):
+    """
+    PT: Processa um cartão lido: notifica a interface, conclui uma associação pendente
+        ou toca a música associada.
+    EN: Handles a scanned card: notifies the interface, completes a pending association
+        or plays the associated song.
+
+    Args:
+        scanned_at (float): PT: Momento da leitura (perf_counter), para medir a latência até o play.
+                            EN: Time of the read (perf_counter), to measure the latency until play.
+        reader_id (str): PT: Leitor que leu o cartão. | EN: Reader that scanned the card.
+    """
+    rfid_log.info("Cartão escaneado (Card scanned) '%s' [%s].", uid, reader_id)
+    SCANS.inc()
+    scanned_at = scanned_at or time.perf_counter()
+
+    # PT: A associação é lida uma única vez: a mesma leitura decide o aviso e o que tocar.
+    # EN: The association is read only once: the same read decides the notice and what to play.
+    song_filename = tag_cache.get(uid)
+
+    # PT: Emite o status do cartão para a interface web via WebSocket
+    # EN: Emits the card status to the web interface via WebSocket
+    socketio.emit('rfid_scan', {'uid': uid, 'associated': bool(song_filename), 'reader': reader_id})
+
+    with assignment_state["lock"]:
+        pending_file = assignment_state["pending_file"]
+        if pending_file:
+            rfid_log.info("Associando cartão (Associating card) '%s' com o arquivo (with file) '%s'.", uid, pending_file)
+            assign_song_to_tag(uid, pending_file)
+            _observe_scan_to_play(play_entry(pending_file), scanned_at)
+            assignment_state["pending_file"] = None
+            # PT: Emite uma atualização após a associação
+            # EN: Emits an update after association
+            socketio.emit('rfid_scan', {'uid': uid, 'associated': True, 'reader': reader_id})
+            return
+
+    if song_filename:
+        _observe_scan_to_play(play_entry(song_filename), scanned_at)
+    else:
+        UNKNOWN_CARDS.inc()
+        rfid_log.info("Nenhuma música encontrada para o cartão (No song found for card) '%s'.", uid)
+
+def _observe_scan_to_play(future, scanned_at):
+    # PT: O Future do ator é resolvido logo depois que o Player começou a tocar a faixa preparada.
+    # EN: The actor's Future is resolved right after the Player started playing the prepared track.
+    def observe(done):
+        if done.exception() is None:
+            SCAN_TO_PLAY_SECONDS.observe(time.perf_counter() - scanned_at)
+    if future is not None:
+        future.add_done_callback(observe)
+
+# --- Eventos WebSocket / WebSocket Events ---
+
+@socketio.on('connect')
+def handle_connect():
+    # PT: Envia o estado completo do player para o cliente que acabou de conectar.
+    #     Depois disso, ele recebe apenas as diferenças.
+    # EN: Sends the full player state to the client that just connected.
+    #     After that, it only receives the differences.
+    SOCKET_CLIENTS.inc()
+    emit('player_state', player_watcher.current_state())
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    SOCKET_CLIENTS.dec()
 
 # --- Rotas da API / API Routes ---
 
+# --- Métricas / Metrics ---
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    # PT: Registrado antes da compressão, então roda por último e inclui o tempo dela.
+    # EN: Registered before compression, so it runs last and includes its time.
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        HTTP_REQUEST_SECONDS.labels(route, request.method).observe(time.perf_counter() - started)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    # PT: Métricas no formato de texto do Prometheus.
+    # EN: Metrics in the Prometheus text format.
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+# --- Cache e Compressão de Respostas / Response Caching and Compression ---
+
+def cached_response(body, immutable=False):
+    """
+    PT: Responde com um CachedBody: 304 se o ETag bater, senão o conteúdo na melhor
+        codificação aceita pelo cliente.
+    EN: Responds with a CachedBody: 304 if the ETag matches, otherwise the content in the
+        best encoding accepted by the client.
+    """
+    if request.if_none_match.contains_weak(body.etag):
+        response = app.response_class(status=304)
+    else:
+        data, encoding = body.encoded(choose_encoding(request.accept_encodings))
+        response = app.response_class(data, mimetype=body.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(body.etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+    return response
+
+def _static_body(filename):
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return static_cache.get(path, mimetype)
+
+@app.context_processor
+def static_url_processor():
+    # PT: static_url('style.css') -> /static/style.css?v=<hash>, para permitir cache de longa duração.
+    # EN: static_url('style.css') -> /static/style.css?v=<hash>, to allow long-lived caching.
+    def static_url(filename):
+        body = _static_body(filename)
+        version = f"?v={body.etag}" if body else ""
+        return f"/static/{filename}{version}"
+    return {"static_url": static_url}
+
+@app.endpoint('static')
+def serve_static(filename):
+    """
+    PT: Serve arquivos estáticos da memória, pré-comprimidos. Com ?v=<hash> correto,
+        o arquivo é imutável e pode ficar no cache do navegador por um ano.
+    EN: Serves static files from memory, pre-compressed. With the right ?v=<hash>,
+        the file is immutable and may stay in the browser cache for a year.
+    """
+    body = _static_body(filename)
+    if body is None:
+        return jsonify({"status": "error", "message": "Arquivo não encontrado."}), 404
+    return cached_response(body, immutable=request.args.get('v') == body.etag)
+
+@app.after_request
+def compress_json_response(response):
+    # PT: Comprime respostas JSON grandes. Respostas com ETag são comprimidas uma única vez.
+    # EN: Compresses large JSON responses. Responses with an ETag are compressed only once.
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers):
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    etag = response.headers.get('ETag')
+    key = (request.full_path, etag) if etag else None
+    response.set_data(compressed_cache.compress(key, data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 def index():
-    # PT: Rota principal que serve a interface web.
-    # EN: Main route that serves the web interface.
-    return render_template('index.html')
+    # PT: Rota principal que serve a interface web. O HTML renderizado fica em cache
+    #     até o template ou os arquivos estáticos mudarem.
+    # EN: Main route that serves the web interface. The rendered HTML is cached
+    #     until the template or the static files change.
+    template_path = os.path.join(app.root_path, app.template_folder, 'index.html')
+    style = _static_body('style.css')
+    key = (os.path.getmtime(template_path), style.etag if style else None)
+    body = _index_cache.get(key)
+    if body is None:
+        _index_cache.clear()
+        body = _index_cache[key] = CachedBody(render_template('index.html').encode('utf-8'), 'text/html')
+    return cached_response(body)
+
+def player_response(future):
+    """
+    PT: Responde com o estado do player após o comando. Se o ator não responder em PLAYER_TIMEOUT,
+        responde 503 com Retry-After em vez de prender a thread da requisição (o comando continua na fila).
+    EN: Responds with the player state after the command. If the actor does not answer within
+        PLAYER_TIMEOUT, responds 503 with Retry-After instead of holding the request thread (the command stays queued).
+    """
+    try:
+        return jsonify(future.result(PLAYER_TIMEOUT))
+    except concurrent.futures.TimeoutError:
+        log.warning("O player não respondeu em %.1f s. / The player did not answer within %.1f s.",
+                    PLAYER_TIMEOUT, PLAYER_TIMEOUT)
+        response = jsonify({"status": "error", "message": "Player ocupado. / Player busy."})
+        response.headers['Retry-After'] = str(max(1, round(PLAYER_TIMEOUT)))
+        return response, 503
 
 @app.route('/api/status', methods=['GET'])
 def status():
     # PT: Endpoint para obter o estado atual do player.
     # EN: Endpoint to get the current player state.
-    return jsonify(player.get_status())
+    return player_response(player_actor.submit("get_status"))
+
+@app.route('/api/preload_cache', methods=['GET'])
+def preload_cache_stats():
+    # PT: Endpoint com as estatísticas do cache de pré-carregamento (acertos/falhas).
+    # EN: Endpoint with the preload cache statistics (hits/misses).
+    return jsonify(preload_cache.stats())
+
+@app.route('/api/logs/recent', methods=['GET'])
+def recent_logs():
+    """
+    PT: Últimos registros do log, guardados só em memória (para depurar sem ler o cartão SD).
+        Filtros: limit, level (nível mínimo), subsystem e since (seq do último registro já visto).
+    EN: Latest log records, kept in memory only (to debug without reading the SD card).
+        Filters: limit, level (minimum level), subsystem and since (seq of the last record already seen).
+    """
+    limit = max(0, min(request.args.get("limit", 100, type=int), LOG_RECENT_SIZE))
+    try:
+        records = jukebox_log.recent(limit, request.args.get("level"), request.args.get("subsystem"),
+                                     request.args.get("since", 0, type=int))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"records": records})
+
+@app.route('/api/rfid_stats', methods=['GET'])
+def rfid_stats():
+    # PT: Endpoint com as estatísticas de leitura de cada leitor RFID e do barramento.
+    # EN: Endpoint with the polling statistics of each RFID reader and of the bus.
+    stats = scan_bus.stats()
+    stats["dispatched"] = scan_dispatcher.dispatched
+    return jsonify(stats)
+
+@app.route('/api/replication/changes', methods=['GET'])
+def replication_changes():
+    # PT: Alterações das associações depois da seq "since", lidas pelas outras jukeboxes.
+    # EN: Association changes after the "since" seq, read by the other jukeboxes.
+    if not replication_log.loaded.is_set():
+        return jsonify({"status": "error", "message": "Replication log not loaded yet"}), 503
+    since = request.args.get("since", 0, type=int)
+    limit = max(0, min(request.args.get("limit", CHANGES_PAGE_SIZE, type=int), CHANGES_PAGE_SIZE))
+    return jsonify(replication_log.changes_since(since, limit))
+
+@app.route('/api/replication/status', methods=['GET'])
+def replication_status():
+    return jsonify(replicator.status())
+
+@app.route('/api/startup', methods=['GET'])
+def startup_report():
+    # PT: Endpoint com a duração de cada fase da inicialização.
+    # EN: Endpoint with the duration of each startup phase.
+    report = startup.as_dict()
+    report["mixer_init_ms"] = round(player.mixer_init_seconds * 1000, 1) if player.mixer_init_seconds else None
+    report["audio"] = player.backend.stats()
+    return jsonify(report)
 
 @app.route('/api/play_pause', methods=['POST'])
 def play_pause():
     # PT: Endpoint para alternar entre play e pause.
     # EN: Endpoint to toggle between play and pause.
-    player.toggle_play_pause()
-    return jsonify(player.get_status())
+    return player_response(player_actor.toggle_play_pause())
 
 @app.route('/api/play/<string:filename>', methods=['POST'])
 def play_song(filename):
     """
-    PT: Toca uma música específica pelo nome do arquivo.
-    EN: Plays a specific song by its filename.
+    PT: Toca uma música específica pelo nome do arquivo (ou um álbum/playlist pelo nome).
+    EN: Plays a specific song by its filename (or an album/playlist by its name).
     """
     # Segurança: Garante que o nome do arquivo não contém caracteres de path.
     if '/' in filename or '\\' in filename:
@@ -208,11 +694,51 @@ def play_song(filename):
     song_path = os.path.join(MUSIC_FOLDER, filename)
 
     if os.path.exists(song_path):
-        player.play(song_path)
+        play_entry(filename)
         return jsonify({"status": "success", "message": f"Tocando {filename}"})
     else:
         return jsonify({"status": "error", "message": "Arquivo não encontrado."}), 404
 
+# PT: Vagas de streaming; cada uma só é liberada quando o arquivo enviado é fechado.
+# EN: Streaming slots; each one is only released when the sent file is closed.
+stream_limiter = StreamLimiter(MAX_STREAMS)
+
+@app.route('/api/stream/<path:filename>', methods=['GET'])
+def stream_song(filename):
+    """
+    PT: Envia o MP3 para tocar no navegador (prévia antes de associar um cartão).
+        Aceita Range (206, para avançar sem ler o arquivo todo) e requisições condicionais
+        (ETag / If-Modified-Since). Só o trecho pedido é lido do disco.
+    EN: Sends the MP3 to be played in the browser (preview before assigning a card).
+        Supports Range (206, to seek without reading the whole file) and conditional
+        requests (ETag / If-Modified-Since). Only the requested part is read from disk.
+    """
+    # Segurança: safe_join recusa caminhos fora da pasta de músicas ("../").
+    song_path = safe_join(MUSIC_FOLDER, filename)
+    if song_path is None or not song_path.lower().endswith('.mp3') or not os.path.isfile(song_path):
+        return jsonify({"status": "error", "message": "Arquivo não encontrado."}), 404
+    song_path = os.path.abspath(song_path)
+    if X_SENDFILE:
+        # PT: O proxy lê o arquivo e trata o Range; aqui só vai o cabeçalho X-Sendfile.
+        # EN: The proxy reads the file and handles Range; only the X-Sendfile header goes from here.
+        return send_file(song_path, mimetype='audio/mpeg', conditional=True, max_age=0)
+
+    song_file = stream_limiter.open(song_path)
+    if song_file is None:
+        response = jsonify({"status": "error", "message": "Muitas reproduções simultâneas. / Too many simultaneous streams."})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    try:
+        stat = os.fstat(song_file.fileno())
+        response = send_file(song_file, mimetype='audio/mpeg', download_name=os.path.basename(song_path),
+                             etag=f"{stat.st_mtime}-{stat.st_size}", last_modified=stat.st_mtime, max_age=0)
+        response.content_length = stat.st_size
+        response = response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
+    except Exception:
+        song_file.close()
+        raise
+    return response
+
 @app.route('/api/initiate_association', methods=['POST'])
 def initiate_association():
     """
@@ -243,8 +769,9 @@ def volume():
     # EN: Endpoint to adjust the volume.
     level = int(request.json.get('level', 50))
     volume_float = max(0, min(100, level)) / 100.0
-    player.set_volume(volume_float)
-    return jsonify(player.get_status())
+    # PT: Durante um arraste do controle, só o último volume pendente chega ao pygame.
+    # EN: While the slider is dragged, only the latest pending volume reaches pygame.
+    return player_response(player_actor.set_volume(volume_float))
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
@@ -260,12 +787,202 @@ def upload_file():
     if file and file.filename.endswith('.mp3'):
         filename = file.filename
         save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(save_path)
+        blocking.run_blocking(file.save, save_path)
+        library_index.add(filename)
+        UPLOADS.labels("stored").inc()
 
         return jsonify({"status": "success", "message": f"Arquivo '{filename}' salvo com sucesso."})
 
     return jsonify({"status": "error", "message": "Arquivo inválido. Apenas MP3 são permitidos. (Invalid file. Only MP3s are allowed.)"}), 400
 
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """
+    PT: Inicia (ou retoma) um upload em partes. Corpo: {"filename": ..., "size": ...}.
+    EN: Starts (or resumes) a chunked upload. Body: {"filename": ..., "size": ...}.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        session = upload_manager.create(data.get('filename'), data.get('size'))
+    except UploadError as e:
+        return jsonify({"status": "error", "message": str(e)}), e.status
+    return jsonify(session.to_dict()), 201
+
+@app.route('/api/uploads/<string:upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    # PT: Retorna quantos bytes já foram recebidos, para o cliente retomar o envio.
+    # EN: Returns how many bytes were already received, so the client can resume.
+    try:
+        return jsonify(upload_manager.get(upload_id).to_dict())
+    except UploadError as e:
+        return jsonify({"status": "error", "message": str(e)}), e.status
+
+@app.route('/api/uploads/<string:upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """
+    PT: Recebe uma parte do arquivo (corpo bruto) no offset indicado (?offset=N).
+        A parte é gravada em streaming, sem ser carregada inteira na memória.
+    EN: Receives a chunk of the file (raw body) at the given offset (?offset=N).
+        The chunk is streamed to disk, without being loaded entirely into memory.
+    """
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({"status": "error", "message": "Offset não fornecido. (Offset not provided.)"}), 400
+
+    try:
+        result = upload_manager.write_chunk(upload_id, offset, request.stream)
+    except UploadError as e:
+        return jsonify({"status": "error", "message": str(e), "offset": e.offset}), e.status
+
+    if result.get("status") == "success":
+        library_index.add(result["filename"])
+        if result["deduplicated"]:
+            result["message"] = f"Conteúdo já existe como '{result['filename']}'. (Content already exists as '{result['filename']}'.)"
+        else:
+            result["message"] = f"Arquivo '{result['filename']}' salvo com sucesso."
+    return jsonify(result)
+
+@app.route('/api/uploads/<string:upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    # PT: Cancela um upload e remove os dados temporários.
+    # EN: Cancels an upload and removes the temporary data.
+    try:
+        upload_manager.abort(upload_id)
+    except UploadError as e:
+        return jsonify({"status": "error", "message": str(e)}), e.status
+    return jsonify({"status": "success"})
+
+# --- Importação e Exportação em Lote / Bulk Import and Export ---
+
+def _stage_and_commit(named_streams):
+    """
+    PT: Prepara todos os arquivos e só então os move para a biblioteca. Se algum falhar
+        na preparação, nenhum é adicionado.
+    EN: Stages every file and only then moves them into the library. If any of them fails
+        while staging, none is added.
+
+    Returns:
+        dict: PT: nome enviado -> resultado. | EN: uploaded name -> result.
+    """
+    staged = []
+    try:
+        for name, open_stream in named_streams:
+            with open_stream() as stream:
+                staged.append(upload_manager.stage(name, stream))
+    except BaseException:
+        upload_manager.discard_staged(staged)
+        raise
+
+    results = upload_manager.commit_staged(staged)
+    for result in results:
+        library_index.add(result["filename"])
+    return {item["filename"]: result for item, result in zip(staged, results)}
+
+@app.route('/api/bulk/upload', methods=['POST'])
+def bulk_upload():
+    """
+    PT: Recebe vários MP3 em uma única requisição multipart (campo "files").
+    EN: Receives several MP3s in a single multipart request ("files" field).
+    """
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({"status": "error", "message": "Nenhum arquivo enviado (No file sent)"}), 400
+
+    try:
+        results = _stage_and_commit((f.filename, lambda f=f: f.stream) for f in files)
+    except UploadError as e:
+        return jsonify({"status": "error", "message": str(e)}), e.status
+
+    return jsonify({"status": "success", "files": list(results.values())})
+
+@app.route('/api/bulk/associations', methods=['POST'])
+def bulk_associations():
+    """
+    PT: Importa um mapeamento UID -> música em JSON ou CSV, aplicado como uma única transação.
+        Com ?mode=replace, as associações que não estão no mapeamento são removidas.
+    EN: Imports a UID -> song mapping in JSON or CSV, applied as a single transaction.
+        With ?mode=replace, associations missing from the mapping are removed.
+    """
+    try:
+        mapping = bulk.parse_mapping(request.get_data(), request.content_type)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Mapeamento inválido (Invalid mapping): {e}"}), 400
+
+    errors = bulk.validate_mapping(mapping, known_entries())
+    if errors:
+        return jsonify({"status": "error", "message": "Nenhuma associação foi aplicada. (No association was applied.)",
+                        "errors": errors}), 400
+
+    changed = tag_cache.apply_batch(mapping, replace=request.args.get('mode') == 'replace')
+    preload_cache.warm(first_tracks(set(mapping.values())))
+    return jsonify({"status": "success", "changed": changed, "total": len(tag_cache)})
+
+@app.route('/api/export', methods=['GET'])
+def export_library():
+    """
+    PT: Exporta todas as músicas, álbuns, playlists e associações em um único arquivo .zip
+        (gerado em streaming). Álbuns e playlists mantêm o caminho relativo das faixas.
+    EN: Exports every song, album, playlist and association as a single .zip archive
+        (generated as a stream). Albums and playlists keep the relative path of their tracks.
+    """
+    _version, _total, songs = library_index.page()
+    songs = list(songs)
+    for collection in playlist.list_collections(MUSIC_FOLDER):
+        songs.extend(playlist.collection_files(MUSIC_FOLDER, collection["name"]))
+    response = Response(bulk.export_archive(MUSIC_FOLDER, songs, tag_cache.items()), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=jukebox-export.zip'
+    return response
+
+@app.route('/api/bulk/import', methods=['POST'])
+def import_library():
+    """
+    PT: Importa um .zip gerado por /api/export: adiciona as músicas, álbuns e playlists e aplica
+        as associações em uma única transação. Músicas soltas com conteúdo já existente são
+        deduplicadas; arquivos de álbuns e playlists são gravados no mesmo caminho relativo.
+    EN: Imports a .zip produced by /api/export: adds the songs, albums and playlists and applies
+        the associations in a single transaction. Loose songs whose content already exists are
+        deduplicated; album and playlist files are written to the same relative path.
+    """
+    archive_file = request.files.get('archive')
+    if archive_file is None:
+        return jsonify({"status": "error", "message": "Nenhum arquivo enviado (No file sent)"}), 400
+
+    try:
+        archive, mapping, songs, files = bulk.read_archive(archive_file.stream)
+    except (ValueError, OSError) as e:
+        return jsonify({"status": "error", "message": f"Arquivo inválido (Invalid archive): {e}"}), 400
+
+    with archive:
+        incoming = {upload_name for upload_name, _ in songs}
+        # PT: Um cartão aponta para o primeiro nível: a pasta do álbum ou o .m3u.
+        # EN: A card points to the top level: the album folder or the .m3u.
+        collections = {name.split("/")[0] for name, _ in files}
+        errors = bulk.validate_mapping(mapping, incoming | collections | known_entries())
+        if errors:
+            return jsonify({"status": "error", "message": "Nada foi importado. (Nothing was imported.)",
+                            "errors": errors}), 400
+        try:
+            staged_files = bulk.stage_files(MUSIC_FOLDER, files, MAX_UPLOAD_MB * 1024 * 1024)
+        except (ValueError, OSError) as e:
+            return jsonify({"status": "error", "message": f"Arquivo inválido (Invalid archive): {e}"}), 400
+        try:
+            results = _stage_and_commit(songs)
+        except UploadError as e:
+            bulk.discard_files(staged_files)
+            return jsonify({"status": "error", "message": str(e)}), e.status
+        except BaseException:
+            bulk.discard_files(staged_files)
+            raise
+        bulk.commit_files(staged_files)
+
+    # PT: Uma música deduplicada pode ter outro nome na biblioteca.
+    # EN: A deduplicated song may have a different name in the library.
+    renamed = {name: results[secure_filename(name)]["filename"] for name in incoming if secure_filename(name) in results}
+    mapping = {uid: renamed.get(song, song) for uid, song in mapping.items()}
+    changed = tag_cache.apply_batch(mapping, replace=request.args.get('mode') == 'replace')
+    preload_cache.warm(first_tracks(set(mapping.values())))
+    return jsonify({"status": "success", "songs": len(results), "files": len(staged_files), "changed": changed})
+
 @app.route('/api/association/<string:tag_id>', methods=['DELETE'])
 def delete_association(tag_id):
     """
@@ -275,64 +992,137 @@ def delete_association(tag_id):
     if not tag_id:
         return jsonify({"status": "error", "message": "ID da tag não fornecido."}), 400
 
-    with cache_lock:
-        if tag_id not in tag_cache:
-            return jsonify({"status": "error", "message": "Tag não encontrada."}), 404
-
-        # Remove do cache
-        del tag_cache[tag_id]
+    if tag_id not in tag_cache:
+        return jsonify({"status": "error", "message": "Tag não encontrada."}), 404
 
-        # Reescreve o arquivo tags.txt sem a linha deletada
-        try:
-            with open(TAGS_FILE, "w") as f:
-                for tid, song in tag_cache.items():
-                    f.write(f"{tid}:{song}\n")
-            return jsonify({"status": "success", "message": f"Associação para a tag {tag_id} deletada."})
-        except Exception as e:
-            # Se a reescrita falhar, idealmente deveríamos ter um rollback,
-            # mas por simplicidade vamos apenas logar o erro.
-            print(f"Erro ao reescrever o arquivo de tags: {e}")
-            # Recarregar o cache do arquivo para garantir consistência
-            load_tags_to_cache()
-            return jsonify({"status": "error", "message": "Erro ao salvar as alterações."}), 500
+    # PT: Grava uma lápide no journal em vez de reescrever o arquivo inteiro.
+    # EN: Writes a tombstone to the journal instead of rewriting the whole file.
+    try:
+        tag_cache.delete(tag_id)
+        return jsonify({"status": "success", "message": f"Associação para a tag {tag_id} deletada."})
+    except OSError as e:
+        log.error("Erro ao gravar a remoção no arquivo de tags: %s / Error writing deletion to tags file: %s", e, e)
+        return jsonify({"status": "error", "message": "Erro ao salvar as alterações."}), 500
 
 @app.route('/api/library', methods=['GET'])
 def get_library():
     """
     PT: Retorna a lista de músicas e as associações de tags.
+        Aceita paginação (?offset=&limit=) e responde 304 se o ETag não mudou.
     EN: Returns the list of songs and tag associations.
+        Supports pagination (?offset=&limit=) and answers 304 if the ETag has not changed.
     """
     try:
-        # Lista de músicas na pasta
-        songs = [f for f in os.listdir(MUSIC_FOLDER) if f.endswith('.mp3')]
-        songs.sort()
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(0, limit)
+
+        # PT: O ETag combina as versões da biblioteca, das associações e do catálogo.
+        # EN: The ETag combines the library, association and catalog versions.
+        library_index.refresh_if_changed()
+        etag = f"{BOOT_ID}-{library_index.version}-{tag_cache.version}-{catalog.version}"
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        # PT: A versão do feed é lida antes dos dados: alterações posteriores podem ser reaplicadas sem efeito.
+        # EN: The feed version is read before the data: later changes can be reapplied harmlessly.
+        change_version = change_feed.version
+        version, total, songs = library_index.page(offset, limit)
 
         # As associações já estão no cache em 'tag_cache'
-        with cache_lock:
-            associations = dict(tag_cache)
+        associations = tag_cache.items()
 
         response = jsonify({
             "songs": songs,
-            "associations": associations
+            "associations": associations,
+            "metadata": catalog.lookup(songs),
+            "version": version,
+            "total": total,
+            "offset": offset,
+            "change_epoch": change_feed.epoch,
+            "change_version": change_version
         })
-        # PT: Evita que o navegador guarde a lista em cache.
-        # EN: Prevents the browser from caching the list.
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+        # PT: O navegador pode guardar a lista, mas deve revalidá-la com o ETag.
+        # EN: The browser may keep the list, but must revalidate it with the ETag.
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
         return response
 
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/search', methods=['GET'])
+def search_library():
+    """
+    PT: Busca na biblioteca com paginação por cursor.
+        ?q= termos, ?filter=unassigned (músicas sem cartão) ou orphaned (cartões sem arquivo),
+        ?cursor= valor "next_cursor" da página anterior, ?limit= tamanho da página.
+    EN: Searches the library with cursor pagination.
+        ?q= terms, ?filter=unassigned (songs without a card) or orphaned (cards without a file),
+        ?cursor= "next_cursor" value of the previous page, ?limit= page size.
+    """
+    filter_name = request.args.get('filter') or None
+    try:
+        library_index.refresh_if_changed()
+        result = search_index.search(request.args.get('q', ''), filter_name, request.args.get('cursor') or None,
+                                     request.args.get('limit', DEFAULT_PAGE_SIZE, type=int))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    items = result.pop("items")
+    if filter_name == FILTER_ORPHANED:
+        result["results"] = [{"uid": uid, "song": tag_cache.get(uid)} for uid in items]
+    else:
+        cards = search_index.cards_by_song()
+        result["results"] = [{"name": name, "tag": cards.get(name), "metadata": catalog.get(name)} for name in items]
+    return jsonify(result)
+
+@app.route('/api/library/changes', methods=['GET'])
+def get_library_changes():
+    """
+    PT: Retorna as alterações da biblioteca depois de ?since=<versão> (da época ?epoch=).
+        Se o cliente ficou para trás demais, retorna um snapshot completo no lugar.
+    EN: Returns the library changes after ?since=<version> (of epoch ?epoch=).
+        If the client fell too far behind, returns a full snapshot instead.
+    """
+    since = request.args.get('since', 0, type=int)
+    epoch = request.args.get('epoch')
+    version = change_feed.version
+    changes = change_feed.since(since, epoch)
+    if changes is not None:
+        return jsonify({"epoch": change_feed.epoch, "version": changes[-1]["version"] if changes else since,
+                        "changes": changes})
+
+    library_index.refresh_if_changed()
+    _, _, songs = library_index.page()
+    return jsonify({"epoch": change_feed.epoch, "version": version,
+                    "snapshot": {"songs": songs, "associations": tag_cache.items()}})
+
+@app.route('/api/collections', methods=['GET'])
+def get_collections():
+    """
+    PT: Lista os álbuns (subpastas da pasta de músicas) e as playlists (.m3u/.m3u8),
+        que também podem ser associados a cartões.
+    EN: Lists the albums (subfolders of the music folder) and playlists (.m3u/.m3u8),
+        which can also be assigned to cards.
+    """
+    return jsonify({"collections": playlist.list_collections(MUSIC_FOLDER)})
+
 @app.route('/api/translations', methods=['GET'])
 def get_translations():
-    # PT: Endpoint que serve o arquivo de traduções.
-    # EN: Endpoint that serves the translations file.
+    # PT: Endpoint que serve as traduções (todas, ou só um idioma com ?lang=pt).
+    #     O arquivo só é lido de novo quando o seu mtime muda.
+    # EN: Endpoint that serves the translations (all of them, or one language with ?lang=pt).
+    #     The file is only read again when its mtime changes.
     try:
-        with open(TRANSLATIONS_FILE, 'r', encoding='utf-8') as f:
-            translations = json.load(f)
-        return jsonify(translations)
+        body = translations_cache.get(request.args.get('lang'))
+        if body is None:
+            return jsonify({"status": "error", "message": "Idioma não encontrado (Language not found)."}), 404
+        return cached_response(body)
     except FileNotFoundError:
         return jsonify({"status": "error", "message": "Arquivo de traduções não encontrado (Translations file not found)."}), 404
     except Exception as e:
@@ -341,28 +1131,58 @@ def get_translations():
 # --- Ponto de Entrada da Aplicação / Application Entry Point ---
 
 if __name__ == '__main__':
-    # PT: Garante que a pasta de música exista
-    # EN: Ensures the music folder exists
-    if not os.path.exists(MUSIC_FOLDER):
-        os.makedirs(MUSIC_FOLDER)
-
-    # PT: Carrega as tags existentes para o cache
-    # EN: Loads existing tags into the cache
-    load_tags_to_cache()
-
-    # PT: Inicia o serviço de descoberta mDNS. Isso não precisa de uma thread separada
-    #     pois o atexit.register cuida do fechamento. A biblioteca roda em seus próprios daemons.
-    # EN: Starts the mDNS discovery service. This doesn't need a separate thread
-    #     as atexit.register handles the cleanup. The library runs in its own daemons.
-    register_mdns_service()
-
-    # PT: Inicia a thread do leitor RFID em modo daemon
-    # EN: Starts the RFID reader thread in daemon mode
-    listener_thread = threading.Thread(target=rfid_listener, daemon=True)
-    listener_thread.start()
+    startup.record("module_setup", IMPORTS_DONE, time.perf_counter())
+
+    # PT: Caminho crítico: pasta de músicas, tags e leitor RFID. Assim que o listener está
+    #     rodando, um cartão já pode ser lido (o play espera na fila do ator pelo mixer).
+    # EN: Critical path: music folder, tags and RFID reader. As soon as the listener is
+    #     running, a card can already be scanned (the play waits in the actor queue for the mixer).
+    with startup.phase("music_folder"):
+        if not os.path.exists(MUSIC_FOLDER):
+            os.makedirs(MUSIC_FOLDER)
+
+    with startup.phase("tags"):
+        load_tags_to_cache()
+
+    with startup.phase("rfid_listener"):
+        start_rfid_readers()
+    startup.mark("ready_for_scans")
+
+    # PT: O resto roda em paralelo, em segundo plano.
+    # EN: Everything else runs concurrently, in the background.
+    startup.background("mixer", player.ready.wait)
+    startup.background("player_watcher", player_watcher.start)
+    startup.background("loudness", loudness_store.start, LOUDNESS_RELOAD_SECONDS)
+    def start_library():
+        # PT: Indexa a pasta de músicas e, depois, os metadados das músicas novas ou alteradas
+        # EN: Indexes the music folder and then the metadata of new or changed songs
+        library_index.start()
+        catalog_indexer.start(library_index.page()[2])
+
+    startup.background("library", start_library)
+    startup.background("uploads_cleanup", upload_manager.cleanup)
+    startup.background("replication", replicator.start)
+    if blocking.is_green():
+        # PT: O zeroconf roda o próprio loop asyncio em uma thread e não funciona com monkey patching;
+        #     a replicação continua funcionando com JUKEBOX_PEERS.
+        # EN: zeroconf runs its own asyncio loop on a thread and does not work with monkey patching;
+        #     replication keeps working with JUKEBOX_PEERS.
+        log.info("mDNS desativado no modo %s. / mDNS disabled in %s mode.", ASYNC_MODE, ASYNC_MODE)
+    else:
+        startup.background("mdns", register_mdns_service)
+
+    def report_when_done():
+        startup.wait()
+        startup.mark("startup_complete")
+        startup.print_report()
+    threading.Thread(target=report_when_done, daemon=True).start()
 
     # PT: Executa o servidor com suporte a WebSockets
     # EN: Runs the server with WebSocket support
-    print("Iniciando servidor Web... / Starting web server...")
-    print("Acesse a Jukebox em http://rfidbox.local:5000 ou http://<seu_ip>:5000")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    log.info("Iniciando servidor Web... / Starting web server...")
+    log.info("Acesse a Jukebox em http://rfidbox.local:%d ou http://<seu_ip>:%d", PORT, PORT)
+    startup.mark("web_server")
+    log.info("Modo do servidor / Server mode: %s", ASYNC_MODE)
+    # PT: No modo "threading" o servidor é o do Werkzeug, que o Flask-SocketIO só aceita com a opção explícita.
+    # EN: In "threading" mode the server is Werkzeug's, which Flask-SocketIO only accepts with the explicit option.
+    socketio.run(app, host='0.0.0.0', port=PORT, debug=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,192 @@
+# PT: Este arquivo extrai metadados de arquivos MP3 (título, artista, álbum, duração e bitrate).
+#     Usa a biblioteca mutagen se estiver instalada; caso contrário, lê diretamente as
+#     tags ID3v2/ID3v1 e o cabeçalho do primeiro quadro MPEG (incluindo Xing/VBRI para VBR).
+# EN: This file extracts metadata from MP3 files (title, artist, album, duration and bitrate).
+#     It uses the mutagen library if installed; otherwise it reads the ID3v2/ID3v1 tags
+#     and the first MPEG frame header directly (including Xing/VBRI for VBR).
+
+import os
+import struct
+
+# PT: mutagen é opcional; o leitor embutido cobre os casos comuns.
+# EN: mutagen is optional; the built-in reader covers the common cases.
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+_TEXT_FRAMES = {
+    "TIT2": "title", "TPE1": "artist", "TALB": "album",
+    "TT2": "title", "TP1": "artist", "TAL": "album",
+}
+_TEXT_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+
+# PT: Quanto do início do arquivo é lido para encontrar o primeiro quadro de áudio.
+# EN: How much of the beginning of the file is read to find the first audio frame.
+_SCAN_BYTES = 64 * 1024
+
+
+def read_metadata(path):
+    """
+    PT: Retorna um dicionário com title, artist, album, duration (s) e bitrate (kbps).
+        Campos desconhecidos ficam como None.
+    EN: Returns a dictionary with title, artist, album, duration (s) and bitrate (kbps).
+        Unknown fields are left as None.
+    """
+    if mutagen is not None:
+        try:
+            return _read_with_mutagen(path)
+        except Exception:
+            pass
+    return _read_builtin(path)
+
+
+def _read_with_mutagen(path):
+    audio = mutagen.File(path, easy=True)
+    info = {"title": None, "artist": None, "album": None, "duration": None, "bitrate": None}
+    if audio is None:
+        return info
+    for key in ("title", "artist", "album"):
+        values = audio.get(key) if audio.tags is not None else None
+        info[key] = values[0] if values else None
+    if audio.info is not None:
+        info["duration"] = getattr(audio.info, "length", None)
+        bitrate = getattr(audio.info, "bitrate", None)
+        info["bitrate"] = int(bitrate / 1000) if bitrate else None
+    return info
+
+
+def _read_builtin(path):
+    info = {"title": None, "artist": None, "album": None, "duration": None, "bitrate": None}
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(10)
+        tag_size = 0
+        if len(head) == 10 and head[:3] == b"ID3":
+            tag_size = _synchsafe(head[6:10]) + 10
+            if head[5] & 0x10:
+                tag_size += 10
+            f.seek(0)
+            _parse_id3v2(f.read(tag_size), info)
+
+        f.seek(tag_size)
+        data = f.read(_SCAN_BYTES)
+
+        tail_size = 0
+        if file_size >= 128:
+            f.seek(file_size - 128)
+            tail = f.read(128)
+            if tail[:3] == b"TAG":
+                tail_size = 128
+                _parse_id3v1(tail, info)
+
+    _parse_mpeg(data, file_size - tag_size - tail_size, info)
+    return info
+
+
+def _synchsafe(data):
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _decode_text(payload):
+    if not payload:
+        return None
+    encoding = _TEXT_ENCODINGS.get(payload[0], "latin-1")
+    text = payload[1:].decode(encoding, errors="replace")
+    return text.split("\0")[0].strip() or None
+
+
+def _parse_id3v2(tag, info):
+    major = tag[3]
+    flags = tag[5]
+    pos = 10
+    if flags & 0x40 and len(tag) >= 14:
+        # PT: Pula o cabeçalho estendido. | EN: Skips the extended header.
+        if major == 4:
+            pos += _synchsafe(tag[10:14])
+        else:
+            pos += 4 + struct.unpack(">I", tag[10:14])[0]
+
+    id_len, header_len = (3, 6) if major == 2 else (4, 10)
+    while pos + header_len <= len(tag):
+        frame_id = tag[pos:pos + id_len].decode("latin-1", errors="replace")
+        if not frame_id.strip("\0"):
+            break
+        if major == 2:
+            size = int.from_bytes(tag[pos + 3:pos + 6], "big")
+        elif major == 4:
+            size = _synchsafe(tag[pos + 4:pos + 8])
+        else:
+            size = struct.unpack(">I", tag[pos + 4:pos + 8])[0]
+        pos += header_len
+        key = _TEXT_FRAMES.get(frame_id)
+        if key and info[key] is None:
+            info[key] = _decode_text(tag[pos:pos + size])
+        pos += size
+
+
+def _parse_id3v1(tail, info):
+    for key, start, end in (("title", 3, 33), ("artist", 33, 63), ("album", 63, 93)):
+        if info[key] is None:
+            value = tail[start:end].split(b"\0")[0].decode("latin-1", errors="replace").strip()
+            info[key] = value or None
+
+
+def _parse_mpeg(data, audio_bytes, info):
+    """
+    PT: Encontra o primeiro quadro MPEG válido e calcula a duração e o bitrate.
+    EN: Finds the first valid MPEG frame and computes the duration and bitrate.
+    """
+    pos = data.find(b"\xff")
+    while 0 <= pos < len(data) - 4:
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        version_bits = (b1 >> 3) & 3
+        layer_bits = (b1 >> 1) & 3
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 3
+        if (b1 & 0xE0) == 0xE0 and version_bits != 1 and layer_bits != 0 and 0 < bitrate_index < 15 and rate_index != 3:
+            break
+        pos = data.find(b"\xff", pos + 1)
+    else:
+        return
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    mono = (b3 >> 6) == 3
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+
+    # PT: Cabeçalhos VBR (Xing/Info ou VBRI) informam o número total de quadros.
+    # EN: VBR headers (Xing/Info or VBRI) carry the total number of frames.
+    frames = None
+    if layer == 3:
+        side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+        xing = pos + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 12:
+            if struct.unpack(">I", data[xing + 4:xing + 8])[0] & 1:
+                frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+        elif data[pos + 36:pos + 40] == b"VBRI" and len(data) >= pos + 54:
+            frames = struct.unpack(">I", data[pos + 50:pos + 54])[0]
+
+    audio_bytes = max(0, audio_bytes - pos)
+    if frames:
+        duration = frames * samples_per_frame / float(sample_rate)
+        info["duration"] = duration
+        info["bitrate"] = int(audio_bytes * 8 / duration / 1000) if duration else bitrate
+    else:
+        info["bitrate"] = bitrate
+        info["duration"] = audio_bytes * 8 / (bitrate * 1000.0)
@@ -0,0 +1,235 @@
+# PT: Este arquivo contém métricas simples no formato de texto do Prometheus (contadores,
+#     medidores e histogramas), expostas em /metrics. Registrar um valor custa apenas
+#     algumas operações em memória, para poder ser usado nos caminhos mais quentes
+#     (leitura do RFID, play, rotas HTTP). Cada série tem a sua trava do sistema: os valores
+#     são alterados ao mesmo tempo por rotas, pelo ator, pelos leitores e pelo pool.
+# EN: This file contains simple metrics in the Prometheus text format (counters, gauges
+#     and histograms), exposed at /metrics. Recording a value only costs a few in-memory
+#     operations, so it can be used on the hottest paths (RFID polling, play, HTTP routes).
+#     Each series has its own OS lock: values are changed at the same time by routes, the
+#     actor, the readers and the pool.
+
+import bisect
+import math
+import threading
+
+from app.blocking import native_lock
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# PT: Limites padrão dos histogramas, em segundos (de 0,5 ms a 10 s).
+# EN: Default histogram bounds, in seconds (from 0.5 ms to 10 s).
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = native_lock()
+        if not self.labelnames:
+            # PT: Métricas sem rótulos aparecem com zero desde o início.
+            # EN: Metrics without labels show up as zero from the start.
+            self.labels()
+
+    def labels(self, *values):
+        """
+        PT: Retorna a série com os valores de rótulo dados (criada na primeira vez).
+        EN: Returns the series with the given label values (created the first time).
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        # PT: Métricas sem rótulos usam uma única série.
+        # EN: Metrics without labels use a single series.
+        return self.labels()
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = native_lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labelnames, values):
+        return [f"{name}_total{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _CounterChild
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self.lock = native_lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def samples(self, name, labelnames, values):
+        value = self.function() if self.function else self.value
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(float(value))}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _new_child = _GaugeChild
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set_function(self, function):
+        """
+        PT: O valor passa a ser lido da função no momento da coleta (ex: tamanho de um cache).
+        EN: The value is read from the function at collection time (e.g. the size of a cache).
+        """
+        self._default().function = function
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = native_lock()
+
+    def observe(self, value):
+        # PT: Só o balde correspondente é incrementado; os acumulados são somados na coleta.
+        # EN: Only the matching bucket is incremented; cumulative counts are summed at collection.
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labelnames, values):
+        # PT: Cópia sob a trava: a soma e os baldes da coleta vêm das mesmas observações.
+        # EN: Copy under the lock: the collected sum and buckets come from the same observations.
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, [('le', _format_value(float(bound)))])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+class Registry:
+    """
+    PT: Conjunto de métricas expostas juntas em /metrics.
+    EN: Set of metrics exposed together at /metrics.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # PT: Módulos recarregados (ex: nos benchmarks) reutilizam a métrica existente.
+                # EN: Reloaded modules (e.g. in the benchmarks) reuse the existing metric.
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
@@ -1,11 +1,40 @@
-import pygame
+import io
 import os
+import threading
+import time
+from concurrent.futures import Future
+
+from app import metrics
+from app.log import get_logger
+from app.audio_backends import AudioError, create_backend
+from app.blocking import run_native
+
+MIXER_LOAD_SECONDS = metrics.histogram(
+    "jukebox_mixer_load_seconds", "Time spent in the audio backend's load/queue.", ["mode"])
+PREPARE_SECONDS = metrics.histogram(
+    "jukebox_player_prepare_seconds", "Time spent preparing (reading) the next track in the background.")
+STALE_PREPARES = metrics.counter(
+    "jukebox_player_stale_prepares", "Track preparations discarded because a newer play arrived.")
+
+log = get_logger("player")
+
+# PT: Intervalo entre os passos de volume do fade out.
+# EN: Interval between the volume steps of the fade out.
+FADE_STEP_MS = 25
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
 
 class Player:
     """
-    PT: Uma classe singleton para controlar a reprodução de música usando pygame.
+    PT: Uma classe singleton para controlar a reprodução de música usando um backend de áudio
+        (pygame, mpg123 ou nulo, veja audio_backends.py).
         Gerencia o estado do player (faixa atual, volume, status de reprodução).
-    EN: A singleton class to control music playback using pygame.
+    EN: A singleton class to control music playback using an audio backend
+        (pygame, mpg123 or null, see audio_backends.py).
         Manages the player's state (current track, volume, playback status).
     """
     _instance = None
@@ -23,30 +52,383 @@ class Player:
         if hasattr(self, '_initialized'):
             return
 
-        print("Inicializando o Player de áudio (pygame)... / Initializing audio player (pygame)...")
-        pygame.mixer.init()
         self.current_song = None
         self.is_playing = False
         self.is_paused = False
         self.volume = 0.5  # PT: Volume padrão de 50% | EN: Default volume of 50%
-        pygame.mixer.music.set_volume(self.volume)
+        # PT: Backend de áudio; definido antes de init_mixer (padrão: pygame).
+        # EN: Audio backend; set before init_mixer (default: pygame).
+        self.backend = None
+        # PT: Sinalizado quando o backend de áudio está pronto (veja init_mixer).
+        # EN: Set when the audio backend is ready (see init_mixer).
+        self.ready = threading.Event()
+        self.mixer_init_seconds = None
+        # PT: Funções chamadas sempre que o estado muda por um comando.
+        # EN: Callbacks invoked whenever the state changes because of a command.
+        self._listeners = []
+        # PT: Cache opcional com o conteúdo das músicas em memória (veja preload_cache.py).
+        # EN: Optional cache with the songs' contents in memory (see preload_cache.py).
+        self.preload_cache = None
+        # PT: Catálogo opcional de metadados, usado para informar a duração da faixa.
+        # EN: Optional metadata catalog, used to report the track duration.
+        self.catalog = None
+        # PT: Ganhos de normalização pré-calculados (veja loudness.py) e o ganho da faixa atual.
+        # EN: Precomputed normalization gains (see loudness.py) and the current track's gain.
+        self.loudness = None
+        self.gain_db = None
+        # PT: Fila de reprodução: as faixas do cartão atual, o índice da faixa tocando e o
+        #     índice da próxima faixa já entregue ao backend (tocada sem intervalo).
+        # EN: Play queue: the current card's tracks, the index of the playing track and the
+        #     index of the next track already handed to the backend (played without a gap).
+        self.playlist = []
+        self.track_index = 0
+        self.collection = None
+        self._queued_index = None
+        self._last_pos = 0
+        self._lock = threading.RLock()
+        # PT: Troca de faixa sem bloquear: a faixa nova é lida por uma thread de preparo enquanto a
+        #     atual continua tocando (com fade out), e a troca acontece na thread do PlayerActor.
+        #     `post(delay, method, *args)` agenda um método nessa thread (definido em main.py);
+        #     sem ele, o play é síncrono. Cada play recebe uma geração: só a mais nova é tocada.
+        # EN: Non-blocking track switching: the new track is read by a prepare thread while the
+        #     current one keeps playing (fading out), and the switch happens on the PlayerActor thread.
+        #     `post(delay, method, *args)` schedules a method on that thread (set in main.py);
+        #     without it, play is synchronous. Every play gets a generation: only the newest one plays.
+        self.post = None
+        self.crossfade_ms = 0
+        self.prepare_max_bytes = 32 * 1024 * 1024
+        self._generation = 0
+        self._pending_switch = None
+        self._switch_waiters = []
+        self._fade = 1.0
+        self._fade_until = 0.0
+        self._prepare_request = None
+        self._prepare_condition = threading.Condition()
+        self._prepare_thread = None
         self._initialized = True
 
+    def init_mixer(self):
+        """
+        PT: Abre o backend de áudio (no pygame, importa o pygame e abre o mixer). Chamado uma
+            vez pela thread do PlayerActor, que é a dona do backend, em paralelo com o resto
+            da inicialização.
+        EN: Opens the audio backend (for pygame, imports pygame and opens the mixer). Called
+            once by the PlayerActor thread, which owns the backend, concurrently with the rest
+            of the startup.
+        """
+        if self.ready.is_set():
+            return
+        if self.backend is None:
+            self.backend = create_backend("pygame")
+        start = time.perf_counter()
+        log.info("Inicializando o Player de áudio (%s)... / Initializing audio player (%s)...", self.backend.name, self.backend.name)
+        run_native(self.backend.open)
+        self.backend.set_volume(self.volume)
+        self.mixer_init_seconds = time.perf_counter() - start
+        self.ready.set()
+
+    def add_listener(self, callback):
+        """
+        PT: Registra uma função a ser chamada após play, pause/continuar e mudança de volume.
+        EN: Registers a function to be called after play, pause/resume and volume changes.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
     def play(self, song_path):
         """
         PT: Carrega e toca uma nova música. Se uma música já estiver tocando, ela é parada.
         EN: Loads and plays a new song. If a song is already playing, it is stopped.
         """
-        if not os.path.exists(song_path):
-            print(f"Erro: Arquivo de áudio não encontrado em (Error: Audio file not found at) '{song_path}'")
+        return self.play_tracks([song_path])
+
+    def play_tracks(self, paths, start=0, collection=None):
+        """
+        PT: Toca uma lista de faixas em ordem (álbum ou playlist). A faixa seguinte é sempre
+            colocada na fila do backend com antecedência, para que a troca não tenha intervalo.
+        EN: Plays a list of tracks in order (album or playlist). The next track is always
+            queued in the backend ahead of time, so that the transition has no gap.
+
+        Args:
+            paths (list): PT: Caminhos das faixas. | EN: Track paths.
+            start (int): PT: Índice da primeira faixa. | EN: Index of the first track.
+            collection (str): PT: Nome do álbum/playlist, se houver. | EN: Album/playlist name, if any.
+
+        Returns:
+            Future: PT: Resolvido com o estado do player quando a faixa começa a tocar (None se o
+                    play foi síncrono ou não havia arquivo).
+                    EN: Resolved with the player state when the track starts playing (None if the
+                    play was synchronous or there was no file).
+        """
+        # PT: Quem chama já filtrou os arquivos que não existem (veja play_entry em main.py),
+        #     para que a thread do ator não toque no disco.
+        # EN: The caller has already dropped the files that do not exist (see play_entry in
+        #     main.py), so that the actor thread does not touch the disk.
+        if not paths:
+            log.error("Arquivo de áudio não encontrado em (Audio file not found at) '%s'", collection or "")
+            return None
+        start = max(0, min(start, len(paths) - 1))
+
+        if self.post is None:
+            with self._lock:
+                self._generation += 1
+            self._switch(paths, start, collection, *self._read_sources(paths[start:start + 2]))
+            return None
+
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            # PT: Quem esperava por um play mais antigo recebe o resultado deste.
+            # EN: Whoever waited for an older play gets the result of this one.
+            future = Future()
+            self._switch_waiters.append(future)
+            self._pending_switch = (paths, start, collection)
+            self._start_fade(generation)
+        # PT: A faixa seguinte também é lida agora, para ser enfileirada sem ler do disco no ator.
+        # EN: The following track is read now as well, to be queued without reading from disk on the actor.
+        self._request_prepare(generation, paths[start:start + 2], "switch_prepared")
+        return future
+
+    def switch_prepared(self, generation, source, next_source=None):
+        """
+        PT: Chamado na thread do PlayerActor quando a faixa (e a seguinte) está pronta e o fade
+            out terminou. Ignorado se outro play chegou depois.
+        EN: Called on the PlayerActor thread when the track (and the following one) is ready and
+            the fade out is over. Ignored if another play arrived afterwards.
+        """
+        with self._lock:
+            if generation != self._generation or self._pending_switch is None:
+                return
+            paths, start, collection = self._pending_switch
+            self._pending_switch = None
+            waiters, self._switch_waiters = self._switch_waiters, []
+        try:
+            self._switch(paths, start, collection, source, next_source)
+        except Exception as e:
+            for waiter in waiters:
+                waiter.set_exception(e)
+            raise
+        status = self.get_status()
+        for waiter in waiters:
+            waiter.set_result(status)
+
+    def _switch(self, paths, start, collection, source, next_source=None):
+        with self._lock:
+            self.playlist = paths
+            self.collection = collection
+            self.track_index = start
+            self.current_song = paths[self.track_index]
+            log.info("Tocando (Now Playing): %s", self.current_song)
+
+            # PT: Depois de um fade out, a faixa nova entra com fade in.
+            # EN: After a fade out, the new track comes in with a fade in.
+            fade_in_ms = self.crossfade_ms if self._fade < 1.0 else 0
+            self._fade = 1.0
+            self._fade_until = 0.0
+            self._load(self.current_song, source=source)
+            self._apply_gain()
+            self.backend.play(fade_ms=fade_in_ms)
+            self.is_playing = True
+            self.is_paused = False
+            self._last_pos = 0
+            self._queue_next(next_source)
+        self._notify()
+
+    def _start_fade(self, generation):
+        """
+        PT: Agenda o fade out da faixa atual, a partir do volume em que ela está. O pygame não
+            toca duas músicas ao mesmo tempo, então o "crossfade" é um fade out seguido de fade in.
+        EN: Schedules the fade out of the current track, from the level it is at. pygame cannot
+            play two music streams at once, so the "crossfade" is a fade out followed by a fade in.
+        """
+        audible = self.ready.is_set() and not self.is_paused and self.backend.get_busy()
+        if not self.crossfade_ms or not audible or self._fade <= 0:
+            self._fade_until = 0.0
             return
+        duration = self.crossfade_ms / 1000.0
+        self._fade_until = time.monotonic() + duration
+        steps = max(1, self.crossfade_ms // FADE_STEP_MS)
+        for step in range(1, steps + 1):
+            self.post(duration * step / steps, "fade_step", generation, self._fade * (1.0 - step / steps))
 
-        print(f"Tocando (Now Playing): {song_path}")
-        self.current_song = song_path
-        pygame.mixer.music.load(song_path)
-        pygame.mixer.music.play()
-        self.is_playing = True
-        self.is_paused = False
+    def fade_step(self, generation, level):
+        with self._lock:
+            if generation == self._generation and self._pending_switch is not None:
+                self._fade = level
+                self._set_mixer_volume()
+
+    def _request_prepare(self, generation, paths, method, *args):
+        """
+        PT: Pede à thread de preparo que leia `paths` para a memória e depois chame `method`
+            (generation, *args, *fontes) na thread do ator.
+        EN: Asks the prepare thread to read `paths` into memory and then call `method`
+            (generation, *args, *sources) on the actor thread.
+        """
+        # PT: Uma vaga só: um pedido mais novo substitui o que ainda não começou.
+        # EN: A single slot: a newer request replaces the one that has not started yet.
+        with self._prepare_condition:
+            self._prepare_request = (generation, paths, method, args)
+            if self._prepare_thread is None:
+                self._prepare_thread = threading.Thread(target=self._prepare_loop, name="player-prepare", daemon=True)
+                self._prepare_thread.start()
+            self._prepare_condition.notify()
+
+    def _prepare_loop(self):
+        while True:
+            with self._prepare_condition:
+                while self._prepare_request is None:
+                    self._prepare_condition.wait()
+                generation, paths, method, args = self._prepare_request
+                self._prepare_request = None
+
+            start = time.perf_counter()
+            sources = self._read_sources(paths)
+            PREPARE_SECONDS.observe(time.perf_counter() - start)
+            if generation != self._generation:
+                STALE_PREPARES.inc()
+                continue
+            self.post(max(0.0, self._fade_until - time.monotonic()), method, generation, *args, *sources)
+
+    def _read_sources(self, paths):
+        sources = []
+        for path in paths:
+            try:
+                sources.append(self._read_source(path))
+            except OSError as e:
+                # PT: Sem preparo, o load lê o arquivo direto (e reporta o erro, se houver).
+                # EN: Without preparation, load reads the file directly (and reports the error, if any).
+                log.error("Erro ao preparar '%s': %s / Error preparing '%s': %s", path, e, path, e)
+                sources.append(None)
+        return sources
+
+    def _read_source(self, path):
+        """
+        PT: Lê a faixa para a memória (do PreloadCache ou do disco), fora da thread do ator.
+            Arquivos grandes demais, ou um backend que só lê arquivos, ficam com o disco.
+            O PreloadCache só é consultado: uma falha lê o arquivo uma única vez, aqui.
+        EN: Reads the track into memory (from the PreloadCache or the disk), off the actor thread.
+            Files that are too large, or a backend that only reads files, stay on disk.
+            The PreloadCache is only looked up: a miss reads the file a single time, here.
+        """
+        if not self.backend.supports_memory:
+            return None
+        source = self.preload_cache.get(path) if self.preload_cache else None
+        if source is None and os.path.getsize(path) <= self.prepare_max_bytes:
+            source = io.BytesIO(run_native(_read_file, path))
+        return source
+
+    def _load(self, song_path, queue=False, source=None):
+        # PT: Se a música estiver pré-carregada, toca da memória em vez de ler do cartão SD.
+        #     O mpg123 sempre lê o arquivo, então nem consulta o cache.
+        # EN: If the song is preloaded, play it from memory instead of reading from the SD card.
+        #     mpg123 always reads the file, so it does not even look up the cache.
+        use_cache = source is None and self.preload_cache and self.backend.supports_memory
+        if use_cache:
+            source = self.preload_cache.get(song_path)
+        action = self.backend.queue if queue else self.backend.load
+        start = time.perf_counter()
+        # PT: Nos modos eventlet/gevent o load roda em uma thread do sistema (veja blocking.py).
+        # EN: In eventlet/gevent modes the load runs on an OS thread (see blocking.py).
+        run_native(action, song_path, source)
+        MIXER_LOAD_SECONDS.labels("queue" if queue else "load").observe(time.perf_counter() - start)
+
+    def _apply_gain(self):
+        """
+        PT: Aplica o ganho salvo da faixa atual sobre o volume escolhido pelo usuário.
+            Só consulta o resultado da análise; nada é medido durante a reprodução.
+        EN: Applies the current track's saved gain on top of the user-selected volume.
+            It only looks up the analysis result; nothing is measured during playback.
+        """
+        self.gain_db = self.loudness.gain(self.current_song) if self.loudness and self.current_song else None
+        self._set_mixer_volume()
+
+    def _set_mixer_volume(self):
+        factor = 10 ** (self.gain_db / 20.0) if self.gain_db is not None else 1.0
+        self.backend.set_volume(min(1.0, self.volume * factor) * self._fade)
+
+    def _queue_next(self, source=None):
+        self._queued_index = None
+        next_index = self.track_index + 1
+        if next_index >= len(self.playlist):
+            return
+        try:
+            self._load(self.playlist[next_index], queue=True, source=source)
+            self._queued_index = next_index
+        except AudioError as e:
+            # PT: Sem fila, advance() toca a próxima faixa quando a atual terminar.
+            # EN: Without a queue, advance() plays the next track when the current one ends.
+            log.warning("Erro ao enfileirar a próxima faixa: %s / Error queueing the next track: %s", e, e)
+
+    def _prepare_next(self):
+        """
+        PT: Enfileira a faixa seguinte à atual. Com o ator, ela é lida antes pela thread de preparo.
+        EN: Queues the track after the current one. With the actor, it is read first by the prepare thread.
+        """
+        self._queued_index = None
+        next_index = self.track_index + 1
+        if next_index >= len(self.playlist):
+            return
+        if self.post is None:
+            self._queue_next(*self._read_sources([self.playlist[next_index]]))
+        else:
+            self._request_prepare(self._generation, [self.playlist[next_index]], "queue_prepared", next_index)
+
+    def queue_prepared(self, generation, index, source):
+        """
+        PT: Chamado na thread do PlayerActor com a faixa seguinte já lida. Ignorado se outro play
+            chegou ou se a playlist já passou dessa faixa.
+        EN: Called on the PlayerActor thread with the following track already read. Ignored if
+            another play arrived or if the playlist has already moved past that track.
+        """
+        with self._lock:
+            if (generation != self._generation or self._pending_switch is not None
+                    or self._queued_index is not None or index != self.track_index + 1):
+                return
+            self._queue_next(source)
+
+    def advance(self):
+        """
+        PT: Chamado periodicamente (pelo observador de estado). Detecta que o backend passou
+            para a faixa enfileirada (get_pos() volta a zero) e enfileira a seguinte.
+        EN: Called periodically (by the state watcher). Detects that the backend moved on to the
+            queued track (get_pos() goes back to zero) and queues the one after it.
+
+        Returns:
+            bool: PT: True se a faixa atual mudou. | EN: True if the current track changed.
+        """
+        with self._lock:
+            # PT: Com uma troca pendente, a playlist atual já foi substituída.
+            # EN: With a pending switch, the current playlist has already been replaced.
+            if len(self.playlist) < 2 or self.is_paused or self._pending_switch is not None:
+                return False
+
+            busy = self.backend.get_busy()
+            position = self.backend.get_pos()
+            if busy and self._queued_index is not None and 0 <= position < self._last_pos:
+                self.track_index = self._queued_index
+                self.current_song = self.playlist[self.track_index]
+                self._last_pos = position
+                self._apply_gain()
+                self._prepare_next()
+            elif not busy and self.track_index + 1 < len(self.playlist):
+                # PT: A fila não foi usada (erro ou faixa curtíssima); toca a próxima diretamente.
+                # EN: The queue was not used (error or very short track); play the next one directly.
+                next_index = (self._queued_index or self.track_index) + 1
+                if next_index >= len(self.playlist):
+                    self.track_index = len(self.playlist) - 1
+                    return False
+                self.play_tracks(self.playlist, next_index, self.collection)
+                return True
+            else:
+                self._last_pos = max(position, 0)
+                return False
+
+        log.info("Tocando (Now Playing): %s", self.current_song)
+        self._notify()
+        return True
 
     def toggle_play_pause(self):
         """
@@ -57,22 +439,23 @@ class Player:
         """
         # PT: Atualiza o status de is_playing primeiro para ter o estado mais recente.
         # EN: Update the is_playing status first to get the latest state.
-        self.is_playing = pygame.mixer.music.get_busy()
+        self.is_playing = self.backend.get_busy()
 
         if self.is_playing:
             if self.is_paused:
-                print("Continuando a música (Resuming music).")
-                pygame.mixer.music.unpause()
+                log.info("Continuando a música (Resuming music).")
+                self.backend.unpause()
                 self.is_paused = False
             else:
-                print("Pausando a música (Pausing music).")
-                pygame.mixer.music.pause()
+                log.info("Pausando a música (Pausing music).")
+                self.backend.pause()
                 self.is_paused = True
+            self._notify()
         else:
             # PT: Se não está tocando, mas temos uma música carregada, toca de novo.
             # EN: If not playing, but we have a loaded song, play it again.
             if self.current_song:
-                self.play(self.current_song)
+                return self.play_tracks(self.playlist, self.track_index, self.collection)
 
     def set_volume(self, level):
         """
@@ -83,21 +466,40 @@ class Player:
             level (float): PT: Um valor entre 0.0 e 1.0. | EN: A value between 0.0 and 1.0.
         """
         self.volume = max(0.0, min(1.0, level))
-        print(f"Ajustando volume para (Adjusting volume to): {self.volume:.2f}")
-        pygame.mixer.music.set_volume(self.volume)
+        log.info("Ajustando volume para (Adjusting volume to): %.2f", self.volume)
+        self._set_mixer_volume()
+        self._notify()
 
     def get_status(self):
         """
         PT: Retorna o estado atual do player.
         EN: Returns the current state of the player.
         """
-        # PT: pygame.mixer.music.get_busy() retorna True se algo estiver tocando (mesmo que pausado).
-        # EN: pygame.mixer.music.get_busy() returns True if something is playing (even if paused).
-        self.is_playing = pygame.mixer.music.get_busy()
+        # PT: get_busy() retorna True se algo estiver tocando (mesmo que pausado).
+        #     Antes de o backend abrir, nada pode estar tocando.
+        # EN: get_busy() returns True if something is playing (even if paused).
+        #     Before the backend is open, nothing can be playing.
+        self.is_playing = self.ready.is_set() and self.backend.get_busy()
+        current_song = os.path.basename(self.current_song) if self.current_song else None
+
+        # PT: get_pos() retorna os milissegundos tocados desde o play (-1 se parado).
+        # EN: get_pos() returns the milliseconds played since play (-1 if stopped).
+        position = self.backend.get_pos() if self.is_playing else -1
+        # PT: O catálogo só indexa as músicas da raiz da pasta; faixas de álbuns ficam sem metadados.
+        # EN: The catalog only indexes the songs at the folder root; album tracks have no metadata.
+        metadata = self.catalog.get(current_song) if self.catalog and current_song and not self.collection else None
 
         return {
-            "current_song": os.path.basename(self.current_song) if self.current_song else None,
+            "current_song": current_song,
             "is_playing": self.is_playing and not self.is_paused,
             "is_paused": self.is_paused,
-            "volume": self.volume
+            "volume": self.volume,
+            "gain_db": self.gain_db,
+            "position": position / 1000.0 if position >= 0 else None,
+            "duration": metadata["duration"] if metadata else None,
+            "title": metadata["title"] if metadata else None,
+            "artist": metadata["artist"] if metadata else None,
+            "collection": self.collection,
+            "track_index": self.track_index if self.collection else None,
+            "track_count": len(self.playlist) if self.collection else None
         }
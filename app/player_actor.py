@@ -0,0 +1,206 @@
+# PT: Este arquivo contém o "ator" do player: uma única thread é dona do Player (e do pygame)
+#     e executa, em ordem, os comandos enviados pelas rotas Flask e pela thread do RFID.
+#     Comandos que ficaram obsoletos antes de executar são combinados: só o último volume
+#     é aplicado, e um play mais novo descarta o play que ainda estava na fila.
+#     O Player também agenda comandos para depois (passos de fade, troca de faixa preparada).
+# EN: This file contains the player "actor": a single thread owns the Player (and pygame)
+#     and runs, in order, the commands sent by the Flask routes and the RFID thread.
+#     Commands that became obsolete before running are coalesced: only the latest volume
+#     is applied, and a newer play drops the play that was still queued.
+#     The Player also schedules commands for later (fade steps, prepared track switch).
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from app.log import get_logger
+
+log = get_logger("player")
+
+# PT: Comandos que substituem um comando pendente do mesmo grupo.
+# EN: Commands that supersede a pending command of the same group.
+COALESCE_GROUPS = {"set_volume": "volume", "play": "play", "play_tracks": "play", "get_status": "status"}
+# PT: Grupos cujo comando mais novo vai para o fim da fila (a ordem em relação aos outros importa).
+# EN: Groups whose newest command moves to the end of the queue (ordering against the others matters).
+REQUEUE_GROUPS = {"play"}
+
+
+class _Command:
+    __slots__ = ("name", "args", "futures", "group")
+
+    def __init__(self, name, args, group):
+        self.name = name
+        self.args = args
+        self.group = group
+        self.futures = [Future()]
+
+
+class PlayerActor:
+    """
+    PT: Envia comandos ao Player por uma fila e os executa em uma thread dedicada.
+        Os métodos de comando retornam um Future com o estado do player após o comando.
+    EN: Sends commands to the Player through a queue and runs them on a dedicated thread.
+        The command methods return a Future with the player state after the command.
+    """
+
+    def __init__(self, player, tick_interval=0.25):
+        """
+        Args:
+            player: PT: O Player controlado. | EN: The controlled Player.
+            tick_interval (float): PT: Intervalo entre as verificações de avanço na playlist.
+                                   EN: Interval between the playlist advance checks.
+        """
+        self.player = player
+        self.tick_interval = tick_interval
+        self._pending = deque()
+        self._timers = []
+        self._timer_order = itertools.count()
+        self._condition = threading.Condition()
+        self.executed = 0
+        self.coalesced = 0
+
+    def start(self):
+        threading.Thread(target=self._run, name="player-actor", daemon=True).start()
+
+    # --- Comandos / Commands ---
+
+    def play(self, song_path):
+        return self.submit("play", song_path)
+
+    def play_tracks(self, paths, start=0, collection=None):
+        return self.submit("play_tracks", paths, start, collection)
+
+    def toggle_play_pause(self):
+        return self.submit("toggle_play_pause")
+
+    def set_volume(self, level):
+        return self.submit("set_volume", level)
+
+    def get_status(self, timeout=None):
+        """
+        PT: Retorna o estado do player (lido na thread do ator, depois dos comandos já enfileirados).
+        EN: Returns the player state (read on the actor thread, after the commands already queued).
+        """
+        return self.submit("get_status").result(timeout)
+
+    def stats(self):
+        with self._condition:
+            pending = len(self._pending)
+        return {"executed": self.executed, "coalesced": self.coalesced, "pending": pending}
+
+    def submit(self, name, *args):
+        """
+        PT: Enfileira um comando e retorna o seu Future. Se houver um comando pendente do mesmo
+            grupo, ele é substituído e os dois chamadores recebem o resultado do mais novo.
+        EN: Queues a command and returns its Future. If there is a pending command of the same
+            group, it is replaced and both callers receive the result of the newer one.
+        """
+        group = COALESCE_GROUPS.get(name)
+        command = _Command(name, args, group)
+        with self._condition:
+            if group is not None:
+                for index, pending in enumerate(self._pending):
+                    if pending.group != group:
+                        continue
+                    self.coalesced += 1
+                    command.futures.extend(pending.futures)
+                    if group in REQUEUE_GROUPS:
+                        del self._pending[index]
+                        self._pending.append(command)
+                    else:
+                        self._pending[index] = command
+                    break
+                else:
+                    self._pending.append(command)
+            else:
+                self._pending.append(command)
+            self._condition.notify()
+        return command.futures[0]
+
+    def call_later(self, delay, name, *args):
+        """
+        PT: Executa o método `name` do Player depois de `delay` segundos, na thread do ator.
+            Na hora, passa na frente dos comandos da fila. Pode ser chamado de qualquer thread.
+        EN: Runs the Player's `name` method after `delay` seconds, on the actor thread.
+            When due, it goes ahead of the queued commands. May be called from any thread.
+        """
+        command = _Command(name, args, None)
+        with self._condition:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_order), command))
+            self._condition.notify()
+
+    # --- Thread do ator / Actor thread ---
+
+    def _run(self):
+        # PT: O mixer é aberto aqui, na thread dona do pygame; os comandos que chegarem
+        #     enquanto isso esperam na fila.
+        # EN: The mixer is opened here, on the thread that owns pygame; commands arriving
+        #     in the meantime wait in the queue.
+        init_mixer = getattr(self.player, "init_mixer", None)
+        if init_mixer is not None:
+            try:
+                init_mixer()
+            except Exception as e:
+                log.error("Erro ao inicializar o mixer: %s / Error initializing the mixer: %s", e, e)
+
+        next_tick = time.monotonic() + self.tick_interval
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = []
+                while self._timers and self._timers[0][0] <= now:
+                    due.append(heapq.heappop(self._timers)[2])
+                self._pending.extendleft(reversed(due))
+                deadline = min(next_tick, self._timers[0][0]) if self._timers else next_tick
+                if not self._pending and deadline > now:
+                    self._condition.wait(deadline - now)
+                command = self._pending.popleft() if self._pending else None
+
+            if command is not None:
+                self._execute(command)
+            # PT: Mesmo com comandos chegando sem parar, o player avança na playlist a cada intervalo.
+            # EN: Even with commands arriving nonstop, the player advances the playlist every interval.
+            if time.monotonic() >= next_tick:
+                self._execute_tick()
+                next_tick = time.monotonic() + self.tick_interval
+
+    def _execute_tick(self):
+        try:
+            self.player.advance()
+        except Exception as e:
+            log.error("Erro ao avançar a playlist: %s / Error advancing the playlist: %s", e, e)
+
+    def _execute(self, command):
+        futures = [future for future in command.futures if future.set_running_or_notify_cancel()]
+        try:
+            outcome = None
+            if command.name != "get_status":
+                outcome = getattr(self.player, command.name)(*command.args)
+            # PT: O Player pode terminar o comando depois (um play espera a faixa ser preparada).
+            # EN: The Player may finish the command later (a play waits for the track to be prepared).
+            if not isinstance(outcome, Future):
+                outcome = None
+                result = self.player.get_status()
+        except Exception as e:
+            log.error("Erro ao executar '%s': %s / Error running '%s': %s", command.name, e, command.name, e)
+            for future in futures:
+                future.set_exception(e)
+        else:
+            if outcome is not None:
+                outcome.add_done_callback(lambda done: _copy_outcome(done, futures))
+            else:
+                for future in futures:
+                    future.set_result(result)
+        self.executed += 1
+
+
+def _copy_outcome(done, futures):
+    error = done.exception()
+    for future in futures:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(done.result())
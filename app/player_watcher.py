@@ -0,0 +1,104 @@
+# PT: Este arquivo contém o observador do estado do player. Em vez de cada navegador
+#     consultar /api/status periodicamente, uma única thread no servidor detecta as
+#     transições (nova faixa, pausa, fim da faixa, volume) e envia apenas as diferenças.
+# EN: This file contains the player state watcher. Instead of every browser polling
+#     /api/status periodically, a single server thread detects the transitions
+#     (new track, pause, track end, volume) and sends only the differences.
+
+import threading
+
+from app.log import get_logger
+
+log = get_logger("player")
+
+# PT: Campos que mudam continuamente e não disparam eventos sozinhos (o cliente os
+#     extrapola localmente); eles são enviados junto com qualquer outra mudança.
+# EN: Fields that change continuously and do not trigger events by themselves (the
+#     client extrapolates them locally); they are sent along with any other change.
+CONTINUOUS_FIELDS = ("position",)
+
+
+class PlayerStateWatcher:
+    """
+    PT: Compara o estado do player com o último estado enviado e emite um evento
+        com os campos que mudaram e os nomes das transições detectadas.
+    EN: Compares the player state with the last state sent and emits an event
+        with the fields that changed and the names of the detected transitions.
+    """
+
+    def __init__(self, player, emit, interval=0.5):
+        """
+        Args:
+            player: PT: O Player observado. | EN: The watched Player.
+            emit (callable): PT: Função chamada com o dicionário de diferenças.
+                             EN: Function called with the dictionary of differences.
+            interval (float): PT: Intervalo máximo entre verificações, em segundos.
+                              EN: Maximum interval between checks, in seconds.
+        """
+        self.player = player
+        self.emit = emit
+        self.interval = interval
+        self._last_state = {}
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._last_state = self.player.get_status()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def poke(self):
+        """
+        PT: Pede uma verificação imediata (ex: logo após um comando do usuário).
+        EN: Requests an immediate check (e.g. right after a user command).
+        """
+        self._wakeup.set()
+
+    def current_state(self):
+        """
+        PT: Retorna o último estado completo conhecido, para novos clientes.
+        EN: Returns the last known full state, for newly connected clients.
+        """
+        with self._lock:
+            return dict(self._last_state)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.check()
+            except Exception as e:
+                log.error("Erro ao verificar o estado do player: %s / Error checking player state: %s", e, e)
+
+    def check(self):
+        """
+        PT: Lê o estado atual e emite as diferenças, se houver.
+        EN: Reads the current state and emits the differences, if any.
+        """
+        state = self.player.get_status()
+        with self._lock:
+            previous = self._last_state
+            changes = {key: value for key, value in state.items()
+                       if key not in CONTINUOUS_FIELDS and previous.get(key) != value}
+            if not changes:
+                return
+            self._last_state = state
+
+        for key in CONTINUOUS_FIELDS:
+            changes[key] = state.get(key)
+
+        changes["events"] = self._transitions(previous, state)
+        self.emit(changes)
+
+    @staticmethod
+    def _transitions(previous, state):
+        events = []
+        if state["current_song"] != previous.get("current_song"):
+            events.append("new_track")
+        elif previous.get("is_playing") and not state["is_playing"] and not state["is_paused"]:
+            events.append("track_end")
+        if state["is_paused"] != previous.get("is_paused"):
+            events.append("paused" if state["is_paused"] else "resumed")
+        if state["volume"] != previous.get("volume"):
+            events.append("volume")
+        return events
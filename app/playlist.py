@@ -0,0 +1,116 @@
+# PT: Este arquivo resolve os "cartões de coleção": um cartão pode apontar para uma música,
+#     para uma pasta dentro da pasta de músicas (álbum) ou para uma playlist .m3u/.m3u8.
+#     Em todos os casos o resultado é uma lista ordenada de caminhos de arquivos de áudio.
+# EN: This file resolves "collection cards": a card may point to a song, to a folder inside
+#     the music folder (album) or to an .m3u/.m3u8 playlist.
+#     In every case the result is an ordered list of audio file paths.
+
+import os
+
+AUDIO_EXTENSIONS = (".mp3",)
+PLAYLIST_EXTENSIONS = (".m3u", ".m3u8")
+
+
+def is_collection(music_folder, name):
+    """
+    PT: Indica se o nome aponta para um álbum (pasta) ou uma playlist, e não para uma música.
+    EN: Tells whether the name points to an album (folder) or a playlist, rather than a song.
+    """
+    lower = name.lower()
+    if lower.endswith(PLAYLIST_EXTENSIONS):
+        return True
+    if lower.endswith(AUDIO_EXTENSIONS):
+        return False
+    return os.path.isdir(os.path.join(music_folder, name))
+
+
+def resolve_tracks(music_folder, name):
+    """
+    PT: Retorna a lista de caminhos das faixas de uma música, álbum ou playlist.
+        Entradas que não existem ou que saem da pasta de músicas são ignoradas.
+    EN: Returns the list of track paths of a song, album or playlist.
+        Entries that do not exist or that point outside the music folder are ignored.
+    """
+    path = os.path.join(music_folder, name)
+    if name.lower().endswith(PLAYLIST_EXTENSIONS):
+        return _read_playlist(music_folder, path)
+    if os.path.isdir(path):
+        return _album_tracks(path)
+    return [path] if os.path.isfile(path) else []
+
+
+def _album_tracks(path):
+    try:
+        names = sorted(f for f in os.listdir(path) if f.lower().endswith(AUDIO_EXTENSIONS) and not f.startswith("."))
+    except OSError:
+        return []
+    return [os.path.join(path, f) for f in names]
+
+
+def _read_playlist(music_folder, path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+
+    # PT: .m3u8 é sempre UTF-8; .m3u antigos costumam ser latin-1.
+    # EN: .m3u8 is always UTF-8; older .m3u files are usually latin-1.
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = data.decode("latin-1")
+
+    root = os.path.realpath(music_folder)
+    base = os.path.dirname(path)
+    tracks = []
+    for line in text.splitlines():
+        entry = line.strip()
+        if not entry or entry.startswith("#") or "://" in entry:
+            continue
+        track = os.path.realpath(os.path.join(base, entry.replace("\\", "/")))
+        if os.path.commonpath([root, track]) != root:
+            continue
+        if track.lower().endswith(AUDIO_EXTENSIONS) and os.path.isfile(track):
+            tracks.append(track)
+    return tracks
+
+
+def list_collections(music_folder):
+    """
+    PT: Lista os álbuns (pastas) e playlists da pasta de músicas, com o número de faixas.
+    EN: Lists the albums (folders) and playlists of the music folder, with their track counts.
+    """
+    collections = []
+    try:
+        entries = sorted(os.scandir(music_folder), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return collections
+
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            kind = "album"
+        elif entry.name.lower().endswith(PLAYLIST_EXTENSIONS):
+            kind = "playlist"
+        else:
+            continue
+        tracks = resolve_tracks(music_folder, entry.name)
+        if tracks:
+            collections.append({"name": entry.name, "kind": kind, "tracks": len(tracks)})
+    return collections
+
+
+def collection_files(music_folder, name):
+    """
+    PT: Arquivos de um álbum ou playlist, relativos à pasta de músicas (com "/"): as faixas e,
+        no caso da playlist, o próprio .m3u. Usado pela exportação.
+    EN: Files of an album or playlist, relative to the music folder (with "/"): the tracks and,
+        for a playlist, the .m3u itself. Used by the export.
+    """
+    root = os.path.realpath(music_folder)
+    files = [name] if name.lower().endswith(PLAYLIST_EXTENSIONS) else []
+    for track in resolve_tracks(music_folder, name):
+        files.append(os.path.relpath(os.path.realpath(track), root).replace(os.sep, "/"))
+    return files
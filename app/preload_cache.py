@@ -0,0 +1,139 @@
+# PT: Este arquivo contém um cache em memória (LRU) com o conteúdo das músicas associadas
+#     a cartões. Assim, ao aproximar um cartão, o player carrega o áudio da RAM em vez de
+#     ler o arquivo do cartão SD, reduzindo o tempo até o som começar.
+# EN: This file contains an in-memory (LRU) cache with the contents of the songs associated
+#     with cards. When a card is scanned, the player loads the audio from RAM instead of
+#     reading the file from the SD card, reducing the time until sound starts.
+
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from app.blocking import run_native
+from app.log import get_logger
+
+log = get_logger("library")
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class PreloadCache:
+    """
+    PT: Cache LRU limitado por um orçamento de memória (em bytes).
+        As entradas são validadas pelo mtime e tamanho do arquivo, para que uma
+        música substituída com o mesmo nome não toque a versão antiga.
+    EN: LRU cache bounded by a memory budget (in bytes).
+        Entries are validated against the file's mtime and size, so that a song
+        replaced under the same name does not play the old version.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (stamp, data)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._warm_queue = []
+        self._warm_event = threading.Event()
+        self._warm_thread = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _stamp(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, path):
+        """
+        PT: Retorna um arquivo em memória (BytesIO) com o conteúdo da música, ou None.
+            Só consulta: uma falha não carrega nada, para que as faixas de álbuns e as tocadas
+            pela interface não tirem do cache as primeiras faixas dos cartões. O cache é
+            preenchido apenas por warm(), nas associações e na inicialização.
+        EN: Returns an in-memory file (BytesIO) with the song's contents, or None.
+            Lookup only: a miss loads nothing, so that album tracks and songs played from the
+            UI do not push the cards' first tracks out of the cache. The cache is only filled
+            by warm(), on associations and at startup.
+        """
+        try:
+            stamp = self._stamp(path)
+        except OSError:
+            stamp = None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return io.BytesIO(entry[1])
+            self.misses += 1
+        return None
+
+    def put(self, path):
+        """
+        PT: Lê o arquivo para a memória, removendo as entradas menos usadas se preciso.
+        EN: Reads the file into memory, evicting the least recently used entries if needed.
+        """
+        try:
+            stamp = self._stamp(path)
+            if stamp[1] > self.max_bytes:
+                return False
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == stamp:
+                    return True
+            data = run_native(_read_file, path)
+        except OSError as e:
+            log.warning("Erro ao pré-carregar '%s': %s / Error preloading '%s': %s", path, e, path, e)
+            return False
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= len(old[1])
+            while self._entries and self._size + len(data) > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+            self._entries[path] = (stamp, data)
+            self._size += len(data)
+        return True
+
+    def warm(self, paths):
+        """
+        PT: Agenda o pré-carregamento das músicas em uma thread de fundo.
+        EN: Schedules the songs to be preloaded in a background thread.
+        """
+        with self._lock:
+            self._warm_queue.extend(paths)
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self._warm_loop, daemon=True)
+                self._warm_thread.start()
+        self._warm_event.set()
+
+    def _warm_loop(self):
+        while True:
+            self._warm_event.wait()
+            with self._lock:
+                paths, self._warm_queue = self._warm_queue, []
+                self._warm_event.clear()
+            for path in paths:
+                self.put(path)
+
+    def stats(self):
+        """
+        PT: Retorna as estatísticas do cache (acertos, falhas, uso de memória).
+        EN: Returns the cache statistics (hits, misses, memory usage).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0
+            }
@@ -0,0 +1,378 @@
+# PT: Este arquivo replica as associações de cartões entre as jukeboxes da rede local.
+#     Cada jukebox mantém um registro de alterações versionado (um item por UID, com o relógio
+#     (lamport, nó) da última alteração) e busca nos pares apenas as alterações que ainda não
+#     viu. Em conflito, vence a alteração com o maior relógio (last-writer-wins). Os pares são
+#     encontrados por mDNS (zeroconf) ou listados em JUKEBOX_PEERS.
+# EN: This file replicates the card associations between the jukeboxes on the local network.
+#     Each jukebox keeps a versioned change log (one item per UID, with the (lamport, node)
+#     clock of the last change) and pulls from its peers only the changes it has not seen yet.
+#     On conflict, the change with the highest clock wins (last-writer-wins). Peers are found
+#     via mDNS (zeroconf) or listed in JUKEBOX_PEERS.
+
+import json
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+from app import metrics
+from app.tag_store import TOMBSTONE, TagStore
+from app.log import get_logger
+
+log = get_logger("replication")
+
+SERVICE_TYPE = "_jukebox-sync._tcp.local."
+CHANGES_PAGE_SIZE = 500
+
+CHANGES_APPLIED = metrics.counter("jukebox_replication_changes_applied", "Association changes pulled from peers and applied locally.")
+SYNC_ERRORS = metrics.counter("jukebox_replication_sync_errors", "Failed pulls from replication peers.")
+
+
+class ReplicationLog:
+    """
+    PT: Registro de alterações das associações, persistido em um arquivo de linhas JSON:
+        - ["#node", nó, log]: identificação desta jukebox e deste registro;
+        - [uid, música, lamport, nó, seq]: última alteração do UID (música vazia = remoção);
+        - ["#cursor", log, seq]: última seq de um par que já foi aplicada aqui.
+        A seq é local e cresce a cada alteração aceita; um par pede "tudo depois da seq N".
+        Como só a última alteração de cada UID é guardada, o registro nunca cresce além do
+        tamanho do baralho (mais as linhas ainda não compactadas).
+    EN: Change log of the associations, persisted to a file of JSON lines:
+        - ["#node", node, log]: identification of this jukebox and of this log;
+        - [uid, song, lamport, node, seq]: last change of the UID (empty song = removal);
+        - ["#cursor", log, seq]: last seq of a peer already applied here.
+        The seq is local and grows with every accepted change; a peer asks for "everything after seq N".
+        Since only the last change of each UID is kept, the log never grows beyond the size of
+        the deck (plus the lines not compacted yet).
+    """
+
+    def __init__(self, path, tag_store, node_id=None, compact_min_lines=1000, compact_ratio=2.0):
+        """
+        Args:
+            path (str): PT: Arquivo do registro. | EN: Log file.
+            tag_store (TagStore): PT: Associações replicadas. | EN: Replicated associations.
+            node_id (str): PT: Nome desta jukebox (padrão: gerado e salvo no registro).
+                           EN: Name of this jukebox (default: generated and saved in the log).
+        """
+        self.path = path
+        self.tag_store = tag_store
+        self.node_id = node_id
+        self.log_id = None
+        self.compact_min_lines = compact_min_lines
+        self.compact_ratio = compact_ratio
+        self.lamport = 0
+        self.seq = 0
+        self.cursors = {}
+        # PT: uid -> [música, lamport, nó, seq]; _by_seq fica em ordem de seq (ordem de inserção).
+        # EN: uid -> [song, lamport, node, seq]; _by_seq stays in seq order (insertion order).
+        self._entries = {}
+        self._by_seq = {}
+        self._lines = 0
+        self._lock = threading.RLock()
+        self.loaded = threading.Event()
+        tag_store.add_listener(self.on_local_change)
+
+    # --- Carregamento / Loading ---
+
+    def load(self):
+        """
+        PT: Lê o registro e o reconcilia com as tags atuais: o que mudou enquanto a replicação
+            estava desligada vira uma alteração local nova.
+        EN: Reads the log and reconciles it with the current tags: whatever changed while
+            replication was off becomes a new local change.
+        """
+        with self._lock:
+            header = self._read()
+            rewrite = header is None
+            if header is None:
+                header = [self.node_id or uuid.uuid4().hex[:12], uuid.uuid4().hex]
+            if self.node_id and self.node_id != header[0]:
+                rewrite = True
+            self.node_id = self.node_id or header[0]
+            self.log_id = header[1]
+
+            current = self.tag_store.items()
+            changes = [(uid, song) for uid, song in current.items()
+                       if uid not in self._entries or self._entries[uid][0] != song]
+            changes += [(uid, TOMBSTONE) for uid, entry in self._entries.items()
+                        if entry[0] != TOMBSTONE and uid not in current]
+            if rewrite:
+                self.compact()
+            self._record_local(changes)
+            self.loaded.set()
+        log.info("Nó '%s', %d itens, seq %d. / Node '%s', %d items, seq %d.",
+                 self.node_id, len(self._entries), self.seq, self.node_id, len(self._entries), self.seq)
+        return len(self._entries)
+
+    def _read(self):
+        header = None
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        with f:
+            for line in f:
+                # PT: Uma última linha incompleta (queda de energia) é ignorada.
+                # EN: A trailing incomplete line (power loss) is ignored.
+                if not line.endswith("\n"):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._lines += 1
+                if record[0] == "#node":
+                    header = record[1:3]
+                elif record[0] == "#cursor":
+                    self.cursors[record[1]] = record[2]
+                else:
+                    self._put(*record)
+        return header
+
+    # --- Registro / Log ---
+
+    def _put(self, uid, song, lamport, node, seq):
+        old = self._entries.get(uid)
+        if old is not None:
+            del self._by_seq[old[3]]
+        self._entries[uid] = [song, lamport, node, seq]
+        self._by_seq[seq] = uid
+        self.seq = max(self.seq, seq)
+        self.lamport = max(self.lamport, lamport)
+
+    def _record(self, records, cursors=()):
+        """
+        PT: Aplica e grava alterações (uid, música, lamport, nó) e cursores, com uma única escrita.
+        EN: Applies and writes changes (uid, song, lamport, node) and cursors, with a single write.
+        """
+        lines = []
+        for uid, song, lamport, node in records:
+            self.seq += 1
+            self._put(uid, song, lamport, node, self.seq)
+            lines.append([uid, song, lamport, node, self.seq])
+        for log_id, seq in cursors:
+            self.cursors[log_id] = seq
+            lines.append(["#cursor", log_id, seq])
+        if not lines:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+        self._lines += len(lines)
+        if self._lines > max(self.compact_min_lines, int((len(self._entries) + len(self.cursors)) * self.compact_ratio)):
+            self.compact()
+
+    def _record_local(self, changes):
+        if not changes:
+            return
+        self.lamport += 1
+        self._record([(uid, song, self.lamport, self.node_id) for uid, song in changes])
+
+    def compact(self):
+        """
+        PT: Reescreve o registro só com o estado atual, mantendo as seqs (os pares dependem delas).
+        EN: Rewrites the log with only the current state, keeping the seqs (peers depend on them).
+        """
+        with self._lock:
+            lines = [["#node", self.node_id, self.log_id]]
+            lines += [[uid] + self._entries[uid] for uid in self._by_seq.values()]
+            lines += [["#cursor", log_id, seq] for log_id, seq in self.cursors.items()]
+            TagStore._atomic_write(self.path, "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+            self._lines = len(lines)
+
+    def on_local_change(self, changes):
+        """
+        PT: Ouvinte do TagStore. Alterações que vieram de um par já estão no registro com o
+            mesmo valor e são ignoradas; as demais recebem um relógio novo.
+            O valor registrado é o que está no TagStore agora, já com a trava do registro, e não
+            o da notificação: um apply_remote pode ter gravado outro valor entre a escrita local
+            e este ouvinte, e o registro precisa continuar igual às tags.
+        EN: TagStore listener. Changes that came from a peer are already in the log with the
+            same value and are skipped; the others get a new clock.
+            The recorded value is the one in the TagStore now, already under the log lock, not
+            the notified one: an apply_remote may have written another value between the local
+            write and this listener, and the log must keep matching the tags.
+        """
+        with self._lock:
+            if not self.loaded.is_set():
+                # PT: O load() reconcilia o que mudar antes dele.
+                # EN: load() reconciles whatever changes before it.
+                return
+            current = {uid: self.tag_store.get(uid) or TOMBSTONE for uid, _ in changes}
+            self._record_local([(uid, song) for uid, song in current.items()
+                                if (self._entries.get(uid) or [TOMBSTONE])[0] != song])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def reset_cursor(self, log_id):
+        with self._lock:
+            self._record([], [(log_id, 0)])
+
+    # --- Troca com os pares / Exchange with peers ---
+
+    def changes_since(self, since, limit=CHANGES_PAGE_SIZE):
+        """
+        PT: Retorna as alterações com seq maior que `since`, em ordem, até `limit` itens.
+        EN: Returns the changes with a seq greater than `since`, in order, up to `limit` items.
+        """
+        with self._lock:
+            uids = []
+            for seq in reversed(self._by_seq):
+                if seq <= since:
+                    break
+                uids.append(self._by_seq[seq])
+            uids.reverse()
+            changes = [{"uid": uid, "song": self._entries[uid][0], "lamport": self._entries[uid][1],
+                        "node": self._entries[uid][2], "seq": self._entries[uid][3]} for uid in uids[:limit]]
+            return {"node": self.node_id, "log": self.log_id, "head": self.seq,
+                    "changes": changes, "more": len(uids) > limit}
+
+    def apply_remote(self, log_id, changes):
+        """
+        PT: Aplica as alterações de um par que vencem o relógio local, em uma única transação
+            no TagStore, e avança o cursor daquele par.
+        EN: Applies a peer's changes that beat the local clock, in a single TagStore
+            transaction, and advances that peer's cursor.
+
+        Returns:
+            int: PT: Alterações aceitas. | EN: Accepted changes.
+        """
+        with self._lock:
+            accepted = {}
+            for change in changes:
+                uid, clock = change["uid"], (change["lamport"], change["node"])
+                entry = self._entries.get(uid)
+                if entry is not None and (entry[1], entry[2]) >= clock:
+                    continue
+                accepted[uid] = (change["song"],) + clock
+            # PT: Primeiro o registro, depois as tags: o ouvinte então vê valores iguais e não os reenvia.
+            # EN: First the log, then the tags: the listener then sees equal values and does not resend them.
+            cursor = [(log_id, changes[-1]["seq"])] if changes else []
+            self._record([(uid,) + value for uid, value in accepted.items()], cursor)
+            if accepted:
+                self.tag_store.apply_batch(
+                    sets={uid: value[0] for uid, value in accepted.items() if value[0] != TOMBSTONE},
+                    deletes=[uid for uid, value in accepted.items() if value[0] == TOMBSTONE])
+                CHANGES_APPLIED.inc(len(accepted))
+            return len(accepted)
+
+
+class Replicator:
+    """
+    PT: Busca periodicamente as alterações de cada par (HTTP em /api/replication/changes) e as
+        aplica no ReplicationLog. Os pares vêm de JUKEBOX_PEERS ("host:porta,...") e do mDNS.
+    EN: Periodically pulls the changes of each peer (HTTP at /api/replication/changes) and
+        applies them to the ReplicationLog. Peers come from JUKEBOX_PEERS ("host:port,...") and mDNS.
+    """
+
+    def __init__(self, log, peers=(), interval=5.0, timeout=5.0):
+        self.log = log
+        self.static_peers = [peer for peer in peers if peer]
+        self.interval = interval
+        self.timeout = timeout
+        self.discovered = {}
+        self.peers = {}
+        self._wake = threading.Event()
+        self._browser = None
+
+    def start(self):
+        self.log.load()
+        threading.Thread(target=self._run, name="replication", daemon=True).start()
+
+    def sync_now(self):
+        self._wake.set()
+
+    def addresses(self):
+        return list(dict.fromkeys(self.static_peers + list(self.discovered.values())))
+
+    def _run(self):
+        while True:
+            for address in self.addresses():
+                self.sync_peer(address)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _fetch(self, address, since, limit=CHANGES_PAGE_SIZE):
+        query = urllib.parse.urlencode({"since": since, "limit": limit})
+        with urllib.request.urlopen(f"http://{address}/api/replication/changes?{query}", timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def sync_peer(self, address):
+        """
+        PT: Puxa de um par todas as alterações novas, página por página.
+        EN: Pulls all the new changes from a peer, page by page.
+
+        Returns:
+            int: PT: Alterações aceitas. | EN: Accepted changes.
+        """
+        state = self.peers.setdefault(address, {"node": None, "log": None, "applied": 0,
+                                                 "last_sync": None, "error": None})
+        applied = 0
+        try:
+            if state["log"] is None:
+                # PT: Primeiro contato: só descobre o registro do par para usar o cursor salvo.
+                # EN: First contact: only discovers the peer's log to use the saved cursor.
+                head = self._fetch(address, 0, limit=0)
+                state["node"], state["log"] = head["node"], head["log"]
+            while state["node"] != self.log.node_id:
+                since = self.log.cursors.get(state["log"], 0)
+                page = self._fetch(address, since)
+                if page["log"] != state["log"] or since > page["head"]:
+                    # PT: O par recriou o registro: recomeça do zero com o novo.
+                    # EN: The peer recreated its log: start over from zero with the new one.
+                    state["node"], state["log"] = page["node"], page["log"]
+                    if since > page["head"]:
+                        self.log.reset_cursor(page["log"])
+                    continue
+                applied += self.log.apply_remote(page["log"], page["changes"])
+                if not page["more"]:
+                    break
+            state["error"] = None
+        except (OSError, ValueError, KeyError) as e:
+            SYNC_ERRORS.inc()
+            state["error"] = str(e)
+        state["applied"] += applied
+        state["last_sync"] = time.time()
+        if applied:
+            log.info("%d alterações de %s. / %d changes from %s.", applied, address, applied, address)
+        return applied
+
+    # --- Descoberta por mDNS / mDNS discovery ---
+
+    def advertise(self, zeroconf, ip_address, port):
+        """
+        PT: Anuncia esta jukebox como par de replicação e passa a procurar as outras.
+        EN: Announces this jukebox as a replication peer and starts looking for the others.
+        """
+        from zeroconf import ServiceBrowser, ServiceInfo
+
+        self.log.loaded.wait()
+        info = ServiceInfo(
+            SERVICE_TYPE,
+            f"{self.log.node_id}.{SERVICE_TYPE}",
+            addresses=[socket.inet_aton(ip_address)],
+            port=port,
+            properties={"node": self.log.node_id},
+        )
+        zeroconf.register_service(info)
+        self._browser = ServiceBrowser(zeroconf, SERVICE_TYPE, handlers=[self._on_service_state_change])
+
+    def _on_service_state_change(self, zeroconf, service_type, name, state_change):
+        from zeroconf import ServiceStateChange
+
+        if state_change is ServiceStateChange.Removed:
+            self.discovered.pop(name, None)
+            return
+        info = zeroconf.get_service_info(service_type, name, timeout=3000)
+        if info is None or info.properties.get(b"node", b"").decode() == self.log.node_id:
+            return
+        addresses = info.parsed_addresses()
+        if addresses:
+            self.discovered[name] = f"{addresses[0]}:{info.port}"
+            self.sync_now()
+
+    def status(self):
+        return {"node": self.log.node_id, "log": self.log.log_id, "head": self.log.seq,
+                "items": len(self.log), "peers": self.peers}
@@ -0,0 +1,153 @@
+# PT: Este arquivo contém a camada de cache de respostas: traduções lidas uma única vez
+#     (recarregadas só quando o arquivo muda), arquivos estáticos pré-comprimidos com
+#     ETag pelo conteúdo, e compressão gzip/brotli das respostas JSON.
+# EN: This file contains the response cache layer: translations parsed only once
+#     (reloaded only when the file changes), pre-compressed static files with
+#     content-hash ETags, and gzip/brotli compression of JSON responses.
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# PT: brotli é opcional; sem ele, apenas gzip é usado.
+# EN: brotli is optional; without it, only gzip is used.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/css", "application/javascript", "text/plain"}
+MIN_COMPRESS_SIZE = 512
+
+
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def choose_encoding(accept_encoding):
+    """
+    PT: Escolhe a melhor codificação aceita pelo cliente ("br", "gzip" ou None).
+    EN: Picks the best encoding accepted by the client ("br", "gzip" or None).
+    """
+    if brotli is not None and accept_encoding["br"]:
+        return "br"
+    if accept_encoding["gzip"]:
+        return "gzip"
+    return None
+
+
+class CachedBody:
+    """
+    PT: Um conteúdo com o seu ETag e as versões comprimidas, criadas sob demanda uma única vez.
+    EN: A body with its ETag and compressed versions, created on demand only once.
+    """
+
+    def __init__(self, data, mimetype):
+        self.data = data
+        self.mimetype = mimetype
+        self.etag = content_hash(data)
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        """
+        PT: Retorna (bytes, codificação) para a codificação pedida.
+        EN: Returns (bytes, encoding) for the requested encoding.
+        """
+        if encoding is None or len(self.data) < MIN_COMPRESS_SIZE:
+            return self.data, None
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.data, encoding)
+        return body, encoding
+
+
+class FileCache:
+    """
+    PT: Cache de arquivos por caminho, revalidado pelo mtime e tamanho a cada acesso.
+    EN: Per-path file cache, revalidated against mtime and size on each access.
+    """
+
+    def __init__(self, loader=None):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._loader = loader or (lambda data, path: data)
+
+    def get(self, path, mimetype=None):
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+
+        with open(path, "rb") as f:
+            value = self._loader(f.read(), path)
+        if mimetype is not None:
+            value = CachedBody(value, mimetype)
+        with self._lock:
+            self._entries[path] = (stamp, value)
+        return value
+
+
+class TranslationsCache:
+    """
+    PT: Traduções lidas e serializadas uma vez por idioma; recarregadas quando o mtime muda.
+    EN: Translations parsed and serialized once per language; reloaded when the mtime changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._files = FileCache(loader=self._parse)
+
+    @staticmethod
+    def _parse(data, path):
+        translations = json.loads(data.decode("utf-8"))
+        bodies = {None: CachedBody(json.dumps(translations, ensure_ascii=False).encode("utf-8"), "application/json")}
+        for lang, strings in translations.items():
+            bodies[lang] = CachedBody(json.dumps({lang: strings}, ensure_ascii=False).encode("utf-8"), "application/json")
+        return bodies
+
+    def get(self, lang=None):
+        """
+        PT: Retorna o CachedBody com todas as traduções, ou só as do idioma pedido (ou None).
+        EN: Returns the CachedBody with all translations, or only the requested language's (or None).
+        """
+        return self._files.get(self.path).get(lang)
+
+
+class CompressedResponseCache:
+    """
+    PT: Guarda as últimas respostas JSON comprimidas, indexadas pelo ETag, para que a mesma
+        versão (ex: da biblioteca) não seja comprimida de novo a cada requisição.
+    EN: Keeps the latest compressed JSON responses, keyed by ETag, so that the same version
+        (e.g. of the library) is not compressed again on every request.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compress(self, key, data, encoding):
+        if key is None:
+            return compress(data, encoding)
+        with self._lock:
+            body = self._entries.get((key, encoding))
+            if body is not None:
+                self._entries.move_to_end((key, encoding))
+                return body
+        body = compress(data, encoding)
+        with self._lock:
+            self._entries[(key, encoding)] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
@@ -7,6 +7,111 @@
 
 import time
 import atexit
+import threading
+
+from app import metrics
+from app.log import get_logger
+
+# PT: Valores padrão do agendamento de leitura e do debounce, em segundos.
+# EN: Default polling schedule and debounce values, in seconds.
+FAST_POLL_INTERVAL = 0.03
+IDLE_POLL_INTERVAL = 0.3
+ACTIVE_WINDOW = 10.0
+DEBOUNCE_SECONDS = 1.0
+
+POLL_SECONDS = metrics.histogram(
+    "jukebox_rfid_poll_seconds", "Duration of a single RFID reader poll.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+log = get_logger("rfid")
+
+
+class PollScheduler:
+    """
+    PT: Decide o intervalo entre leituras do leitor. Logo após uma leitura o intervalo
+        é curto (resposta rápida); sem atividade, ele cresce gradualmente até o intervalo
+        ocioso (menos uso de CPU). Também guarda estatísticas de duração de cada leitura.
+    EN: Decides the interval between reader polls. Right after a scan the interval is
+        short (fast response); without activity it grows gradually up to the idle
+        interval (less CPU usage). It also keeps per-poll duration statistics.
+    """
+
+    def __init__(self, fast_interval=FAST_POLL_INTERVAL, idle_interval=IDLE_POLL_INTERVAL,
+                 active_window=ACTIVE_WINDOW, backoff=1.5):
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.active_window = active_window
+        self.backoff = backoff
+        self._interval = fast_interval
+        self._last_activity = time.monotonic()
+        self.polls = 0
+        self._total_duration = 0.0
+        self._max_duration = 0.0
+        self._last_duration = 0.0
+
+    def mark_activity(self):
+        self._last_activity = time.monotonic()
+        self._interval = self.fast_interval
+
+    def next_interval(self):
+        if time.monotonic() - self._last_activity < self.active_window:
+            self._interval = self.fast_interval
+        else:
+            self._interval = min(self.idle_interval, self._interval * self.backoff)
+        return self._interval
+
+    def record(self, duration):
+        POLL_SECONDS.observe(duration)
+        self.polls += 1
+        self._total_duration += duration
+        self._last_duration = duration
+        if duration > self._max_duration:
+            self._max_duration = duration
+
+    def stats(self):
+        return {
+            "polls": self.polls,
+            "avg_poll_ms": (self._total_duration / self.polls * 1000) if self.polls else 0.0,
+            "max_poll_ms": self._max_duration * 1000,
+            "last_poll_ms": self._last_duration * 1000,
+            "interval_ms": self._interval * 1000
+        }
+
+
+class ScanDebouncer:
+    """
+    PT: Suprime leituras repetidas do mesmo cartão. Enquanto o cartão continuar sendo
+        visto dentro da janela de debounce, ele é considerado "ainda presente" e não
+        dispara de novo; só volta a disparar depois de ficar ausente por mais tempo que a janela.
+    EN: Suppresses repeated reads of the same card. While the card keeps being seen
+        within the debounce window it is considered "still present" and does not trigger
+        again; it only triggers again after being absent for longer than the window.
+    """
+
+    def __init__(self, debounce_seconds=DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self._last_seen = {}
+        self.suppressed = 0
+
+    def accept(self, uid, now=None):
+        """
+        PT: Retorna True se a leitura é uma nova apresentação do cartão.
+        EN: Returns True if the read is a new presentation of the card.
+        """
+        now = time.monotonic() if now is None else now
+        last = self._last_seen.get(uid)
+        self._last_seen[uid] = now
+
+        # PT: Esquece cartões que já saíram da janela para o dicionário não crescer.
+        # EN: Forgets cards that already left the window so the dict does not grow.
+        if len(self._last_seen) > 32:
+            self._last_seen = {k: t for k, t in self._last_seen.items() if now - t <= self.debounce_seconds}
+
+        if last is not None and now - last <= self.debounce_seconds:
+            self.suppressed += 1
+            return False
+        return True
+
 
 # PT: Tenta importar as bibliotecas específicas do Raspberry Pi para detectar o ambiente.
 # EN: Tries to import Raspberry Pi-specific libraries to detect the environment.
@@ -27,22 +132,33 @@ if IS_RASPBERRY_PI:
             It initializes the reader once and ensures the GPIO pins are
             cleaned up correctly when the program exits.
         """
-        def __init__(self):
+        def __init__(self, scheduler=None, debouncer=None, bus=0, device=0, pin_rst=-1):
             """
             PT: Inicializa o leitor MFRC522 e registra a função de limpeza
                 para ser chamada na saída do programa.
             EN: Initializes the MFRC522 reader and registers the cleanup
                 function to be called on program exit.
+
+            Args:
+                bus (int): PT: Barramento SPI. | EN: SPI bus.
+                device (int): PT: Chip-select SPI (CE0 = 0, CE1 = 1). | EN: SPI chip-select (CE0 = 0, CE1 = 1).
+                pin_rst (int): PT: Pino de reset (-1 = padrão da biblioteca). | EN: Reset pin (-1 = library default).
             """
+            self.scheduler = scheduler or PollScheduler()
+            self.debouncer = debouncer or ScanDebouncer()
+            # PT: Instante (perf_counter) em que o último UID foi lido.
+            # EN: Instant (perf_counter) at which the last UID was read.
+            self.last_emit_time = None
             try:
-                self.reader = MFRC522()
-                print("Leitor RFID inicializado com sucesso. / RFID reader initialized successfully.")
+                self.reader = MFRC522(bus=bus, device=device, pin_rst=pin_rst)
+                log.info("Leitor RFID inicializado com sucesso (SPI %d.%d). / RFID reader initialized successfully (SPI %d.%d).",
+                         bus, device, bus, device)
                 # PT: Registra a função de limpeza para ser chamada automaticamente na saída
                 # EN: Registers the cleanup function to be called automatically on exit
                 atexit.register(self.cleanup)
             except Exception as e:
-                print(f"Falha ao inicializar o leitor RFID: {e}")
-                print("Isso pode acontecer se o programa não estiver rodando em um Raspberry Pi ou se a interface SPI não estiver habilitada.")
+                log.error("Falha ao inicializar o leitor RFID: %s. Isso pode acontecer se o programa não estiver rodando "
+                          "em um Raspberry Pi ou se a interface SPI não estiver habilitada.", e)
                 self.reader = None
 
 
@@ -61,49 +177,81 @@ if IS_RASPBERRY_PI:
                 time.sleep(1) # Avoid busy-looping if reader failed to init
                 return None
 
-            # PT: Loop para detectar o cartão
-            # EN: Loop to detect the card
+            # PT: Loop para detectar o cartão. O intervalo entre leituras é adaptativo
+            #     e leituras repetidas do mesmo cartão são ignoradas.
+            # EN: Loop to detect the card. The interval between polls is adaptive
+            #     and repeated reads of the same card are ignored.
             while True:
-                # PT: MFRC522_Request procura por cartões
-                # EN: MFRC522_Request scans for cards
-                (status, TagType) = self.reader.MFRC522_Request(self.reader.PICC_REQIDL)
+                start = time.perf_counter()
+                uid = self._poll_once()
+                self.scheduler.record(time.perf_counter() - start)
 
-                if status == self.reader.MI_OK:
-                    # PT: MFRC522_Anticoll obtém o UID do cartão
-                    # EN: MFRC522_Anticoll gets the card's UID
-                    (status, uid_bytes) = self.reader.MFRC522_Anticoll()
+                if uid and self.debouncer.accept(uid):
+                    self.scheduler.mark_activity()
+                    self.last_emit_time = time.perf_counter()
+                    return uid
+
+                time.sleep(self.scheduler.next_interval())
 
-                    if status == self.reader.MI_OK:
-                        # PT: Converte o UID de bytes para uma string hifenizada
-                        # EN: Converts the UID from bytes to a hyphenated string
-                        uid = "-".join(map(str, uid_bytes))
-                        return uid
+        def _poll_once(self):
+            """
+            PT: Faz uma única tentativa de leitura. Retorna o UID ou None.
+            EN: Performs a single read attempt. Returns the UID or None.
+            """
+            # PT: MFRC522_Request procura por cartões
+            # EN: MFRC522_Request scans for cards
+            (status, TagType) = self.reader.MFRC522_Request(self.reader.PICC_REQIDL)
+
+            if status == self.reader.MI_OK:
+                # PT: MFRC522_Anticoll obtém o UID do cartão
+                # EN: MFRC522_Anticoll gets the card's UID
+                (status, uid_bytes) = self.reader.MFRC522_Anticoll()
+
+                if status == self.reader.MI_OK:
+                    # PT: Converte o UID de bytes para uma string hifenizada
+                    # EN: Converts the UID from bytes to a hyphenated string
+                    return "-".join(map(str, uid_bytes))
+            return None
 
-                # PT: Pequena pausa para não sobrecarregar a CPU
-                # EN: Small pause to avoid overloading the CPU
-                time.sleep(0.2)
+        def poll_stats(self):
+            """
+            PT: Retorna as estatísticas de leitura (duração das leituras, intervalo atual, leituras suprimidas).
+            EN: Returns the polling statistics (poll durations, current interval, suppressed reads).
+            """
+            stats = self.scheduler.stats()
+            stats["suppressed_reads"] = self.debouncer.suppressed
+            return stats
 
         def cleanup(self):
             """
             PT: Libera os recursos do GPIO.
             EN: Releases GPIO resources.
             """
-            print("Limpando pinos GPIO... / Cleaning up GPIO pins...")
+            log.info("Limpando pinos GPIO... / Cleaning up GPIO pins...")
             GPIO.cleanup()
 
 else:
     # PT: Define uma classe "mock" que simula o leitor RFID quando não está em um Raspberry Pi.
     # EN: Defines a "mock" class that simulates the RFID reader when not on a Raspberry Pi.
     class RFIDReader:
-        def __init__(self):
+        def __init__(self, scheduler=None, debouncer=None, bus=0, device=0, pin_rst=-1):
             """
             PT: Inicialização da classe mock. Não faz nada.
             EN: Mock class initialization. Does nothing.
             """
-            print("AVISO: Leitor RFID não está em um Raspberry Pi. Usando leitor mock.")
-            print("WARNING: RFID reader is not on a Raspberry Pi. Using mock reader.")
+            log.warning("Leitor RFID não está em um Raspberry Pi. Usando leitor mock. / "
+                        "RFID reader is not on a Raspberry Pi. Using mock reader.")
             self.reader = None
 
+        def poll_stats(self):
+            """
+            PT: O leitor mock não faz leituras; retorna estatísticas vazias.
+            EN: The mock reader does not poll; returns empty statistics.
+            """
+            stats = PollScheduler().stats()
+            stats["suppressed_reads"] = 0
+            return stats
+
         def read_uid(self):
             """
             PT: Simula a leitura de um cartão. Bloqueia para sempre para evitar que o
@@ -124,6 +272,139 @@ else:
             """
             pass
 
+def parse_reader_specs(text):
+    """
+    PT: Lê a configuração de vários leitores, no formato "id:bus:device[:pin_rst]" separado
+        por vírgulas (ex: "sala:0:0:25,quarto:0:1:24"). Retorna uma lista de
+        (id, {"bus", "device", "pin_rst"}) na ordem dada.
+    EN: Parses the configuration of several readers, in the comma-separated
+        "id:bus:device[:pin_rst]" format (e.g. "living:0:0:25,bedroom:0:1:24"). Returns a list
+        of (id, {"bus", "device", "pin_rst"}) in the given order.
+    """
+    specs = []
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.split(":")
+        if len(parts) not in (3, 4):
+            raise ValueError(f"Invalid RFID reader spec '{item}' (expected id:bus:device[:pin_rst])")
+        reader_id = parts[0]
+        if any(reader_id == existing for existing, _ in specs):
+            raise ValueError(f"Duplicate RFID reader id '{reader_id}'")
+        specs.append((reader_id, {
+            "bus": int(parts[1]),
+            "device": int(parts[2]),
+            "pin_rst": int(parts[3]) if len(parts) == 4 else -1
+        }))
+    return specs
+
+
+class ReplayRFIDReader:
+    """
+    PT: Leitor que reproduz UIDs de um roteiro (arquivo ou gerador), sem hardware.
+        Cada evento é um par (atraso_em_segundos, uid) ou apenas um uid, que então
+        usa o intervalo 1/rate. Serve para testar e medir o pipeline do listener.
+    EN: Reader that replays UIDs from a script (file or generator), without hardware.
+        Each event is a (delay_in_seconds, uid) pair or just a uid, which then uses
+        the 1/rate interval. Used to exercise and measure the listener pipeline.
+    """
+
+    def __init__(self, events, rate=10.0, speed=1.0, debouncer=None):
+        """
+        Args:
+            events (iterable): PT: Pares (atraso, uid) ou UIDs. | EN: (delay, uid) pairs or UIDs.
+            rate (float): PT: Leituras por segundo para eventos sem atraso.
+                          EN: Scans per second for events without a delay.
+            speed (float): PT: Multiplicador de velocidade do roteiro. | EN: Script speed multiplier.
+            debouncer (ScanDebouncer): PT: Debounce opcional, como no leitor real.
+                                       EN: Optional debounce, as in the real reader.
+        """
+        self.reader = None
+        self._events = iter(events)
+        self.default_delay = 1.0 / rate if rate else 0.0
+        self.speed = speed
+        self.debouncer = debouncer
+        self.scheduler = PollScheduler()
+        # PT: Instante (perf_counter) em que o roteiro apresentou o último UID entregue. Os atrasos
+        #     contam a partir do evento anterior no roteiro, e não de quando ele foi entregue:
+        #     um leitor atrasado (ex: sem CPU) entrega depois, mas com o instante original.
+        # EN: Instant (perf_counter) at which the script presented the last delivered UID. Delays
+        #     count from the previous event in the script, not from when it was delivered: a late
+        #     reader (e.g. starved of CPU) delivers later, but with the original instant.
+        self.last_emit_time = None
+        self._due = None
+        self.emitted = 0
+        self.finished = threading.Event()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        PT: Cria o leitor a partir de um arquivo de roteiro. Cada linha contém
+            "<atraso> <uid>" ou apenas "<uid>"; linhas iniciadas com "#" são ignoradas.
+        EN: Creates the reader from a script file. Each line contains
+            "<delay> <uid>" or just "<uid>"; lines starting with "#" are ignored.
+        """
+        return cls(load_trace(path), **kwargs)
+
+    def read_uid(self):
+        """
+        PT: Espera o atraso do próximo evento e retorna o seu UID. Quando o roteiro
+            termina, comporta-se como um leitor sem cartões.
+        EN: Waits for the next event's delay and returns its UID. When the script
+            ends, it behaves like a reader with no cards.
+        """
+        while True:
+            try:
+                event = next(self._events)
+            except StopIteration:
+                self.finished.set()
+                time.sleep(1)
+                return None
+
+            if isinstance(event, str):
+                delay, uid = self.default_delay, event
+            else:
+                delay, uid = event
+            now = time.perf_counter()
+            self._due = (self._due if self._due is not None else now) + max(0.0, delay) / self.speed
+            if self._due > now:
+                time.sleep(self._due - now)
+
+            start = time.perf_counter()
+            accepted = self.debouncer is None or self.debouncer.accept(uid)
+            self.scheduler.record(time.perf_counter() - start)
+            if accepted:
+                self.emitted += 1
+                self.last_emit_time = self._due
+                return uid
+
+    def poll_stats(self):
+        stats = self.scheduler.stats()
+        stats["suppressed_reads"] = self.debouncer.suppressed if self.debouncer else 0
+        return stats
+
+    def cleanup(self):
+        pass
+
+
+def load_trace(path):
+    """
+    PT: Lê um arquivo de roteiro e gera os eventos (atraso, uid) para o ReplayRFIDReader.
+    EN: Reads a script file and yields the (delay, uid) events for ReplayRFIDReader.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            if len(parts) == 1:
+                yield parts[0]
+            else:
+                yield float(parts[0]), parts[1]
+
+
 # PT: O código abaixo serve para testar este módulo de forma independente.
 # EN: The code below is for testing this module independently.
 if __name__ == "__main__":
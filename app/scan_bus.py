@@ -0,0 +1,137 @@
+# PT: Este arquivo junta as leituras de vários leitores RFID em um único barramento.
+#     Cada leitor é consultado por sua própria thread leve, que publica eventos
+#     (leitor, UID, instante) em uma fila limitada; um único despachante consome a fila
+#     e encaminha cada leitura para a ação configurada para aquele leitor.
+#     Nos modos eventlet/gevent, a espera pelo cartão (SPI e intervalos entre leituras) roda
+#     em uma thread do sistema (run_native): nem o hub nem uma requisição pesada a atrasam.
+# EN: This file merges the scans of several RFID readers into a single bus.
+#     Each reader is polled by its own lightweight thread, which publishes events
+#     (reader, UID, timestamp) to a bounded queue; a single dispatcher consumes the queue
+#     and routes each scan to the action configured for that reader.
+#     In eventlet/gevent modes, waiting for the card (SPI and the intervals between polls) runs
+#     on an OS thread (run_native): neither the hub nor a heavy request delays it.
+
+import threading
+import time
+from collections import deque, namedtuple
+
+from app.blocking import run_native
+from app.log import get_logger
+
+log = get_logger("rfid")
+
+ScanEvent = namedtuple("ScanEvent", ["reader_id", "uid", "ts"])
+
+
+class ScanBus:
+    """
+    PT: Fila limitada de ScanEvent. Se ela encher (despachante travado), a leitura mais
+        antiga é descartada: o cartão mais recente é o que o usuário espera ouvir.
+    EN: Bounded queue of ScanEvent. If it fills up (stalled dispatcher), the oldest scan
+        is dropped: the most recent card is the one the user expects to hear.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._events = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self.readers = {}
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, reader_id, uid, ts=None):
+        event = ScanEvent(reader_id, uid, ts if ts is not None else time.perf_counter())
+        with self._condition:
+            if len(self._events) == self.maxsize:
+                self.dropped += 1
+            self._events.append(event)
+            self.published += 1
+            self._condition.notify()
+        return event
+
+    def get(self, timeout=None):
+        """
+        PT: Retorna o próximo evento, ou None se o tempo acabar.
+        EN: Returns the next event, or None on timeout.
+        """
+        with self._condition:
+            if not self._events and not self._condition.wait_for(lambda: self._events, timeout):
+                return None
+            return self._events.popleft()
+
+    def add_reader(self, reader_id, reader):
+        """
+        PT: Inicia a thread que consulta o leitor e publica as suas leituras no barramento.
+        EN: Starts the thread that polls the reader and publishes its scans to the bus.
+        """
+        self.readers[reader_id] = reader
+        thread = threading.Thread(target=self._poll_reader, args=(reader_id, reader),
+                                  name=f"rfid-{reader_id}", daemon=True)
+        thread.start()
+        return thread
+
+    def _poll_reader(self, reader_id, reader):
+        log.info("Thread do leitor '%s' iniciada. / Reader '%s' thread started.", reader_id, reader_id)
+        while True:
+            try:
+                uid = run_native(reader.read_uid)
+            except Exception as e:
+                log.error("Erro no leitor RFID '%s': %s / RFID reader '%s' error: %s", reader_id, e, reader_id, e)
+                time.sleep(1)
+                continue
+            if uid:
+                # PT: O instante é o da leitura no leitor, não o da publicação: a espera pelo hub
+                #     entre as duas também conta na latência até o play.
+                # EN: The timestamp is that of the read in the reader, not of the publish: waiting
+                #     for the hub in between also counts in the latency until play.
+                self.publish(reader_id, uid, getattr(reader, "last_emit_time", None))
+
+    def stats(self):
+        with self._condition:
+            pending = len(self._events)
+        readers = {}
+        for reader_id, reader in self.readers.items():
+            poll_stats = getattr(reader, "poll_stats", None)
+            readers[reader_id] = poll_stats() if poll_stats else {}
+        return {"published": self.published, "dropped": self.dropped, "pending": pending, "readers": readers}
+
+
+class ScanDispatcher:
+    """
+    PT: Consome o barramento em uma única thread e chama a ação do leitor de cada evento
+        (ou a ação padrão). Assim nenhuma thread de leitor toca no player diretamente.
+    EN: Consumes the bus on a single thread and calls the action of each event's reader
+        (or the default action). This way no reader thread touches the player directly.
+    """
+
+    def __init__(self, bus, default_action):
+        """
+        Args:
+            bus (ScanBus): PT: Barramento de leituras. | EN: Scan bus.
+            default_action (callable): PT: Chamada com o ScanEvent quando o leitor não tem rota própria.
+                                       EN: Called with the ScanEvent when the reader has no route of its own.
+        """
+        self.bus = bus
+        self.default_action = default_action
+        self.routes = {}
+        self.dispatched = 0
+
+    def route(self, reader_id, action):
+        self.routes[reader_id] = action
+
+    def start(self):
+        threading.Thread(target=self._run, name="scan-dispatcher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            event = self.bus.get()
+            if event is not None:
+                self.dispatch(event)
+
+    def dispatch(self, event):
+        action = self.routes.get(event.reader_id, self.default_action)
+        try:
+            action(event)
+        except Exception as e:
+            log.error("Erro ao processar a leitura %s: %s / Error handling scan %s: %s", event, e, event, e)
+        self.dispatched += 1
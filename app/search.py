@@ -0,0 +1,393 @@
+# PT: Este arquivo contém o índice de busca da biblioteca (nomes de arquivo e, quando houver,
+#     título/artista/álbum do catálogo). Os inícios de palavra usam um vocabulário ordenado
+#     (bisect) com a lista de músicas de cada palavra. Para substrings, as palavras sem a primeira
+#     letra ficam em uma única string, uma linha por música, varrida com str.find (em C) só quando
+#     o termo tem MIN_SUBSTRING_LENGTH letras ou mais: cada ocorrência ali é um resultado que não
+#     é início de palavra. Um bisect nos inícios das linhas diz a qual música cada ocorrência
+#     pertence. Isso ocupa poucos MB mesmo com 100 mil faixas, o que importa no Raspberry Pi, e
+#     as alterações são aplicadas em lote na próxima busca.
+# EN: This file contains the library search index (filenames and, when available, title/artist/
+#     album from the catalog). Word starts use a sorted vocabulary (bisect) with the list of songs
+#     of each word. For substrings, the words without their first letter live in a single string,
+#     one line per song, scanned with str.find (in C) only when the term has MIN_SUBSTRING_LENGTH
+#     letters or more: every occurrence there is a match that is not a word start. A bisect over
+#     the line starts tells which song each occurrence belongs to. This takes a few MB even with
+#     100k tracks, which matters on the Raspberry Pi, and changes are applied in batches on the
+#     next search.
+
+import base64
+import bisect
+import json
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from app.catalog import METADATA_FIELDS
+
+FILTER_UNASSIGNED = "unassigned"
+FILTER_ORPHANED = "orphaned"
+FILTERS = (FILTER_UNASSIGNED, FILTER_ORPHANED)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# PT: Termos mais curtos só casam com inícios de palavra (a busca enquanto se digita não varre tudo).
+# EN: Shorter terms only match word starts (search-as-you-type does not scan everything).
+MIN_SUBSTRING_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    """
+    PT: Minúsculas, sem acentos, só letras e números separados por um espaço.
+    EN: Lowercase, without accents, only letters and digits separated by a single space.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    PT: Lê um cursor de paginação. Só aceita a chave de ordenação [nível, nome casefold, nome];
+        qualquer outra coisa é ValueError (400), e não um TypeError no bisect.
+    EN: Reads a pagination cursor. Only the sort key [tier, casefolded name, name] is accepted;
+        anything else is a ValueError (400), rather than a TypeError in the bisect.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    if (not isinstance(key, list) or len(key) != 3 or type(key[0]) is not int
+            or not isinstance(key[1], str) or not isinstance(key[2], str)):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return tuple(key)
+
+
+class SearchIndex:
+    """
+    PT: Índice de busca por prefixo de palavra e por substring, com ranking:
+        0 = o nome começa com a busca, 1 = todos os termos são início de palavra, 2 = substring.
+        Os resultados ordenados da última busca ficam em cache, então as próximas páginas
+        (cursor) custam só um bisect. A busca em si roda fora do lock, sobre uma cópia das
+        referências do índice, então várias buscas rodam ao mesmo tempo.
+    EN: Word-prefix and substring search index, with ranking:
+        0 = the name starts with the query, 1 = every term is a word prefix, 2 = substring.
+        The sorted results of recent queries are cached, so the following pages (cursor)
+        only cost a bisect. The search itself runs outside the lock, on a copy of the index
+        references, so several searches run at once.
+    """
+
+    def __init__(self, metadata=None, tag_store=None, is_known=None, cache_size=16):
+        """
+        Args:
+            metadata (callable): PT: nome -> dict de metadados ou None. | EN: name -> metadata dict or None.
+            tag_store (TagStore): PT: Associações, para os filtros. | EN: Associations, for the filters.
+            is_known (callable): PT: Diz se o alvo de um cartão existe (música ou coleção).
+                                 EN: Tells whether a card's target exists (song or collection).
+        """
+        self.metadata = metadata
+        self.tag_store = tag_store
+        self.is_known = is_known
+        self.cache_size = cache_size
+        self.version = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._results = OrderedDict()
+        self._cards = (None, {})
+        self._reset()
+
+    def _reset(self):
+        self._haystack = ""
+        self._starts = []
+        self._names = []
+        self._keys = []
+        self._doc_of = {}
+        self._dead = set()
+        # PT: Vocabulário ordenado e, para cada palavra, as músicas que a contêm.
+        # EN: Sorted vocabulary and, for each word, the songs that contain it.
+        self._vocab = []
+        self._postings = {}
+        # PT: As palavras sem a primeira letra, para as substrings.
+        # EN: The words without their first letter, for substrings.
+        self._tails = ""
+        self._tail_starts = []
+
+    # --- Atualização / Updating ---
+
+    def on_library_change(self, kind, name):
+        """
+        PT: Ouvinte do LibraryIndex. A alteração só é aplicada na próxima busca (em lote).
+        EN: LibraryIndex listener. The change is only applied on the next search (in a batch).
+        """
+        with self._lock:
+            self._pending[name] = kind != "removed"
+
+    def on_catalog_change(self, names):
+        # PT: Metadados novos: a linha da música é refeita (se ela está no índice).
+        # EN: New metadata: the song's line is rebuilt (if the song is in the index).
+        with self._lock:
+            for name in names:
+                if name in self._doc_of or self._pending.get(name):
+                    self._pending[name] = True
+
+    def rebuild(self, names):
+        """
+        PT: Reconstrói o índice inteiro com os nomes dados.
+        EN: Rebuilds the whole index with the given names.
+        """
+        with self._lock:
+            self._pending = {}
+            self._reset()
+            self._add(names)
+            self._changed()
+
+    def _text(self, name):
+        fields = [os.path.splitext(name)[0]]
+        meta = self.metadata(name) if self.metadata else None
+        if meta:
+            fields += [str(meta[key]) for key in METADATA_FIELDS[:3] if meta.get(key)]
+        return normalize(" ".join(fields))
+
+    def _add(self, names):
+        lines, tails = [], []
+        offset = len(self._haystack)
+        tail_offset = len(self._tails)
+        postings = self._postings
+        new_words = []
+        for name in names:
+            text = self._text(name)
+            # PT: O espaço inicial faz " termo" casar só com inícios de palavra.
+            # EN: The leading space makes " term" only match word starts.
+            line = "\n " + text + " "
+            words = text.split()
+            tail = "\n" + " ".join(word[1:] for word in words)
+            doc = len(self._names)
+            for word in set(words):
+                docs = postings.get(word)
+                if docs is None:
+                    docs = postings[word] = array("I")
+                    new_words.append(word)
+                docs.append(doc)
+            self._tail_starts.append(tail_offset)
+            tail_offset += len(tail)
+            tails.append(tail)
+            self._doc_of[name] = doc
+            self._names.append(name)
+            self._keys.append((name.casefold(), name))
+            self._starts.append(offset)
+            offset += len(line)
+            lines.append(line)
+        self._haystack += "".join(lines)
+        self._tails += "".join(tails)
+        if new_words:
+            # PT: Uma lista nova: buscas em andamento continuam com a anterior.
+            # EN: A new list: searches in progress keep the previous one.
+            if len(new_words) < 100:
+                vocab = self._vocab.copy()
+                for word in new_words:
+                    bisect.insort(vocab, word)
+            else:
+                vocab = sorted(self._vocab + new_words)
+            self._vocab = vocab
+
+    def _apply_pending(self):
+        # PT: Deve ser chamado com _lock. | EN: Must be called with _lock held.
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for name in pending:
+            doc = self._doc_of.pop(name, None)
+            if doc is not None:
+                self._dead.add(doc)
+        added = [name for name, present in pending.items() if present]
+        if len(self._dead) > max(1000, len(self._names) // 4):
+            # PT: Muitas linhas mortas: reconstrói só com as vivas.
+            # EN: Too many dead lines: rebuild with only the live ones.
+            live = list(self._doc_of)
+            self._reset()
+            self._add(live + added)
+        else:
+            self._add(added)
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._results.clear()
+
+    def __len__(self):
+        with self._lock:
+            self._apply_pending()
+            return len(self._doc_of)
+
+    # --- Busca / Searching ---
+
+    def _snapshot(self):
+        # PT: Deve ser chamado com _lock. Listas e arrays só crescem e o texto é imutável, então
+        #     as referências (com os tamanhos de agora) continuam válidas fora do lock.
+        # EN: Must be called with _lock held. Lists and arrays only grow and the text is immutable,
+        #     so the references (with the current sizes) stay valid outside the lock.
+        return (self._haystack, self._starts, len(self._starts), self._keys, set(self._dead),
+                self._vocab, self._postings, self._tails, self._tail_starts)
+
+    @staticmethod
+    def _prefix_docs(vocab, postings, count, term):
+        lo = bisect.bisect_left(vocab, term)
+        hi = bisect.bisect_left(vocab, term + "\U0010ffff", lo)
+        docs = set()
+        for word in vocab[lo:hi]:
+            docs.update(postings[word])
+        if docs and max(docs) >= count:
+            docs = {doc for doc in docs if doc < count}
+        return docs
+
+    def _match(self, terms, snapshot):
+        """
+        PT: Retorna os documentos que contêm todos os termos, com o nível de ranking de cada um.
+            Roda fora do lock, sobre o snapshot.
+        EN: Returns the documents containing every term, with each one's ranking tier.
+            Runs outside the lock, on the snapshot.
+        """
+        haystack, starts, count, keys, dead, vocab, postings, tails, tail_starts = snapshot
+        unique = set(terms)
+        phrase = " " + " ".join(terms)
+
+        # PT: Níveis 0 e 1: a interseção das músicas com alguma palavra começando por cada termo.
+        # EN: Tiers 0 and 1: the intersection of the songs with some word starting with each term.
+        prefixed = None
+        for term in sorted(unique, key=len, reverse=True):
+            docs = self._prefix_docs(vocab, postings, count, term)
+            prefixed = docs if prefixed is None else prefixed & docs
+            if not prefixed:
+                break
+        prefixed -= dead
+        matches = [((0 if haystack.startswith(phrase, starts[doc] + 1) else 1),) + keys[doc] for doc in prefixed]
+
+        # PT: Nível 2: algum termo longo aparece fora de um início de palavra (ocorrência nas "caudas").
+        #     Termos curtos continuam precisando ser início de palavra.
+        # EN: Tier 2: some long term shows up away from a word start (an occurrence in the "tails").
+        #     Short terms still have to be word starts.
+        long_terms = [term for term in unique if len(term) >= MIN_SUBSTRING_LENGTH]
+        if not long_terms:
+            return matches
+        short_starts = [" " + term for term in unique if len(term) < MIN_SUBSTRING_LENGTH]
+        size = len(tails)
+        candidates = set()
+        for term in long_terms:
+            pos = tails.find(term)
+            while pos != -1:
+                doc = bisect.bisect_right(tail_starts, pos, 0, count) - 1
+                candidates.add(doc)
+                pos = tails.find(term, tail_starts[doc + 1] if doc + 1 < count else size)
+        candidates -= prefixed
+        candidates -= dead
+        if len(unique) == 1:
+            # PT: Um termo só: a ocorrência nas caudas já é o resultado.
+            # EN: A single term: the occurrence in the tails is already the result.
+            matches.extend((2,) + keys[doc] for doc in candidates)
+            return matches
+        for doc in candidates:
+            end = starts[doc + 1] if doc + 1 < count else len(haystack)
+            line = haystack[starts[doc] + 1:end]
+            if all(term in line for term in long_terms) and all(word in line for word in short_starts):
+                matches.append((2,) + keys[doc])
+        return matches
+
+    def _ranked(self, query, filter_name):
+        # PT: Com filtro, o resultado depende também das associações.
+        # EN: With a filter, the result also depends on the associations.
+        tags_version = self.tag_store.version if filter_name and self.tag_store is not None else None
+        key = (query, filter_name, tags_version)
+        terms = query.split()
+        with self._lock:
+            self._apply_pending()
+            ranked = self._results.get(key)
+            if ranked is not None:
+                self._results.move_to_end(key)
+                return ranked
+            version = self.version
+            snapshot = self._snapshot()
+            docs = list(self._doc_of.values()) if not terms and filter_name is None else None
+
+        if not terms and filter_name is None:
+            # PT: A lista completa ordenada também é a base dos filtros, então fica em cache.
+            # EN: The full sorted list is also the base of the filters, so it stays cached.
+            keys = snapshot[3]
+            ranked = sorted((0,) + keys[doc] for doc in docs)
+        elif filter_name == FILTER_ORPHANED:
+            ranked = sorted((0, uid.casefold(), uid) for uid, song in self._orphaned()
+                            if not terms or all(term in normalize(f"{uid} {song}") for term in terms))
+        else:
+            if terms:
+                ranked = self._match(terms, snapshot)
+                ranked.sort()
+            else:
+                ranked = self._ranked("", None)
+            if filter_name == FILTER_UNASSIGNED:
+                assigned = self.cards_by_song()
+                ranked = [item for item in ranked if item[2] not in assigned]
+
+        with self._lock:
+            # PT: Se o índice mudou durante a busca, o resultado vale para esta busca, mas não vai para o cache.
+            # EN: If the index changed during the search, the result serves this search but is not cached.
+            if version == self.version:
+                self._results[key] = ranked
+                if len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        return ranked
+
+    def _orphaned(self):
+        # PT: Cartões cujo arquivo (ou coleção) não existe mais.
+        # EN: Cards whose file (or collection) no longer exists.
+        items = self.tag_store.items().items() if self.tag_store is not None else ()
+        is_known = self.is_known or (lambda name: name in self._doc_of)
+        return [(uid, song) for uid, song in items if not is_known(song)]
+
+    def cards_by_song(self):
+        """
+        PT: Retorna música -> UID do cartão, recalculado só quando as associações mudam.
+        EN: Returns song -> card UID, recomputed only when the associations change.
+        """
+        version, cards = self._cards
+        if self.tag_store is None or version == self.tag_store.version:
+            return cards
+        version = self.tag_store.version
+        cards = {song: uid for uid, song in self.tag_store.items().items()}
+        self._cards = (version, cards)
+        return cards
+
+    def search(self, query="", filter_name=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        PT: Busca músicas (ou, com o filtro "orphaned", cartões) e retorna uma página.
+        EN: Searches songs (or, with the "orphaned" filter, cards) and returns a page.
+
+        Args:
+            query (str): PT: Termos da busca (vazio = todas). | EN: Search terms (empty = all).
+            filter_name (str): PT: None, "unassigned" (músicas sem cartão) ou "orphaned" (cartões sem arquivo).
+                               EN: None, "unassigned" (songs without a card) or "orphaned" (cards without a file).
+            cursor (str): PT: Valor "next_cursor" da página anterior. | EN: "next_cursor" value of the previous page.
+
+        Returns:
+            dict: PT: "total", "items" (chaves de ordenação) e "next_cursor" (None na última página).
+                  EN: "total", "items" (sort keys) and "next_cursor" (None on the last page).
+        """
+        if filter_name is not None and filter_name not in FILTERS:
+            raise ValueError(f"Unknown filter '{filter_name}'")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        start_key = decode_cursor(cursor) if cursor else None
+        ranked = self._ranked(normalize(query), filter_name)
+        start = bisect.bisect_right(ranked, start_key) if start_key else 0
+        page = ranked[start:start + limit]
+        more = start + limit < len(ranked)
+        return {
+            "total": len(ranked),
+            "items": [item[2] for item in page],
+            "next_cursor": encode_cursor(list(page[-1])) if page and more else None
+        }
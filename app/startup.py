@@ -0,0 +1,109 @@
+# PT: Este arquivo mede a inicialização da jukebox em fases. As fases críticas (tags e leitor
+#     RFID) rodam primeiro, em sequência; as demais (mixer, mDNS, biblioteca...) rodam em
+#     paralelo em segundo plano. No fim, um relatório mostra quanto tempo cada uma levou e
+#     quando a jukebox ficou pronta para a primeira leitura.
+# EN: This file measures the jukebox startup in phases. The critical phases (tags and RFID
+#     reader) run first, in sequence; the others (mixer, mDNS, library...) run concurrently
+#     in the background. At the end, a report shows how long each one took and when the
+#     jukebox became ready for the first scan.
+
+import threading
+import time
+from contextlib import contextmanager
+
+from app.log import get_logger
+
+log = get_logger("startup")
+
+
+class StartupReport:
+    """
+    PT: Registra a duração das fases e os marcos da inicialização, relativos ao início do processo.
+    EN: Records the duration of the startup phases and milestones, relative to the process start.
+    """
+
+    def __init__(self, started=None):
+        """
+        Args:
+            started (float): PT: Início da contagem (time.perf_counter()). | EN: Start of the count (time.perf_counter()).
+        """
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = []
+        self.milestones = {}
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _offset(self, when=None):
+        return ((when if when is not None else time.perf_counter()) - self.started) * 1000
+
+    def record(self, name, start, end, background=False, error=None):
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "start_ms": round(self._offset(start), 1),
+                "duration_ms": round((end - start) * 1000, 1),
+                "background": background,
+                "error": error
+            })
+
+    @contextmanager
+    def phase(self, name):
+        """
+        PT: Mede uma fase que roda na thread atual (caminho crítico).
+        EN: Measures a phase that runs on the current thread (critical path).
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def background(self, name, target, *args):
+        """
+        PT: Roda uma fase em uma thread própria, sem atrasar as seguintes.
+        EN: Runs a phase on its own thread, without delaying the following ones.
+        """
+        def run():
+            start = time.perf_counter()
+            error = None
+            try:
+                target(*args)
+            except Exception as e:
+                error = str(e)
+                log.error("Erro na inicialização (%s): %s / Startup error (%s): %s", name, e, name, e)
+            self.record(name, start, time.perf_counter(), background=True, error=error)
+
+        thread = threading.Thread(target=run, name=f"startup-{name}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+        return thread
+
+    def mark(self, name):
+        """
+        PT: Registra um marco (ex: "pronto para leituras").
+        EN: Records a milestone (e.g. "ready for scans").
+        """
+        self.milestones[name] = round(self._offset(), 1)
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in list(self._threads):
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def as_dict(self):
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase["start_ms"])
+        return {"phases": phases, "milestones": dict(self.milestones)}
+
+    def print_report(self):
+        report = self.as_dict()
+        lines = ["Relatório de inicialização / Startup report:"]
+        for phase in report["phases"]:
+            kind = "bg" if phase["background"] else "fg"
+            status = f"  ERRO/ERROR: {phase['error']}" if phase["error"] else ""
+            lines.append(f"  [{kind}] {phase['name']:<16} +{phase['start_ms']:>8.1f} ms  {phase['duration_ms']:>8.1f} ms{status}")
+        for name, offset in sorted(report["milestones"].items(), key=lambda item: item[1]):
+            lines.append(f"  * {name:<21} +{offset:>8.1f} ms")
+        # PT: Um único registro, para o relatório não ser intercalado com outras mensagens.
+        # EN: A single record, so the report is not interleaved with other messages.
+        log.info("%s", "\n".join(lines))
@@ -0,0 +1,65 @@
+# PT: Este arquivo limita quantos MP3s são enviados ao mesmo tempo por /api/stream (prévia no
+#     navegador). Cada vaga fica presa ao arquivo aberto e é liberada quando o servidor o fecha,
+#     ou seja, quando a resposta termina ou o cliente desiste no meio. O arquivo é um FileIO
+#     comum (com fileno), então um servidor com wsgi.file_wrapper pode usar sendfile.
+# EN: This file limits how many MP3s are sent at the same time through /api/stream (browser
+#     preview). Each slot is tied to the open file and is released when the server closes it,
+#     i.e. when the response ends or the client gives up halfway. The file is a plain FileIO
+#     (with a fileno), so a server with wsgi.file_wrapper can use sendfile.
+
+import io
+import threading
+
+from app import metrics
+
+ACTIVE_STREAMS = metrics.gauge("jukebox_active_streams", "Audio streams currently being sent by /api/stream.")
+REJECTED_STREAMS = metrics.counter("jukebox_rejected_streams", "Streams refused because every slot was busy.")
+
+
+class StreamFile(io.FileIO):
+    """
+    PT: Arquivo aberto para leitura que chama `on_close` uma única vez ao ser fechado.
+    EN: File opened for reading that calls `on_close` exactly once when closed.
+    """
+
+    def __init__(self, path, on_close):
+        super().__init__(path, "rb")
+        self._on_close = on_close
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            super().close()
+        finally:
+            self._on_close()
+
+
+class StreamLimiter:
+    """
+    PT: Semáforo de vagas de streaming que não espera: sem vaga livre, `open` retorna None.
+    EN: Non-blocking semaphore of streaming slots: with no free slot, `open` returns None.
+    """
+
+    def __init__(self, max_streams=4):
+        self.max_streams = max_streams
+        self._slots = threading.BoundedSemaphore(max_streams)
+
+    def open(self, path):
+        """
+        PT: Abre o arquivo ocupando uma vaga. Retorna None se todas estão em uso.
+        EN: Opens the file taking a slot. Returns None if all of them are in use.
+        """
+        if not self._slots.acquire(blocking=False):
+            REJECTED_STREAMS.inc()
+            return None
+        ACTIVE_STREAMS.inc()
+        try:
+            return StreamFile(path, self._release)
+        except OSError:
+            self._release()
+            raise
+
+    def _release(self):
+        ACTIVE_STREAMS.dec()
+        self._slots.release()
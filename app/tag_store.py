@@ -0,0 +1,320 @@
+# PT: Este arquivo contém o armazenamento persistente das associações de tags (UID -> música).
+#     As alterações são gravadas em um journal apenas de anexação (tags.txt), e periodicamente
+#     o estado completo é salvo em um snapshot compactado, com renomeações atômicas.
+# EN: This file contains the persistent storage of tag associations (UID -> song).
+#     Changes are written to an append-only journal (tags.txt), and the full state is
+#     periodically saved to a compacted snapshot, using atomic renames.
+
+import os
+import threading
+
+from app import metrics
+from app.log import get_logger
+
+log = get_logger("tags")
+
+# PT: Uma linha "uid:" (sem música) é uma lápide: marca a remoção da associação.
+#     Linhas "uid:musica" são compatíveis com o formato antigo do tags.txt.
+# EN: A "uid:" line (without a song) is a tombstone: it marks the removal of the association.
+#     "uid:song" lines are compatible with the old tags.txt format.
+TOMBSTONE = ""
+
+# PT: Marcadores de transação: as linhas entre eles só valem se o "#commit" foi gravado.
+# EN: Transaction markers: the lines between them only count if "#commit" was written.
+BATCH_BEGIN = "#begin"
+BATCH_COMMIT = "#commit"
+
+JOURNAL_WRITES = metrics.counter("jukebox_tag_journal_writes", "Appends (each followed by fsync) to the tags journal.")
+
+
+class TagStore:
+    """
+    PT: Armazena as associações em memória e as persiste em disco.
+        - As consultas (get) leem apenas o dicionário em memória e nunca esperam por I/O.
+        - Gravações e remoções são uma única linha anexada ao journal (O(1)).
+        - Quando o journal cresce demais, um snapshot é escrito em um arquivo temporário
+          e renomeado atomicamente; só então o journal é truncado.
+    EN: Stores the associations in memory and persists them to disk.
+        - Lookups (get) only read the in-memory dictionary and never wait on I/O.
+        - Writes and deletes are a single line appended to the journal (O(1)).
+        - When the journal grows too large, a snapshot is written to a temporary file
+          and atomically renamed; only then is the journal truncated.
+    """
+
+    def __init__(self, journal_path, snapshot_path=None, compact_min_entries=1000, compact_ratio=2.0):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path or journal_path + ".snapshot"
+        self.compact_min_entries = compact_min_entries
+        self.compact_ratio = compact_ratio
+
+        # PT: O dicionário só é alterado com o lock de escrita, então leituras não precisam de lock.
+        # EN: The dictionary is only mutated under the write lock, so reads need no lock.
+        self._entries = {}
+        self._write_lock = threading.Lock()
+        self._journal_entries = 0
+        self._compacting = False
+        # PT: Versão incrementada a cada alteração (útil para validação de cache).
+        # EN: Version incremented on every change (useful for cache validation).
+        self.version = 0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        PT: Registra uma função chamada com a lista de (uid, música) alterados após cada gravação
+            (música vazia = associação removida). O carregamento do disco não notifica.
+        EN: Registers a function called with the list of changed (uid, song) after each write
+            (empty song = association removed). Loading from disk does not notify.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, changes):
+        for callback in self._listeners:
+            try:
+                callback(changes)
+            except Exception as e:
+                log.error("Erro em um ouvinte das tags: %s / Error in a tags listener: %s", e, e)
+
+    # --- Leitura / Reading ---
+
+    def get(self, uid):
+        """
+        PT: Retorna a música associada ao UID, ou None. Nunca bloqueia.
+        EN: Returns the song associated with the UID, or None. Never blocks.
+        """
+        return self._entries.get(uid)
+
+    def __contains__(self, uid):
+        return uid in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def items(self):
+        """
+        PT: Retorna uma cópia das associações atuais. A cópia de um dicionário é atômica
+            sob o GIL, então não espera por gravações ou compactações em andamento.
+        EN: Returns a copy of the current associations. Copying a dict is atomic
+            under the GIL, so it does not wait for ongoing writes or compactions.
+        """
+        return dict(self._entries)
+
+    # --- Carregamento / Loading ---
+
+    def load(self):
+        """
+        PT: Carrega o snapshot e reaplica o journal por cima dele.
+        EN: Loads the snapshot and replays the journal on top of it.
+        """
+        entries = {}
+        self._replay(self.snapshot_path, entries)
+        journal_entries, clean = self._replay(self.journal_path, entries)
+
+        with self._write_lock:
+            self._entries = entries
+            self._journal_entries = journal_entries
+            self.version += 1
+
+        if not clean:
+            # PT: O journal termina com uma linha ou um lote incompletos. Compacta agora,
+            #     para que as próximas linhas não sejam anexadas a esse resto.
+            # EN: The journal ends with an incomplete line or batch. Compact now, so the
+            #     next lines are not appended to that leftover.
+            self._compacting = True
+            self.compact()
+        else:
+            self._maybe_compact()
+        return len(entries)
+
+    @staticmethod
+    def _replay(path, entries):
+        """
+        PT: Aplica as linhas de um arquivo ao dicionário. Uma última linha incompleta
+            (sem quebra de linha, por exemplo após uma queda de energia) é ignorada,
+            assim como um lote sem o marcador de commit.
+        EN: Applies the lines of a file to the dictionary. A trailing incomplete line
+            (without a newline, e.g. after a power loss) is ignored, as is a batch
+            without its commit marker.
+
+        Returns:
+            tuple: PT: (linhas aplicadas, se o arquivo termina de forma íntegra).
+                   EN: (lines applied, whether the file ends cleanly).
+        """
+        if not os.path.exists(path):
+            return 0, True
+
+        count = 0
+        batch = None
+        clean = True
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    clean = False
+                    continue
+                line = line.rstrip("\n")
+                if line == BATCH_BEGIN:
+                    batch = []
+                    continue
+                if line == BATCH_COMMIT:
+                    for uid, song_filename in batch or ():
+                        TagStore._apply(entries, uid, song_filename)
+                    count += len(batch or ())
+                    batch = None
+                    continue
+                if ":" not in line:
+                    continue
+                uid, song_filename = line.split(":", 1)
+                if batch is not None:
+                    batch.append((uid, song_filename))
+                else:
+                    TagStore._apply(entries, uid, song_filename)
+                    count += 1
+        return count, clean and batch is None
+
+    @staticmethod
+    def _apply(entries, uid, song_filename):
+        if song_filename == TOMBSTONE:
+            entries.pop(uid, None)
+        else:
+            entries[uid] = song_filename
+
+    # --- Escrita / Writing ---
+
+    def set(self, uid, song_filename):
+        """
+        PT: Associa um UID a uma música. Reatribuir o mesmo valor não gera escrita.
+        EN: Associates a UID with a song. Reassigning the same value writes nothing.
+        """
+        with self._write_lock:
+            if self._entries.get(uid) == song_filename:
+                return False
+            self._append(f"{uid}:{song_filename}\n")
+            self._entries[uid] = song_filename
+            self.version += 1
+        self._notify([(uid, song_filename)])
+        self._maybe_compact()
+        return True
+
+    def delete(self, uid):
+        """
+        PT: Remove a associação gravando uma lápide no journal.
+        EN: Removes the association by writing a tombstone to the journal.
+        """
+        with self._write_lock:
+            if uid not in self._entries:
+                return False
+            self._append(f"{uid}:{TOMBSTONE}\n")
+            del self._entries[uid]
+            self.version += 1
+        self._notify([(uid, TOMBSTONE)])
+        self._maybe_compact()
+        return True
+
+    def apply_batch(self, sets=None, deletes=(), replace=False):
+        """
+        PT: Aplica várias alterações como uma única transação, com uma só escrita
+            (e um só fsync) no journal. Ou todas valem após um reinício, ou nenhuma.
+        EN: Applies several changes as a single transaction, with a single write
+            (and a single fsync) to the journal. Either all of them survive a restart, or none.
+
+        Args:
+            sets (dict): PT: UID -> música. | EN: UID -> song.
+            deletes (iterable): PT: UIDs a remover. | EN: UIDs to remove.
+            replace (bool): PT: Remove todas as associações que não estão em `sets`.
+                            EN: Removes every association that is not in `sets`.
+
+        Returns:
+            int: PT: Número de alterações efetivas. | EN: Number of effective changes.
+        """
+        sets = dict(sets or {})
+        with self._write_lock:
+            deletes = set(deletes)
+            if replace:
+                deletes |= set(self._entries) - set(sets)
+            changes = [(uid, TOMBSTONE) for uid in sorted(deletes) if uid in self._entries and uid not in sets]
+            changes += [(uid, song) for uid, song in sets.items() if self._entries.get(uid) != song]
+            if not changes:
+                return 0
+
+            lines = "".join(f"{uid}:{song}\n" for uid, song in changes)
+            self._append(f"{BATCH_BEGIN}\n{lines}{BATCH_COMMIT}\n")
+            self._journal_entries -= 2
+            for uid, song in changes:
+                self._apply(self._entries, uid, song)
+            self.version += 1
+        self._notify(changes)
+        self._maybe_compact()
+        return len(changes)
+
+    def _append(self, data):
+        # PT: Deve ser chamado com _write_lock. Força a gravação no disco antes de retornar.
+        # EN: Must be called with _write_lock held. Forces the write to disk before returning.
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        JOURNAL_WRITES.inc()
+        self._journal_entries += data.count("\n")
+
+    # --- Compactação / Compaction ---
+
+    def _needs_compaction(self):
+        threshold = max(self.compact_min_entries, int(len(self._entries) * self.compact_ratio))
+        return self._journal_entries > threshold
+
+    def _maybe_compact(self):
+        """
+        PT: Inicia a compactação em segundo plano se o journal estiver grande demais.
+        EN: Starts compaction in the background if the journal is too large.
+        """
+        with self._write_lock:
+            if self._compacting or not self._needs_compaction():
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """
+        PT: Escreve um snapshot com o estado atual e trunca o journal.
+            Se o processo cair entre as duas renomeações, reaplicar o journal
+            sobre o novo snapshot produz o mesmo estado (as operações são idempotentes).
+        EN: Writes a snapshot of the current state and truncates the journal.
+            If the process dies between the two renames, replaying the journal
+            over the new snapshot yields the same state (operations are idempotent).
+        """
+        try:
+            with self._write_lock:
+                self._atomic_write(self.snapshot_path,
+                                   "".join(f"{uid}:{song}\n" for uid, song in self._entries.items()))
+                self._atomic_write(self.journal_path, "")
+                self._journal_entries = 0
+            log.info("Tags compactadas: %d associações. / Tags compacted: %d associations.", len(self._entries), len(self._entries))
+        except OSError as e:
+            log.error("Erro ao compactar o arquivo de tags: %s / Error compacting tags file: %s", e, e)
+        finally:
+            self._compacting = False
+
+    @staticmethod
+    def _atomic_write(path, data):
+        """
+        PT: Grava em um arquivo temporário, sincroniza e renomeia sobre o destino.
+        EN: Writes to a temporary file, syncs it and renames it over the destination.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        # PT: Sincroniza o diretório para que a renomeação sobreviva a uma queda de energia.
+        # EN: Syncs the directory so the rename survives a power loss.
+        try:
+            dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,413 @@
+# PT: Este arquivo implementa uploads em partes (chunks), retomáveis e com deduplicação.
+#     Cada parte é gravada direto em um arquivo temporário enquanto o hash SHA-256 é
+#     calculado de forma incremental. Ao final, o arquivo é movido para a pasta de músicas
+#     com uma renomeação atômica, ou descartado se o mesmo conteúdo já existir.
+# EN: This file implements chunked, resumable uploads with deduplication.
+#     Each chunk is written straight to a temporary file while the SHA-256 hash is
+#     computed incrementally. At the end the file is moved into the music folder with
+#     an atomic rename, or discarded if the same content already exists.
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from app import metrics
+from app.blocking import run_blocking
+
+READ_BLOCK_SIZE = 64 * 1024
+
+UPLOADS = metrics.counter("jukebox_uploads", "Uploaded files committed to the library.", ["result"])
+
+
+class UploadError(Exception):
+    """
+    PT: Erro de upload com o código HTTP correspondente.
+    EN: Upload error with the matching HTTP status code.
+    """
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_part(path):
+    """
+    PT: Hash incremental e tamanho da parte já recebida (vazio se ela não existir).
+    EN: Incremental hash and size of the part already received (empty if it does not exist).
+    """
+    hasher = hashlib.sha256()
+    received = 0
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                hasher.update(block)
+                received += len(block)
+    except FileNotFoundError:
+        pass
+    return hasher, received
+
+
+def _fsync_dir(path):
+    try:
+        dir_fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class UploadSession:
+    def __init__(self, upload_id, filename, size, part_path):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.size = size
+        self.part_path = part_path
+        self.received = 0
+        self.hasher = hashlib.sha256()
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {"upload_id": self.upload_id, "filename": self.filename,
+                "size": self.size, "offset": self.received}
+
+
+class UploadManager:
+    """
+    PT: Gerencia as sessões de upload. O estado de cada sessão (nome e tamanho) fica em um
+        arquivo .json ao lado do arquivo .part, então um upload pode ser retomado mesmo
+        depois que o servidor reiniciar.
+    EN: Manages upload sessions. Each session's state (name and size) lives in a .json file
+        next to the .part file, so an upload can be resumed even after the server restarts.
+    """
+
+    def __init__(self, music_folder, max_size, tmp_folder=None):
+        self.music_folder = music_folder
+        self.max_size = max_size
+        self.tmp_folder = tmp_folder or os.path.join(music_folder, ".uploads")
+        self._sessions = {}
+        self._lock = threading.Lock()
+        # PT: Sessões sendo recarregadas do disco: upload_id -> trava da recarga.
+        # EN: Sessions being reloaded from disk: upload_id -> reload lock.
+        self._loading = {}
+        # PT: Cache de hashes dos arquivos da biblioteca: nome -> (mtime, tamanho, sha256).
+        # EN: Hash cache of the library files: name -> (mtime, size, sha256).
+        self._hash_cache = {}
+        # PT: Índice de tamanhos da biblioteca (alimentado pelo LibraryIndex): nome -> tamanho e
+        #     tamanho -> nomes. Só os arquivos do mesmo tamanho são consultados no disco.
+        # EN: Size index of the library (fed by LibraryIndex): name -> size and size -> names.
+        #     Only the files of the same size are checked on disk.
+        self._sizes = {}
+        self._by_size = {}
+
+    # --- Sessões / Sessions ---
+
+    def _paths(self, upload_id):
+        base = os.path.join(self.tmp_folder, upload_id)
+        return base + ".part", base + ".json"
+
+    def create(self, filename, size):
+        """
+        PT: Cria uma sessão de upload. Se já houver uma sessão para o mesmo nome e tamanho,
+            ela é reaproveitada para que o cliente continue de onde parou.
+        EN: Creates an upload session. If there is already a session for the same name and
+            size, it is reused so the client can continue where it stopped.
+        """
+        filename = secure_filename(filename or "")
+        if not filename.lower().endswith(".mp3"):
+            raise UploadError("Arquivo inválido. Apenas MP3 são permitidos. (Invalid file. Only MP3s are allowed.)")
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError("Tamanho inválido. (Invalid size.)")
+        if size > self.max_size:
+            raise UploadError("Arquivo muito grande. (File too large.)", status=413)
+
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        with self._lock:
+            for session in self._sessions.values():
+                if session.filename == filename and session.size == size:
+                    return session
+
+            upload_id = uuid.uuid4().hex
+            part_path, meta_path = self._paths(upload_id)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"filename": filename, "size": size}, f)
+            open(part_path, "wb").close()
+            session = UploadSession(upload_id, filename, size, part_path)
+            self._sessions[upload_id] = session
+            return session
+
+    def get(self, upload_id):
+        """
+        PT: Retorna a sessão, recarregando-a do disco se o servidor foi reiniciado. A recarga
+            (que relê a parte inteira) acontece fora de self._lock, com uma trava por upload:
+            as outras sessões não esperam, e pedidos simultâneos pelo mesmo upload leem uma vez só.
+        EN: Returns the session, reloading it from disk if the server was restarted. The reload
+            (which rereads the whole part) happens outside self._lock, with a per-upload lock:
+            other sessions do not wait, and concurrent requests for the same upload read it once.
+        """
+        with self._lock:
+            session = self._sessions.get(upload_id)
+            if session is not None:
+                return session
+            if not upload_id.isalnum():
+                raise UploadError("Upload não encontrado. (Upload not found.)", status=404)
+            loading = self._loading.setdefault(upload_id, threading.Lock())
+
+        with loading:
+            with self._lock:
+                session = self._sessions.get(upload_id)
+            if session is not None:
+                return session
+            try:
+                session = self._load(upload_id)
+                with self._lock:
+                    self._sessions[upload_id] = session
+                return session
+            finally:
+                with self._lock:
+                    self._loading.pop(upload_id, None)
+
+    def _load(self, upload_id):
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            raise UploadError("Upload não encontrado. (Upload not found.)", status=404)
+
+        session = UploadSession(upload_id, meta["filename"], meta["size"], part_path)
+        # PT: Recalcula o hash da parte já recebida para poder continuar o cálculo incremental.
+        # EN: Recomputes the hash of the part already received to continue the incremental hash.
+        session.hasher, session.received = run_blocking(_hash_part, part_path)
+        return session
+
+    def abort(self, upload_id):
+        session = self.get(upload_id)
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+        self._discard(session)
+
+    def _discard(self, session):
+        for path in self._paths(session.upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def cleanup(self, max_age=24 * 3600):
+        """
+        PT: Remove arquivos temporários de uploads abandonados há mais de max_age segundos.
+        EN: Removes temporary files of uploads abandoned for more than max_age seconds.
+        """
+        if not os.path.isdir(self.tmp_folder):
+            return
+        now = time.time()
+        for name in os.listdir(self.tmp_folder):
+            path = os.path.join(self.tmp_folder, name)
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # --- Recebimento / Receiving ---
+
+    def write_chunk(self, upload_id, offset, stream):
+        """
+        PT: Grava uma parte a partir de um stream, sem carregá-la inteira na memória.
+            O offset precisa ser igual ao total já recebido; caso contrário o cliente
+            recebe o offset correto para continuar.
+        EN: Writes a chunk from a stream, without loading it entirely into memory.
+            The offset must match the total received so far; otherwise the client
+            gets the correct offset to continue from.
+
+        Returns:
+            dict: PT: O estado da sessão, ou o resultado final quando o upload termina.
+                  EN: The session state, or the final result when the upload completes.
+        """
+        session = self.get(upload_id)
+        with session.lock:
+            if offset != session.received:
+                raise UploadError("Offset incorreto. (Wrong offset.)", status=409, offset=session.received)
+
+            remaining = session.size - session.received
+            with open(session.part_path, "ab") as f:
+                while True:
+                    block = stream.read(READ_BLOCK_SIZE)
+                    if not block:
+                        break
+                    if len(block) > remaining:
+                        raise UploadError("Dados além do tamanho declarado. (Data beyond declared size.)",
+                                          status=413, offset=session.received)
+                    f.write(block)
+                    session.hasher.update(block)
+                    session.received += len(block)
+                    remaining -= len(block)
+
+            if session.received < session.size:
+                return session.to_dict()
+            return self._commit(session)
+
+    def _commit(self, session):
+        """
+        PT: Finaliza o upload: deduplica pelo hash ou move o arquivo para a biblioteca.
+        EN: Finalizes the upload: deduplicates by hash or moves the file into the library.
+        """
+        with self._lock:
+            self._sessions.pop(session.upload_id, None)
+        with open(session.part_path, "rb+") as f:
+            run_blocking(os.fsync, f.fileno())
+        result = self._finalize(session.filename, session.part_path, session.size, session.hasher.hexdigest())
+        self._discard(session)
+        return result
+
+    def _finalize(self, filename, part_path, size, digest):
+        duplicate = self.find_duplicate(size, digest)
+        if duplicate:
+            os.remove(part_path)
+            UPLOADS.labels("deduplicated").inc()
+            return {"status": "success", "filename": duplicate, "deduplicated": True, "sha256": digest}
+
+        target = os.path.join(self.music_folder, filename)
+        os.replace(part_path, target)
+
+        st = os.stat(target)
+        with self._lock:
+            self._hash_cache[filename] = (st.st_mtime_ns, st.st_size, digest)
+            self._index_size(filename, st.st_size)
+        UPLOADS.labels("stored").inc()
+        return {"status": "success", "filename": filename, "deduplicated": False, "sha256": digest}
+
+    # --- Lotes / Batches ---
+
+    def stage(self, filename, stream):
+        """
+        PT: Grava um arquivo inteiro de um stream em um arquivo temporário, calculando o hash.
+            Usado pelos envios em lote: nada entra na biblioteca até commit_staged().
+        EN: Writes a whole file from a stream into a temporary file, computing its hash.
+            Used by batch uploads: nothing enters the library until commit_staged().
+
+        Returns:
+            dict: PT: Dados do arquivo preparado. | EN: Data of the staged file.
+        """
+        filename = secure_filename(filename or "")
+        if not filename.lower().endswith(".mp3"):
+            raise UploadError(f"Arquivo inválido: '{filename}'. Apenas MP3 são permitidos. (Invalid file. Only MP3s are allowed.)")
+
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        part_path = os.path.join(self.tmp_folder, uuid.uuid4().hex + ".part")
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(part_path, "wb") as f:
+                for block in iter(lambda: stream.read(READ_BLOCK_SIZE), b""):
+                    size += len(block)
+                    if size > self.max_size:
+                        raise UploadError(f"Arquivo muito grande: '{filename}'. (File too large.)", status=413)
+                    f.write(block)
+                    hasher.update(block)
+                f.flush()
+                run_blocking(os.fsync, f.fileno())
+        except BaseException:
+            os.remove(part_path)
+            raise
+        return {"filename": filename, "part_path": part_path, "size": size, "sha256": hasher.hexdigest()}
+
+    def commit_staged(self, staged):
+        """
+        PT: Move todos os arquivos preparados para a biblioteca (ou os deduplica).
+        EN: Moves all staged files into the library (or deduplicates them).
+        """
+        results = [self._finalize(item["filename"], item["part_path"], item["size"], item["sha256"])
+                   for item in staged]
+        run_blocking(_fsync_dir, self.music_folder)
+        return results
+
+    @staticmethod
+    def discard_staged(staged):
+        for item in staged:
+            try:
+                os.remove(item["part_path"])
+            except FileNotFoundError:
+                pass
+
+    # --- Deduplicação / Deduplication ---
+
+    def on_library_change(self, kind, name):
+        """
+        PT: Ouvinte do LibraryIndex: mantém o índice de tamanhos usado por find_duplicate.
+        EN: LibraryIndex listener: keeps the size index used by find_duplicate up to date.
+        """
+        size = None
+        if kind != "removed":
+            try:
+                size = os.stat(os.path.join(self.music_folder, name)).st_size
+            except OSError:
+                pass
+        with self._lock:
+            self._index_size(name, size)
+
+    def _index_size(self, name, size):
+        # PT: Chamado com self._lock. Tamanho None remove o arquivo do índice.
+        # EN: Called with self._lock held. A size of None removes the file from the index.
+        previous = self._sizes.pop(name, None)
+        if previous is not None:
+            names = self._by_size[previous]
+            names.discard(name)
+            if not names:
+                del self._by_size[previous]
+        if size is None:
+            self._hash_cache.pop(name, None)
+            return
+        self._sizes[name] = size
+        self._by_size.setdefault(size, set()).add(name)
+
+    def find_duplicate(self, size, digest):
+        """
+        PT: Procura na biblioteca um arquivo com o mesmo conteúdo. Os candidatos vêm do índice
+            de tamanhos, só eles são consultados no disco, e seus hashes ficam em cache.
+        EN: Looks for a file with the same content in the library. The candidates come from
+            the size index, only they are checked on disk, and their hashes are cached.
+        """
+        with self._lock:
+            candidates = sorted(self._by_size.get(size, ()))
+
+        for name in candidates:
+            path = os.path.join(self.music_folder, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                with self._lock:
+                    self._index_size(name, None)
+                continue
+            if st.st_size != size:
+                with self._lock:
+                    self._index_size(name, st.st_size)
+                continue
+            cached = self._hash_cache.get(name)
+            if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                existing = cached[2]
+            else:
+                existing = run_blocking(file_sha256, path)
+                with self._lock:
+                    self._hash_cache[name] = (st.st_mtime_ns, st.st_size, existing)
+            if existing == digest:
+                return name
+        return None
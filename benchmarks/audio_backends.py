@@ -0,0 +1,129 @@
+# PT: Benchmark dos backends de áudio (veja app/audio_backends.py): para cada backend, em um processo
+#     novo (para a memória de um não contar no outro), mede o tempo de abertura, a memória ocupada e a
+#     latência entre carregar uma faixa e o som começar, usando MP3s silenciosos. Serve para escolher
+#     o backend mais barato em cada modelo de placa (JUKEBOX_AUDIO_BACKEND).
+# EN: Benchmark of the audio backends (see app/audio_backends.py): for each backend, in a fresh process
+#     (so that one's memory does not count for another), measures the open time, the memory used and
+#     the latency between loading a track and sound starting, using silent MP3s. Used to pick the
+#     cheapest backend on each board model (JUKEBOX_AUDIO_BACKEND).
+#
+#     python -m benchmarks.audio_backends
+#     python -m benchmarks.audio_backends --backends pygame,mpg123 --plays 50 --mpg123-buffer-kb 64
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import REPO_ROOT, print_report, process_sample, silent_mp3, summarize, write_json
+
+BACKENDS = ("pygame", "mpg123", "null")
+
+
+def available(name):
+    if name == "pygame":
+        return importlib.util.find_spec("pygame") is not None
+    if name == "mpg123":
+        return shutil.which("mpg123") is not None
+    return True
+
+
+def measure(name, plays, buffer_kb, device):
+    """
+    PT: Roda no processo filho: abre o backend e toca cada faixa até a posição começar a andar.
+    EN: Runs in the child process: opens the backend and plays each track until the position moves.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from app.audio_backends import create_backend
+
+    workdir = tempfile.mkdtemp(prefix="jukebox-audio-")
+    try:
+        paths = []
+        for i in range(2):
+            paths.append(os.path.join(workdir, f"silence{i}.mp3"))
+            with open(paths[-1], "wb") as f:
+                f.write(silent_mp3(10.0))
+
+        rss_before = process_sample()[0]
+        options = {"buffer_kb": buffer_kb, "device": device} if name == "mpg123" else {}
+        backend = create_backend(name, **options)
+        backend.open()
+        rss_process = process_sample()[0] - rss_before
+
+        starts, audible = [], []
+        for i in range(plays):
+            started = time.perf_counter()
+            backend.load(paths[i % 2])
+            backend.play()
+            # PT: Além da medida do backend, espera o relógio da faixa andar (som saindo de fato).
+            # EN: Besides the backend's own measure, waits for the track clock to move (sound actually out).
+            deadline = started + 5
+            while backend.get_pos() <= 0 and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            audible.append(time.perf_counter() - started)
+            # PT: O mpg123 registra a própria medida só quando o primeiro frame toca.
+            # EN: mpg123 only records its own measure when the first frame plays.
+            starts.append(backend.last_start_seconds or 0.0)
+        backend.close()
+
+        start = summarize(starts)
+        clock = summarize(audible)
+        return {
+            "startup_ms": backend.startup_seconds * 1000,
+            "memory_mb": backend.memory_mb or 0.0,
+            "process_rss_mb": rss_process,
+            "start_p50_ms": start["p50_ms"],
+            "start_p99_ms": start["p99_ms"],
+            "position_p50_ms": clock["p50_ms"],
+            "position_p99_ms": clock["p99_ms"],
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Audio backend startup, memory and start latency benchmark")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated backends to compare")
+    parser.add_argument("--plays", type=int, default=20, help="tracks started per backend")
+    parser.add_argument("--mpg123-buffer-kb", type=int, default=0)
+    parser.add_argument("--device", help="mpg123 output device (-a)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.plays, args.mpg123_buffer_kb, args.device)))
+        return 0
+
+    rows = {}
+    for name in args.backends.split(","):
+        if not available(name):
+            print(f"{name}: not installed, skipped")
+            continue
+        command = [sys.executable, "-m", "benchmarks.audio_backends", "--child", name, "--plays", str(args.plays),
+                   "--mpg123-buffer-kb", str(args.mpg123_buffer_kb)]
+        if args.device:
+            command += ["--device", args.device]
+        result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{name}: failed\n{result.stderr}")
+            continue
+        # PT: A última linha é o resultado; as anteriores são mensagens das bibliotecas.
+        # EN: The last line is the result; the ones before are library messages.
+        rows[name] = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print_report(f"audio backends ({args.plays} plays)", rows)
+    if args.json:
+        write_json(args.json, rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
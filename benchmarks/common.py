@@ -0,0 +1,179 @@
+# PT: Funções compartilhadas pelos benchmarks (percentis, relatórios, ambiente isolado).
+# EN: Helpers shared by the benchmarks (percentiles, reports, isolated environment).
+
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, p):
+    """
+    PT: Percentil p (0-100) de uma lista já ordenada, com interpolação linear.
+    EN: Percentile p (0-100) of an already sorted list, with linear interpolation.
+    """
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def summarize(latencies, elapsed=None):
+    """
+    PT: Resume uma lista de latências (em segundos) em milissegundos.
+    EN: Summarizes a list of latencies (in seconds) in milliseconds.
+    """
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        "mean_ms": (sum(values) / len(values) * 1000) if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] * 1000) if values else 0.0,
+    }
+    if elapsed:
+        summary["throughput_per_s"] = len(values) / elapsed
+    return summary
+
+
+def print_report(title, rows):
+    """
+    PT: Imprime um relatório simples: uma linha por cenário.
+    EN: Prints a simple report: one line per scenario.
+    """
+    print(f"\n== {title} ==")
+    for name, summary in rows.items():
+        fields = "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                           for key, value in summary.items())
+        print(f"{name:<24} {fields}")
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def isolated_app():
+    """
+    PT: Importa app.main em um diretório temporário (tags.txt e music/ próprios)
+        com o driver de áudio "dummy" do SDL, sem tocar os dados reais.
+    EN: Imports app.main in a temporary directory (its own tags.txt and music/)
+        with SDL's "dummy" audio driver, without touching the real data.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    workdir = tempfile.mkdtemp(prefix="jukebox-bench-")
+    os.makedirs(os.path.join(workdir, "music"), exist_ok=True)
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    import app.main as main
+    main.app.template_folder = os.path.join(REPO_ROOT, "app", "template")
+    return main, workdir
+
+
+# --- Clientes HTTP e Socket.IO / HTTP and Socket.IO clients ---
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def http_request(port, method, path, body=None, headers=None, timeout=30):
+    """
+    PT: Uma requisição em uma conexão nova, como um celular que acabou de acordar.
+    EN: One request on a new connection, like a phone that just woke up.
+
+    Returns:
+        tuple: (status, corpo / body, cabeçalhos / headers)
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.read(), response.headers
+    finally:
+        conn.close()
+
+
+class PollingClient:
+    """
+    PT: Cliente Socket.IO mínimo por long-polling (Engine.IO v4), sem dependências.
+        `on_event` é chamado com (momento da chegada, nome do evento, dados).
+    EN: Minimal Socket.IO client over long-polling (Engine.IO v4), without dependencies.
+        `on_event` is called with (arrival time, event name, data).
+    """
+
+    def __init__(self, port, on_event):
+        self.port = port
+        self.on_event = on_event
+        self.sid = None
+        self.errors = 0
+
+    def _path(self):
+        return f"/socket.io/?EIO=4&transport=polling&sid={self.sid}"
+
+    def connect(self):
+        status, body, _ = http_request(self.port, "GET", "/socket.io/?EIO=4&transport=polling")
+        if status != 200:
+            raise RuntimeError(f"handshake failed ({status})")
+        self.sid = json.loads(body.decode()[1:])["sid"]
+        http_request(self.port, "POST", self._path(), body=b"40", headers={"Content-Type": "text/plain"})
+
+    def run(self, stop):
+        while not stop.is_set():
+            try:
+                status, body, _ = http_request(self.port, "GET", self._path(), timeout=40)
+            except OSError:
+                self.errors += 1
+                continue
+            received = time.perf_counter()
+            if status != 200:
+                self.errors += 1
+                return
+            for packet in body.decode().split("\x1e"):
+                if packet == "2":
+                    http_request(self.port, "POST", self._path(), body=b"3", headers={"Content-Type": "text/plain"})
+                elif packet.startswith("42"):
+                    name, data = json.loads(packet[2:])[:2]
+                    self.on_event(received, name, data)
+
+
+# --- Processo e áudio / Process and audio ---
+
+def process_sample(pid="self"):
+    """
+    PT: Memória (MB), número de threads e tempo de CPU (s) de um processo, lidos do /proc.
+    EN: Memory (MB), thread count and CPU time (s) of a process, read from /proc.
+    """
+    rss, threads = 0.0, 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1]) / 1024
+            elif line.startswith("Threads:"):
+                threads = int(line.split()[1])
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return rss, threads, cpu
+
+
+def silent_mp3(seconds=5.0):
+    """
+    PT: MP3 válido só com silêncio (frames MPEG-1 Layer III de 128 kbps / 44,1 kHz zerados),
+        para o pygame conseguir carregar e tocar sem arquivos reais.
+    EN: Valid silent MP3 (zeroed MPEG-1 Layer III frames at 128 kbps / 44.1 kHz), so that
+        pygame can load and play it without real files.
+    """
+    frame = b"\xff\xfb\x90\x64" + bytes(413)
+    return frame * max(1, int(seconds * 44100 / 1152))
@@ -0,0 +1,260 @@
+# PT: Benchmark de concorrência dos modos do servidor (JUKEBOX_ASYNC_MODE): para cada modo, sobe o
+#     servidor real (python -m app.main) em um diretório temporário e simula N celulares. Cada um
+#     mantém uma sessão Socket.IO por long-polling (uma conexão sempre aberta, como o navegador)
+#     e faz requisições com um intervalo de "leitura" entre elas (status, busca, página da
+#     biblioteca, trecho de stream). Um controlador muda o volume a cada segundo e mede quanto
+#     tempo o evento 'player_state' leva para chegar a todos os clientes. Enquanto isso, um leitor
+#     de roteiro (JUKEBOX_RFID_TRACE) apresenta um cartão a cada --scan-interval-ms, e a latência
+#     do cartão até o play sob carga é lida do histograma jukebox_scan_to_play_seconds do servidor.
+#     Mede latência e vazão das requisições, atraso dos broadcasts, latência dos cartões, memória,
+#     threads e CPU do servidor.
+# EN: Concurrency benchmark of the server modes (JUKEBOX_ASYNC_MODE): for each mode, starts the
+#     real server (python -m app.main) in a temporary directory and simulates N phones. Each one
+#     keeps a Socket.IO session over long-polling (a connection always open, like the browser)
+#     and makes requests with a "reading" pause between them (status, search, library page,
+#     stream chunk). A controller changes the volume every second and measures how long the
+#     'player_state' event takes to reach every client. Meanwhile, a replay reader
+#     (JUKEBOX_RFID_TRACE) presents a card every --scan-interval-ms, and the card-to-play latency
+#     under load is read from the server's jukebox_scan_to_play_seconds histogram.
+#     Measures request latency and throughput, broadcast delay, card latency, and server memory,
+#     threads and CPU.
+#
+#     python -m benchmarks.concurrency_bench
+#     python -m benchmarks.concurrency_bench --modes threading,gevent --clients 50,100,200 --duration 20
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import (REPO_ROOT, PollingClient, free_port, http_request, print_report, process_sample,
+                               silent_mp3, summarize, write_json)
+
+MODES = ("threading", "eventlet", "gevent")
+# PT: Mistura de requisições de cada cliente (peso relativo).
+# EN: Request mix of each client (relative weight).
+WORKLOAD = (("status", 4), ("search", 3), ("library", 2), ("stream", 1))
+CARDS = 8
+# PT: O roteiro de cartões cobre a inicialização do servidor e mais isto (só a janela de carga é medida).
+# EN: The card script covers the server startup plus this much (only the load window is measured).
+TRACE_MARGIN_SECONDS = 90.0
+
+
+class ServerProcess:
+    """
+    PT: O servidor da jukebox em um processo próprio (o monkey patching vale para o processo todo).
+    EN: The jukebox server in its own process (monkey patching applies to the whole process).
+    """
+
+    def __init__(self, mode, songs, duration=0.0, scan_interval=0.5):
+        self.mode = mode
+        self.port = free_port()
+        self.workdir = tempfile.mkdtemp(prefix=f"jukebox-{mode}-")
+        music = os.path.join(self.workdir, "music")
+        os.makedirs(music)
+        for i in range(songs):
+            with open(os.path.join(music, f"song {i:04d}.mp3"), "wb") as f:
+                f.write(os.urandom(16 * 1024))
+        # PT: Cartões associados a MP3 válidos, apresentados em rodízio pelo leitor de roteiro.
+        # EN: Cards associated with valid MP3s, presented in turn by the replay reader.
+        with open(os.path.join(self.workdir, "tags.txt"), "w", encoding="utf-8") as tags:
+            for i in range(CARDS):
+                with open(os.path.join(music, f"card {i}.mp3"), "wb") as f:
+                    f.write(silent_mp3(30.0))
+                tags.write(f"CARD-{i}:card {i}.mp3\n")
+        trace = os.path.join(self.workdir, "trace.txt")
+        with open(trace, "w", encoding="utf-8") as f:
+            for i in range(int((duration + TRACE_MARGIN_SECONDS) / scan_interval)):
+                f.write(f"{scan_interval} CARD-{i % CARDS}\n")
+        # PT: Sem crossfade, a latência dos cartões mede só o caminho até o play, e não o fade.
+        # EN: Without crossfade, the card latency only measures the path until play, not the fade.
+        env = dict(os.environ, JUKEBOX_ASYNC_MODE=mode, JUKEBOX_PORT=str(self.port),
+                   JUKEBOX_RFID_TRACE=trace, JUKEBOX_CROSSFADE_MS="0", SDL_AUDIODRIVER="dummy",
+                   PYTHONPATH=REPO_ROOT)
+        self.log = open(os.path.join(self.workdir, "server.log"), "w")
+        self.process = subprocess.Popen([sys.executable, "-m", "app.main"], cwd=self.workdir, env=env,
+                                        stdout=self.log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if http_request(self.port, "GET", "/api/status", timeout=2)[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"server ({self.mode}) did not start, see {self.log.name}")
+
+    def sample(self):
+        return process_sample(self.process.pid)
+
+    def scan_histogram(self):
+        """
+        PT: Contagens acumuladas do histograma jukebox_scan_to_play_seconds: {limite: contagem}.
+        EN: Cumulative counts of the jukebox_scan_to_play_seconds histogram: {bound: count}.
+        """
+        buckets = {}
+        for line in http_request(self.port, "GET", "/metrics")[1].decode().splitlines():
+            if line.startswith("jukebox_scan_to_play_seconds_bucket{"):
+                bound = line.split('le="', 1)[1].split('"', 1)[0]
+                buckets[float(bound)] = int(float(line.rsplit(" ", 1)[1]))
+        return buckets
+
+    def stop(self):
+        self.process.kill()
+        self.process.wait()
+        self.log.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def histogram_quantile(before, after, q):
+    """
+    PT: Quantil q (0-1) das observações feitas entre duas leituras do histograma, com
+        interpolação linear dentro do balde (como o histogram_quantile do Prometheus). Em ms.
+    EN: Quantile q (0-1) of the observations made between two histogram reads, with linear
+        interpolation inside the bucket (like Prometheus' histogram_quantile). In ms.
+    """
+    counts = [(bound, after[bound] - before.get(bound, 0)) for bound in sorted(after)]
+    total = counts[-1][1] if counts else 0
+    if not total:
+        return 0.0
+    rank = q * total
+    lower, below = 0.0, 0
+    for bound, cumulative in counts:
+        if cumulative >= rank:
+            if bound == float("inf"):
+                return lower * 1000
+            return (lower + (bound - lower) * (rank - below) / max(1, cumulative - below)) * 1000
+        lower, below = bound, cumulative
+    return lower * 1000
+
+
+def run_case(mode, clients, args):
+    server = ServerProcess(mode, args.songs, args.duration, args.scan_interval_ms / 1000.0)
+    try:
+        server.wait_ready()
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies, errors, broadcast_delays = [], [0], []
+        sent_at = {}
+
+        def on_event(received, name, data):
+            if name == "player_state" and "volume" in data:
+                with lock:
+                    started = sent_at.get(round(data["volume"] * 100))
+                    if started is not None:
+                        broadcast_delays.append(received - started)
+
+        polling = [PollingClient(server.port, on_event) for _ in range(clients)]
+        for client in polling:
+            client.connect()
+        threads = [threading.Thread(target=client.run, args=(stop,), daemon=True) for client in polling]
+
+        kinds = [kind for kind, weight in WORKLOAD for _ in range(weight)]
+
+        def phone(seed):
+            rng = random.Random(seed)
+            while not stop.is_set():
+                kind = rng.choice(kinds)
+                if kind == "status":
+                    path, headers = "/api/status", {}
+                elif kind == "search":
+                    path, headers = f"/api/search?q={rng.randint(0, 99):02d}", {}
+                elif kind == "library":
+                    path, headers = f"/api/library?offset={rng.randrange(args.songs)}&limit=50", {}
+                else:
+                    path, headers = f"/api/stream/song%20{rng.randrange(args.songs):04d}.mp3", {"Range": "bytes=0-8191"}
+                started = time.perf_counter()
+                try:
+                    status = http_request(server.port, "GET", path, headers=headers)[0]
+                    ok = status < 500 or status == 503
+                except OSError:
+                    ok = False
+                with lock:
+                    if ok:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors[0] += 1
+                stop.wait(rng.expovariate(1000.0 / args.think_ms) if args.think_ms else 0)
+
+        threads += [threading.Thread(target=phone, args=(i,), daemon=True) for i in range(clients)]
+        rss_peak, threads_peak = 0.0, 0
+        _, _, cpu_start = server.sample()
+        scans_start = server.scan_histogram()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        # PT: Controlador: um volume diferente por segundo; cada um vira um broadcast para todos.
+        # EN: Controller: a different volume every second; each one becomes a broadcast to everyone.
+        level = 30
+        while time.perf_counter() - started < args.duration:
+            level = 30 + (level - 29) % 40
+            with lock:
+                sent_at[level] = time.perf_counter()
+            http_request(server.port, "POST", "/api/volume", body=json.dumps({"level": level}),
+                    headers={"Content-Type": "application/json"})
+            rss, thread_count, _ = server.sample()
+            rss_peak, threads_peak = max(rss_peak, rss), max(threads_peak, thread_count)
+            time.sleep(1.0)
+        elapsed = time.perf_counter() - started
+        _, _, cpu_end = server.sample()
+        scans_end = server.scan_histogram()
+        stop.set()
+
+        summary = summarize(latencies, elapsed)
+        summary["errors"] = errors[0] + sum(client.errors for client in polling)
+        broadcast = summarize(broadcast_delays)
+        summary["broadcast_p50_ms"] = broadcast["p50_ms"]
+        summary["broadcast_p99_ms"] = broadcast["p99_ms"]
+        summary["broadcasts_received"] = broadcast["count"]
+        summary["scan_p50_ms"] = histogram_quantile(scans_start, scans_end, 0.50)
+        summary["scan_p99_ms"] = histogram_quantile(scans_start, scans_end, 0.99)
+        summary["scans_played"] = scans_end.get(float("inf"), 0) - scans_start.get(float("inf"), 0)
+        summary["rss_mb"] = rss_peak
+        summary["threads"] = threads_peak
+        summary["cpu_pct"] = (cpu_end - cpu_start) / elapsed * 100
+        return summary
+    finally:
+        server.stop()
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Server async mode concurrency benchmark")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated modes to compare")
+    parser.add_argument("--clients", default="50,100,200", help="comma-separated concurrent client counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per case")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="mean pause between a client's requests")
+    parser.add_argument("--songs", type=int, default=500)
+    parser.add_argument("--scan-interval-ms", type=float, default=500.0,
+                        help="interval between the replayed card scans during the load")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    rows = {}
+    for mode in args.modes.split(","):
+        if mode != "threading" and importlib.util.find_spec(mode) is None:
+            print(f"{mode}: not installed, skipped (pip install {mode})")
+            continue
+        for clients in (int(value) for value in args.clients.split(",")):
+            rows[f"{mode}/{clients}"] = run_case(mode, clients, args)
+            print_report("concurrency", {f"{mode}/{clients}": rows[f"{mode}/{clients}"]})
+
+    print_report(f"concurrency ({args.duration:.0f} s per case, think {args.think_ms:.0f} ms)", rows)
+    if args.json:
+        write_json(args.json, rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,95 @@
+# PT: Verificação de ida e volta da exportação: monta uma jukebox com músicas soltas, um álbum
+#     (pasta) e uma playlist .m3u, todos com cartões, exporta por /api/export, esvazia a jukebox
+#     e importa o .zip de volta por /api/bulk/import. Falha se algum arquivo ou cartão se perder,
+#     ou se algum cartão passar a tocar outras faixas.
+# EN: Export round-trip check: sets up a jukebox with loose songs, an album (folder) and an .m3u
+#     playlist, all with cards, exports through /api/export, empties the jukebox and imports the
+#     .zip back through /api/bulk/import. Fails if any file or card is lost, or if any card ends
+#     up playing different tracks.
+#
+#     python -m benchmarks.export_roundtrip
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+
+from benchmarks.common import isolated_app, silent_mp3
+
+
+def music_files(music):
+    files = set()
+    for folder, dirs, names in os.walk(music):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        files.update(os.path.relpath(os.path.join(folder, name), music).replace(os.sep, "/")
+                     for name in names if not name.startswith("."))
+    return files
+
+
+def card_tracks(main, music):
+    return {uid: [os.path.relpath(os.path.realpath(track), os.path.realpath(music))
+                  for track in main.playlist.resolve_tracks(music, name)]
+            for uid, name in main.tag_cache.items().items()}
+
+
+def run():
+    main, workdir = isolated_app()
+    music = os.path.join(workdir, "music")
+    layout = {
+        "a.mp3": silent_mp3(1.0),
+        "b.mp3": silent_mp3(2.0),
+        "Album1/01 intro.mp3": silent_mp3(3.0),
+        "Album1/02 outro.mp3": silent_mp3(4.0),
+        "Extras/bonus.mp3": silent_mp3(5.0),
+        "mix.m3u": b"#EXTM3U\nb.mp3\nExtras/bonus.mp3\n",
+    }
+    for name, data in layout.items():
+        path = os.path.join(music, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    main.library_index.start()
+    main.library_index.refresh_if_changed()
+    for uid, name in {"AA": "a.mp3", "BB": "Album1", "CC": "mix.m3u"}.items():
+        main.tag_cache.set(uid, name)
+
+    files_before = music_files(music)
+    cards_before = card_tracks(main, music)
+    client = main.app.test_client()
+    archive = client.get("/api/export").get_data()
+
+    # PT: Jukebox vazia. | EN: Empty jukebox.
+    for uid in list(main.tag_cache.items()):
+        main.tag_cache.delete(uid)
+    for entry in os.listdir(music):
+        if not entry.startswith("."):
+            path = os.path.join(music, entry)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    main.library_index.refresh_if_changed()
+
+    response = client.post("/api/bulk/import", data={"archive": (io.BytesIO(archive), "jukebox-export.zip")},
+                           content_type="multipart/form-data")
+    problems = []
+    if response.status_code != 200:
+        problems.append(f"import answered {response.status_code}: {response.get_json()}")
+    if music_files(music) != files_before:
+        problems.append(f"files differ: missing {sorted(files_before - music_files(music))}, "
+                        f"extra {sorted(music_files(music) - files_before)}")
+    if card_tracks(main, music) != cards_before:
+        problems.append(f"cards differ: {card_tracks(main, music)} != {cards_before}")
+    return problems
+
+
+def main_cli(argv=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        problems = run()
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("export round trip: OK")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
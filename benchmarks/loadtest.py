@@ -0,0 +1,354 @@
+# PT: Teste de carga de ponta a ponta das rotas HTTP e do Socket.IO. Sobe o app no próprio processo
+#     (servidor Werkzeug com threads, pygame com o driver "dummy" do SDL e um leitor RFID falso) e
+#     roda cenários realistas: celulares consultando o status e a biblioteca, arrastes do controle
+#     de volume, uploads, associações de cartões (POST + leitura + DELETE), leituras de cartões e
+#     todos juntos. Assinantes Socket.IO ficam conectados o tempo todo e contam os eventos.
+#     Cada cenário reporta vazão, latência de cauda, RSS e CPU (do processo inteiro, que inclui
+#     os geradores de carga). Com --baseline, é comparado com um baseline gravado na mesma máquina
+#     (os números de outra máquina não servem de referência): uma regressão faz o comando falhar.
+# EN: End-to-end load test of the HTTP routes and Socket.IO. Starts the app in-process (threaded
+#     Werkzeug server, pygame with SDL's "dummy" driver and a fake RFID reader) and runs realistic
+#     scenarios: phones polling the status and the library, volume slider drags, uploads, card
+#     associations (POST + scan + DELETE), card scans, and all of them together. Socket.IO
+#     subscribers stay connected the whole time and count the events.
+#     Each scenario reports throughput, tail latency, RSS and CPU (of the whole process, which
+#     includes the load generators). With --baseline, it is compared against a baseline recorded on
+#     the same machine (another machine's numbers are no reference): a regression makes the command fail.
+#
+#     python -m benchmarks.loadtest
+#     python -m benchmarks.loadtest --scenarios pollers,mixed --duration 20
+#     python -m benchmarks.loadtest --baseline base.json --save-baseline   (PT: grava o baseline desta máquina / EN: stores this machine's baseline)
+#     python -m benchmarks.loadtest --baseline base.json                   (PT: compara / EN: compares)
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+
+from benchmarks.common import (isolated_app, PollingClient, free_port, http_request, print_report, process_sample,
+                               silent_mp3, summarize, write_json)
+
+SCENARIOS = ("pollers", "slider", "uploads", "associations", "scans", "mixed")
+# PT: Abaixo disso, diferenças são ruído de medição. | EN: Below this, differences are measurement noise.
+MIN_P99_DELTA_MS = 5.0
+MIN_RSS_DELTA_MB = 10.0
+MIN_CPU_DELTA_MS = 0.5
+# PT: Com menos amostras, o p99 é praticamente o máximo de uma única execução e não é comparado.
+# EN: With fewer samples, the p99 is practically the maximum of a single run and is not compared.
+MIN_P99_SAMPLES = 200
+
+
+class QueueRFIDReader:
+    """
+    PT: Leitor RFID falso: devolve os UIDs colocados na fila pelo cenário.
+    EN: Fake RFID reader: returns the UIDs put in the queue by the scenario.
+    """
+
+    def __init__(self):
+        self.uids = queue.Queue()
+
+    def read_uid(self):
+        try:
+            return self.uids.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+
+class LoadTest:
+    def __init__(self, main, port, reader, args):
+        self.main = main
+        self.port = port
+        self.reader = reader
+        self.args = args
+        self.songs = sorted(main.library_index.page()[2])
+        self._lock = threading.Lock()
+        self._scans_sent = {}
+        self.latencies = {}
+        self.errors = 0
+        self.events = 0
+
+    # --- Registro / Recording ---
+
+    def record(self, kind, started, ok):
+        with self._lock:
+            if ok:
+                self.latencies.setdefault(kind, []).append(time.perf_counter() - started)
+            else:
+                self.errors += 1
+
+    def call(self, kind, method, path, body=None, headers=None):
+        started = time.perf_counter()
+        try:
+            status, data, response_headers = http_request(self.port, method, path, body, headers)
+        except OSError:
+            self.record(kind, started, False)
+            return None, None, None
+        self.record(kind, started, status < 500)
+        return status, data, response_headers
+
+    def on_event(self, received, name, data):
+        with self._lock:
+            self.events += 1
+            if name == "rfid_scan":
+                sent = self._scans_sent.pop(data.get("uid"), None)
+                if sent is not None:
+                    self.latencies.setdefault("scan", []).append(received - sent)
+
+    # --- Geradores de carga / Load generators ---
+
+    def poller(self, rng, stop):
+        # PT: Como o navegador: status e uma página da biblioteca, revalidada pelo ETag.
+        # EN: Like the browser: status and a library page, revalidated with the ETag.
+        etag = None
+        while not stop.is_set():
+            self.call("status", "GET", "/api/status")
+            headers = {"If-None-Match": etag} if etag else {}
+            status, _, response_headers = self.call("library", "GET", "/api/library?limit=50", headers=headers)
+            if status == 200:
+                etag = response_headers.get("ETag")
+            stop.wait(rng.uniform(0, 0.1))
+
+    def slider(self, rng, stop):
+        # PT: Um arraste: ~30 mudanças de volume por segundo durante meio segundo, e uma pausa.
+        # EN: One drag: ~30 volume changes per second for half a second, then a pause.
+        while not stop.is_set():
+            level = rng.randint(0, 100)
+            for _ in range(15):
+                level = max(0, min(100, level + rng.choice((-3, 3))))
+                self.call("volume", "POST", "/api/volume", json.dumps({"level": level}),
+                          {"Content-Type": "application/json"})
+                if stop.wait(1 / 30):
+                    return
+            stop.wait(rng.uniform(0.5, 1.5))
+
+    def uploader(self, rng, stop):
+        data = silent_mp3(self.args.upload_seconds)
+        count = 0
+        while not stop.is_set():
+            # PT: Poucos nomes por thread, para a pasta de músicas não crescer sem limite.
+            # EN: Few names per thread, so the music folder does not grow without bound.
+            filename = f"load-{threading.get_ident() % 1000}-{count % 5}.mp3"
+            boundary = uuid.uuid4().hex
+            body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+                    "Content-Type: audio/mpeg\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+            self.call("upload", "POST", "/api/upload", body, {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+            count += 1
+            stop.wait(rng.uniform(0.2, 0.5))
+
+    def associator(self, rng, stop):
+        # PT: O fluxo da interface: escolhe a música, aproxima um cartão novo e depois remove a associação.
+        # EN: The interface flow: picks the song, taps a new card and then removes the association.
+        while not stop.is_set():
+            song = rng.choice(self.songs)
+            uid = f"load-{uuid.uuid4().hex[:8]}"
+            started = time.perf_counter()
+            status, _, _ = self.call("initiate", "POST", "/api/initiate_association", json.dumps({"filename": song}),
+                                     {"Content-Type": "application/json"})
+            if status != 200:
+                stop.wait(0.1)
+                continue
+            self.reader.uids.put(uid)
+            deadline = time.perf_counter() + 5
+            while self.main.tag_cache.get(uid) != song and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            self.record("association", started, self.main.tag_cache.get(uid) == song)
+            self.call("delete_association", "DELETE", f"/api/association/{uid}")
+            stop.wait(rng.uniform(0.1, 0.3))
+
+    def scanner(self, rng, stop):
+        # PT: Cartões conhecidos em um ritmo fixo; a latência vai da leitura ao evento 'rfid_scan' no assinante.
+        # EN: Known cards at a fixed rate; latency goes from the scan to the 'rfid_scan' event at the subscriber.
+        cards = sorted(uid for uid in self.main.tag_cache.items() if uid.startswith("card-"))
+        while not stop.is_set():
+            # PT: Com uma associação pendente, o cartão seria associado à música escolhida; espera.
+            # EN: With a pending association, the card would be assigned to the chosen song; wait.
+            if self.main.assignment_state["pending_file"]:
+                stop.wait(0.01)
+                continue
+            uid = rng.choice(cards)
+            with self._lock:
+                self._scans_sent[uid] = time.perf_counter()
+            self.reader.uids.put(uid)
+            stop.wait(1.0 / self.args.scan_rate)
+
+    # --- Cenários / Scenarios ---
+
+    def workers(self, scenario):
+        args = self.args
+        plan = {
+            "pollers": [(self.poller, args.pollers)],
+            "slider": [(self.slider, args.sliders)],
+            "uploads": [(self.uploader, args.uploaders)],
+            "associations": [(self.associator, 1)],
+            "scans": [(self.scanner, 1)],
+        }
+        if scenario == "mixed":
+            return [worker for name in SCENARIOS[:-1] for worker in plan[name]]
+        return plan[scenario]
+
+    def run(self, scenario):
+        with self._lock:
+            self.latencies, self.errors, self.events = {}, 0, 0
+        stop = threading.Event()
+        targets = [target for target, count in self.workers(scenario) for _ in range(count)]
+        threads = [threading.Thread(target=target, args=(random.Random(index), stop), daemon=True)
+                   for index, target in enumerate(targets)]
+        rss_peak = 0.0
+        cpu_start = sum(os.times()[:2])
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        while time.perf_counter() - started < self.args.duration:
+            rss_peak = max(rss_peak, process_sample()[0])
+            time.sleep(0.25)
+        stop.set()
+        for thread in threads:
+            thread.join(10)
+        elapsed = time.perf_counter() - started
+        cpu = sum(os.times()[:2]) - cpu_start
+
+        with self._lock:
+            latencies = {kind: list(values) for kind, values in self.latencies.items()}
+            errors, events = self.errors, self.events
+        summary = summarize([value for values in latencies.values() for value in values], elapsed)
+        summary["errors"] = errors
+        summary["events_per_s"] = events / elapsed
+        summary["rss_mb"] = rss_peak
+        summary["cpu_pct"] = cpu / elapsed * 100
+        for kind, values in sorted(latencies.items()):
+            if len(latencies) > 1:
+                summary[f"{kind}_p99_ms"] = summarize(values)["p99_ms"]
+        return summary
+
+
+def cpu_ms_per_op(row):
+    """
+    PT: Tempo de CPU por operação concluída, em ms: o CPU% sozinho cresce junto com a vazão.
+    EN: CPU time per completed operation, in ms: CPU% alone grows along with throughput.
+    """
+    return row["cpu_pct"] * 10 / row["throughput_per_s"] if row["throughput_per_s"] else 0.0
+
+
+def compare(rows, baseline, tolerance):
+    """
+    PT: Compara com o baseline e retorna (regressões, avisos). Regressões: p99 (só com amostras
+        suficientes dos dois lados), vazão, erros, pico de RSS e CPU por operação.
+    EN: Compares against the baseline and returns (regressions, notes). Regressions: p99 (only
+        with enough samples on both sides), throughput, errors, peak RSS and CPU per operation.
+    """
+    regressions, notes = [], []
+    for scenario, row in rows.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        p99, base_p99 = row["p99_ms"], base["p99_ms"]
+        samples = min(row["count"], base["count"])
+        if samples < MIN_P99_SAMPLES:
+            notes.append(f"{scenario}: p99 not compared ({samples} samples < {MIN_P99_SAMPLES}, use a longer --duration)")
+        elif p99 > base_p99 * (1 + tolerance) and p99 - base_p99 > MIN_P99_DELTA_MS:
+            regressions.append(f"{scenario}: p99 {p99:.1f} ms > baseline {base_p99:.1f} ms")
+        if row["throughput_per_s"] < base["throughput_per_s"] * (1 - tolerance):
+            regressions.append(f"{scenario}: throughput {row['throughput_per_s']:.1f}/s < baseline {base['throughput_per_s']:.1f}/s")
+        if row["errors"] > base["errors"]:
+            regressions.append(f"{scenario}: {row['errors']} errors > baseline {base['errors']}")
+        if row["rss_mb"] > base["rss_mb"] * (1 + tolerance) and row["rss_mb"] - base["rss_mb"] > MIN_RSS_DELTA_MB:
+            regressions.append(f"{scenario}: RSS {row['rss_mb']:.1f} MB > baseline {base['rss_mb']:.1f} MB")
+        cpu, base_cpu = cpu_ms_per_op(row), cpu_ms_per_op(base)
+        if cpu > base_cpu * (1 + tolerance) and cpu - base_cpu > MIN_CPU_DELTA_MS:
+            regressions.append(f"{scenario}: CPU {cpu:.2f} ms/op > baseline {base_cpu:.2f} ms/op")
+    return regressions, notes
+
+
+def start_app(args):
+    main, workdir = isolated_app()
+    music = os.path.join(workdir, "music")
+    data = silent_mp3()
+    for i in range(args.songs):
+        with open(os.path.join(music, f"song {i:04d}.mp3"), "wb") as f:
+            f.write(data)
+    for i in range(args.cards):
+        main.tag_cache.set(f"card-{i}", f"song {i % args.songs:04d}.mp3")
+    main.library_index.start()
+    main.player.ready.wait(10)
+    main.player_watcher.start()
+
+    reader = QueueRFIDReader()
+    main.scan_bus.add_reader("loadtest", reader)
+
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    port = free_port()
+    server = make_server("127.0.0.1", port, main.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return main, port, reader
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end HTTP/Socket.IO load test")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--subscribers", type=int, default=20, help="Socket.IO clients connected the whole time")
+    parser.add_argument("--pollers", type=int, default=20)
+    parser.add_argument("--sliders", type=int, default=2)
+    parser.add_argument("--uploaders", type=int, default=2)
+    parser.add_argument("--upload-seconds", type=float, default=30.0, help="length of each uploaded (silent) MP3")
+    parser.add_argument("--scan-rate", type=float, default=5.0, help="card scans per second")
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--cards", type=int, default=100)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="baseline file (recorded on this machine) to compare against; "
+                                           "without it, nothing is compared")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline FILE")
+
+    rows = {}
+    # PT: O app registra cada leitura e cada play no log; a saída dele é descartada durante o teste.
+    # EN: The app logs every scan and every play; its output is discarded during the test.
+    with contextlib.redirect_stdout(io.StringIO()):
+        main, port, reader = start_app(args)
+        test = LoadTest(main, port, reader, args)
+        stop = threading.Event()
+        subscribers = [PollingClient(port, test.on_event) for _ in range(args.subscribers)]
+        for subscriber in subscribers:
+            subscriber.connect()
+            threading.Thread(target=subscriber.run, args=(stop,), daemon=True).start()
+        for scenario in args.scenarios.split(","):
+            rows[scenario] = test.run(scenario)
+        stop.set()
+
+    print_report(f"loadtest ({args.duration:.0f} s per scenario, {args.subscribers} subscribers)", rows)
+    if args.json:
+        write_json(args.json, rows)
+    if not args.baseline:
+        return 0
+    if args.save_baseline:
+        write_json(args.baseline, {"host": socket.gethostname(), "scenarios": rows})
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("host") != socket.gethostname():
+        print(f"NOTE: baseline recorded on '{baseline.get('host')}', not on this machine; "
+              "latency and CPU differences may be the hardware")
+    regressions, notes = compare(rows, baseline.get("scenarios", {}), args.tolerance)
+    for note in notes:
+        print(f"NOTE: {note}")
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,185 @@
+# PT: Benchmark do pipeline do listener RFID (leitura -> barramento -> busca da tag -> WebSocket -> fila do
+#     PlayerActor -> Player.play) usando o ReplayRFIDReader e um player nulo. Não precisa de hardware.
+# EN: Benchmark of the RFID listener pipeline (scan -> scan bus -> tag lookup -> WebSocket ->
+#     PlayerActor queue -> Player.play) using ReplayRFIDReader and a null player. Needs no hardware.
+#
+#     A latência até o play é medida a partir do instante da própria leitura (ScanEvent.ts), uma
+#     amostra por leitura que pede um play: leituras em rajada combinadas no ator contam até o play
+#     que as substituiu. Também mede a latência de despacho de cada leitura entregue.
+# EN: The latency until play is measured from the scan's own timestamp (ScanEvent.ts), one sample
+#     per scan that requests a play: burst scans coalesced in the actor count until the play that
+#     replaced them. Also measures the dispatch latency of every delivered scan.
+#
+#     python -m benchmarks.scan_latency --scans 5000
+#     python -m benchmarks.scan_latency --trace cards.txt --max-p99-ms 5
+#     python -m benchmarks.scan_latency --readers 4
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+from benchmarks.common import isolated_app, print_report, summarize, write_json
+
+
+class NullPlayer:
+    """
+    PT: Player sem áudio: o play só guarda a faixa atual.
+    EN: Audio-less player: play only keeps the current track.
+    """
+
+    def __init__(self):
+        self.current_song = None
+
+    def play(self, song_path):
+        self.current_song = song_path
+
+    def play_tracks(self, paths, start=0, collection=None):
+        self.play(paths[start])
+
+    def advance(self):
+        return False
+
+    def get_status(self):
+        return {"current_song": self.current_song, "is_playing": bool(self.current_song),
+                "is_paused": False, "volume": 0.5}
+
+
+def synthetic_trace(scans, cards, rate, burst_size, repeat_ratio, unknown_ratio, seed=1):
+    """
+    PT: Gera um roteiro com rajadas de leituras, cartões repetidos e cartões desconhecidos.
+    EN: Generates a script with scan bursts, repeated cards and unknown cards.
+    """
+    rng = random.Random(seed)
+    gap = (burst_size / rate) if rate else 0.0
+    previous = None
+    for i in range(scans):
+        if previous and rng.random() < repeat_ratio:
+            uid = previous
+        elif rng.random() < unknown_ratio:
+            uid = f"unknown-{rng.randrange(1_000_000)}"
+        else:
+            uid = f"card-{rng.randrange(cards)}"
+        previous = uid
+        delay = gap if i % burst_size == 0 else 0.0
+        yield delay, uid
+
+
+def run(args):
+    main, workdir = isolated_app()
+    from app.rfid import ReplayRFIDReader, ScanDebouncer, load_trace
+    from app.player_actor import PlayerActor
+
+    # PT: Arquivos vazios bastam: o play_entry só verifica se existem, e o player é nulo.
+    # EN: Empty files are enough: play_entry only checks that they exist, and the player is null.
+    for i in range(args.cards):
+        open(os.path.join(workdir, "music", f"song-{i}.mp3"), "wb").close()
+        main.tag_cache.set(f"card-{i}", f"song-{i}.mp3")
+
+    if args.trace:
+        events = list(load_trace(args.trace))
+    else:
+        events = list(synthetic_trace(args.scans, args.cards, args.rate, args.burst_size,
+                                      args.repeat_ratio, args.unknown_ratio))
+
+    # PT: Com --readers N, o roteiro é dividido entre N leitores que publicam no mesmo barramento.
+    # EN: With --readers N, the script is split across N readers publishing to the same bus.
+    readers = []
+    for index in range(args.readers):
+        debouncer = ScanDebouncer(args.debounce) if args.debounce > 0 else None
+        readers.append(ReplayRFIDReader(events[index::args.readers], rate=args.rate, debouncer=debouncer))
+    null_player = NullPlayer()
+    main.player = null_player
+    main.player_actor = PlayerActor(null_player)
+    main.player_actor.start()
+
+    # PT: Latência até o play: o mesmo gancho do histograma SCAN_TO_PLAY_SECONDS, com o instante da
+    #     leitura que o handle_scan recebeu, registrado quando o Future do play do ator termina.
+    # EN: Latency until play: the same hook as the SCAN_TO_PLAY_SECONDS histogram, with the timestamp
+    #     of the scan handle_scan received, recorded when the actor's play Future completes.
+    play_latencies = []
+    observe_scan_to_play = main._observe_scan_to_play
+
+    def timed_observe(future, scanned_at):
+        def observe(done):
+            if done.exception() is None:
+                play_latencies.append(time.perf_counter() - scanned_at)
+        observe_scan_to_play(future, scanned_at)
+        if future is not None:
+            future.add_done_callback(observe)
+    main._observe_scan_to_play = timed_observe
+
+    # PT: Latência de despacho: da publicação no barramento até handle_scan terminar (play enviado ao ator).
+    # EN: Dispatch latency: from publishing on the bus until handle_scan returns (play sent to the actor).
+    dispatch_latencies = []
+    handle = main.scan_dispatcher.default_action
+
+    def timed_handle(event):
+        handle(event)
+        dispatch_latencies.append(time.perf_counter() - event.ts)
+    main.scan_dispatcher.default_action = timed_handle
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index, replay in enumerate(readers):
+            main.scan_bus.add_reader(f"replay-{index}", replay)
+        for replay in readers:
+            replay.finished.wait()
+        # PT: Espera o despachante esvaziar o barramento e o ator executar os plays que ainda estão na fila.
+        # EN: Waits for the dispatcher to drain the bus and the actor to run the plays still in its queue.
+        while main.scan_dispatcher.dispatched + main.scan_bus.dropped < main.scan_bus.published:
+            time.sleep(0.001)
+        main.player_actor.get_status()
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(play_latencies)
+    delivered = sum(replay.emitted for replay in readers)
+    summary["scans_delivered"] = delivered
+    summary["scans_suppressed"] = sum(replay.debouncer.suppressed for replay in readers if replay.debouncer)
+    summary["scans_dropped"] = main.scan_bus.dropped
+    summary["plays_coalesced"] = main.player_actor.coalesced
+    summary["throughput_per_s"] = delivered / elapsed if elapsed else 0.0
+    return {"scan_to_play": summary, "dispatch": summarize(dispatch_latencies)}
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="RFID scan-to-play latency benchmark")
+    parser.add_argument("--trace", help="trace file ('<delay> <uid>' per line)")
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=100.0, help="scans/s (0 = as fast as possible)")
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--repeat-ratio", type=float, default=0.2)
+    parser.add_argument("--unknown-ratio", type=float, default=0.1)
+    parser.add_argument("--readers", type=int, default=1, help="number of replay readers sharing the scan bus")
+    parser.add_argument("--debounce", type=float, default=0.0, help="debounce window in seconds (0 = off)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if p99 latency exceeds this value")
+    parser.add_argument("--min-samples", type=int, default=100,
+                        help="warn (and fail with --max-p99-ms) below this many scan-to-play samples")
+    args = parser.parse_args(argv)
+
+    rows = run(args)
+    print_report("scan-to-play", rows)
+    if args.json:
+        write_json(args.json, rows)
+    summary = rows["scan_to_play"]
+    if summary["count"] < args.min_samples:
+        # PT: Com poucas amostras o p99 é só a maior delas; use --rate menor ou mais --scans.
+        # EN: With few samples the p99 is just the largest one; use a lower --rate or more --scans.
+        print(f"WARNING: only {summary['count']} scan-to-play samples (< {args.min_samples}); "
+              f"{summary['scans_dropped']} scans dropped, {summary['plays_coalesced']} plays coalesced")
+        if args.max_p99_ms is not None:
+            print("FAIL: too few samples to check the p99")
+            return 1
+    if args.max_p99_ms is not None and summary["p99_ms"] > args.max_p99_ms:
+        print(f"FAIL: p99 {summary['p99_ms']:.2f} ms > {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
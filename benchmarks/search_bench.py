@@ -0,0 +1,160 @@
+# PT: Benchmark do índice de busca (app/search.py) com uma biblioteca sintética grande:
+#     tempo de construção, memória do índice e latência das consultas (prefixo, substring,
+#     vários termos, filtros e páginas seguintes por cursor). Não precisa de arquivos reais.
+# EN: Benchmark of the search index (app/search.py) with a large synthetic library:
+#     build time, index memory and query latency (prefix, substring, several terms, filters
+#     and following pages by cursor). Needs no real files.
+#
+#     python -m benchmarks.search_bench --entries 100000
+#     python -m benchmarks.search_bench --entries 100000 --max-p99-ms 50
+
+import argparse
+import random
+import sys
+import time
+
+from app.search import SearchIndex, FILTER_UNASSIGNED, FILTER_ORPHANED
+from benchmarks.common import print_report, summarize, write_json
+
+WORDS = ("love", "night", "blue", "river", "dança", "coração", "samba", "rock", "song", "light",
+         "summer", "road", "fire", "canção", "moon", "dream", "city", "heart", "rain", "sol")
+ARTISTS = ("Caetano Veloso", "Gilberto Gil", "Elis Regina", "The Beatles", "Queen", "Nina Simone",
+           "Tom Jobim", "Daft Punk", "Miles Davis", "Marisa Monte")
+
+
+class MemoryTags:
+    """
+    PT: Associações em memória com a mesma interface de leitura do TagStore.
+    EN: In-memory associations with the same read interface as TagStore.
+    """
+
+    def __init__(self, entries):
+        self._entries = dict(entries)
+        self.version = 1
+
+    def items(self):
+        return dict(self._entries)
+
+    def get(self, uid):
+        return self._entries.get(uid)
+
+
+def synthetic_library(entries, seed=1):
+    rng = random.Random(seed)
+    names = []
+    metadata = {}
+    for i in range(entries):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        name = f"{i:06d} - {title}.mp3"
+        names.append(name)
+        if rng.random() < 0.7:
+            metadata[name] = {"title": title.title(), "artist": rng.choice(ARTISTS), "album": f"Album {i % 500}"}
+    return names, metadata
+
+
+def timed(function, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(args):
+    names, metadata = synthetic_library(args.entries)
+    rng = random.Random(2)
+    cards = {f"card-{i}": name for i, name in enumerate(rng.sample(names, min(args.cards, len(names))))}
+    cards.update({f"lost-{i}": f"missing-{i}.mp3" for i in range(args.cards // 10)})
+    known = set(names)
+    index = SearchIndex(metadata.get, MemoryTags(cards), is_known=known.__contains__)
+
+    rows = {}
+    start = time.perf_counter()
+    for name in names:
+        index.on_library_change("added", name)
+    len(index)
+    build = time.perf_counter() - start
+    rows["build"] = {"entries": len(index), "seconds": build, "index_mb": (len(index._haystack) + len(index._tails)) / 2 ** 20}
+
+    queries = {
+        "prefix_1char": "r",
+        "prefix": "riv",
+        "word": "samba",
+        "substring": "ança",
+        "two_terms": "blue moon",
+        "artist": "jobim",
+        "accents": "coracao",
+        "no_match": "zzzz",
+    }
+    for label, query in queries.items():
+        # PT: Cada repetição limpa o cache de resultados, para medir a busca em si.
+        # EN: Each repeat clears the result cache, to measure the search itself.
+        def cold(query=query):
+            index._results.clear()
+            return index.search(query, limit=args.page_size)
+        summary = summarize(timed(cold, args.repeat))
+        summary["total"] = index.search(query, limit=1)["total"]
+        rows[label] = summary
+
+    def browse_all():
+        index._results.clear()
+        return index.search("", limit=args.page_size)
+    rows["browse_all"] = summarize(timed(browse_all, args.repeat))
+
+    for label, filter_name in (("filter_unassigned", FILTER_UNASSIGNED), ("filter_orphaned", FILTER_ORPHANED)):
+        def filtered(filter_name=filter_name):
+            index._results.clear()
+            return index.search("", filter_name, limit=args.page_size)
+        summary = summarize(timed(filtered, max(1, args.repeat // 5)))
+        summary["total"] = index.search("", filter_name, limit=1)["total"]
+        rows[label] = summary
+
+    # PT: Páginas seguintes da mesma consulta: só um bisect no resultado em cache.
+    # EN: Following pages of the same query: only a bisect over the cached result.
+    page = index.search("love", limit=args.page_size)
+    cursors = []
+    while page["next_cursor"] and len(cursors) < args.repeat:
+        cursors.append(page["next_cursor"])
+        page = index.search("love", cursor=page["next_cursor"], limit=args.page_size)
+    latencies = []
+    for cursor in cursors:
+        start = time.perf_counter()
+        index.search("love", cursor=cursor, limit=args.page_size)
+        latencies.append(time.perf_counter() - start)
+    rows["next_page"] = summarize(latencies)
+
+    # PT: Uma música nova (ex: upload) seguida de uma busca: aplica a alteração em lote.
+    # EN: A new song (e.g. an upload) followed by a search: applies the change in a batch.
+    def add_then_search():
+        name = f"new-{rng.random()}.mp3"
+        index.on_library_change("added", name)
+        return index.search("new", limit=args.page_size)
+    rows["add_then_search"] = summarize(timed(add_then_search, args.repeat))
+    return rows
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Library search index benchmark")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if a query p99 latency exceeds this value")
+    args = parser.parse_args(argv)
+
+    rows = run(args)
+    print_report(f"search ({args.entries} entries)", rows)
+    if args.json:
+        write_json(args.json, rows)
+    if args.max_p99_ms is not None:
+        slow = [name for name, row in rows.items() if row.get("p99_ms", 0) > args.max_p99_ms]
+        if slow:
+            print(f"FAIL: p99 > {args.max_p99_ms} ms: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())